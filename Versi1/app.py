@@ -1,15 +1,57 @@
 # File: venv/app.py
 # Aplikasi Flask untuk sistem manajemen ujian
-from flask import Flask, render_template, redirect, url_for, flash, request
+import atexit
+import os
+import sys
+from collections import namedtuple
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))) # Agar paket common dapat diimpor
+from flask import Flask, render_template, redirect, url_for, flash, request, jsonify
+from markupsafe import Markup
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
-from database import init_db, db_session
+from sqlalchemy import and_, func, select
+from database import init_db, db_session, engine
+from common.db_engine import effective_settings
+from common.instrumentation import Instrumentation
+from common.startup import configure_template_cache
+from common.static_assets import StaticFingerprints
+from common.submission_queue import SubmissionQueue
+from common.password_hashing import PasswordHasher, HashingBusy, busy_response
+from common.user_cache import UserCache
 from models import User, Exam, Question, Option, Answer
 from forms import RegistrationForm, LoginForm, ExamForm, QuestionForm
+from common.exam_content import ExamContentCache, bump_exam_version
 
 app = Flask(__name__) # Inisialisasi aplikasi Flask
 app.config['SECRET_KEY'] = 'your_secret_key_here' # Ganti dengan kunci rahasia yang kuat
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False # Nonaktifkan tracking modifikasi untuk mengurangi overhead
+app.config['TEMPLATE_CACHE_DIR'] = os.environ.get('EXAM_TEMPLATE_CACHE_DIR', os.path.join(app.root_path, 'template_cache')) # Cache bytecode Jinja bersama ('' = nonaktif)
+
+instrumentation = Instrumentation.from_env().init_app(app, engine) # Waktu route, query SQL, /metrics dan profiler opsional (EXAM_PROFILE_SLOW_MS)
+static_assets = StaticFingerprints().init_app(app) # url_for('static') menambahkan ?v=<sidik>, di-cache selamanya
+configure_template_cache(app, app.config['TEMPLATE_CACHE_DIR']) # Template tidak dikompilasi ulang di setiap pekerja
+
+exam_contents = ExamContentCache(Exam, Question, Option) # Cache isi ujian, kunci jawaban dan HTML per versi ujian
+
+if os.environ.get('EXAM_AUTO_MIGRATE', '1') == '1':
+    init_db() # Migrasi skema dijalankan sekali saat aplikasi dimuat, bukan di setiap permintaan
+
+user_cache = UserCache(User, max_entries=int(os.environ.get('EXAM_USER_CACHE_SIZE', 1024)),
+                       ttl=float(os.environ.get('EXAM_USER_CACHE_TTL', 300))).watch() # Snapshot pengguna, dibuang saat role/password di-commit
+
+password_hasher = PasswordHasher.from_env().start() # Pekerja hashing di-fork sebelum thread antrean pengiriman berjalan
+app.register_error_handler(HashingBusy, busy_response) # Antrean hashing penuh -> 503 + Retry-After
+
+submission_queue = None # Antrean pengiriman write-behind (opsional, EXAM_SUBMISSION_QUEUE=1)
+if os.environ.get('EXAM_SUBMISSION_QUEUE') == '1':
+    submission_queue = SubmissionQueue(engine, Answer.__table__,
+                                       os.environ.get('EXAM_SUBMISSION_JOURNAL_DIR', os.path.join(app.root_path, 'journal')),
+                                       batch_size=int(os.environ.get('EXAM_SUBMISSION_BATCH_SIZE', 500))).start()
+    atexit.register(submission_queue.stop) # Tulis sisa antrean saat proses berhenti
+
+instrumentation.register_collector('user_cache', user_cache.metrics)
+instrumentation.register_collector('password_hashing', password_hasher.metrics)
+if submission_queue:
+    instrumentation.register_collector('submission_queue', submission_queue.metrics)
 
 login_manager = LoginManager() # Inisialisasi Flask-Login
 login_manager.init_app(app) #   Menghubungkan Flask-Login dengan aplikasi Flask
@@ -17,11 +59,7 @@ login_manager.login_view = 'login' # Halaman login yang akan di-redirect jika pe
 
 @login_manager.user_loader
 def load_user(user_id):
-    return db_session.query(User).get(int(user_id))
-
-@app.before_request
-def before_request():
-    init_db() # Pastikan database diinisialisasi sebelum setiap permintaan
+    return user_cache.load(db_session, user_id) # Query hanya saat miss atau kedaluwarsa
 
 @app.teardown_request
 def teardown_request(exception=None):
@@ -29,6 +67,28 @@ def teardown_request(exception=None):
 
 # --- Routes ---
 
+@app.route('/metrics/users') # Hit/miss cache identitas pengguna
+@instrumentation.protected
+def user_cache_metrics():
+    return jsonify(user_cache.metrics())
+
+@app.route('/metrics/hashing') # Jumlah dan waktu hashing per operasi serta permintaan yang ditolak
+@instrumentation.protected
+def hashing_metrics():
+    return jsonify(password_hasher.metrics())
+
+@app.route('/metrics/submissions') # Kedalaman antrean, ukuran batch dan latensi flush
+@instrumentation.protected
+def submission_metrics():
+    if not submission_queue:
+        return jsonify(enabled=False)
+    return jsonify(enabled=True, **submission_queue.metrics())
+
+@app.route('/health/db') # Pengaturan database yang berlaku (pragma SQLite dan status pool)
+@instrumentation.protected
+def health_db():
+    return jsonify(effective_settings(engine))
+
 @app.route('/') # Halaman utama
 def index(): # Tampilkan halaman utama
     return render_template('index.html') # Ganti dengan template yang sesuai
@@ -37,7 +97,7 @@ def index(): # Tampilkan halaman utama
 def register():
     form = RegistrationForm()
     if form.validate_on_submit():
-        hashed_password = generate_password_hash(form.password.data, method='pbkdf2:sha256')
+        hashed_password = password_hasher.hash(form.password.data)
         new_user = User(username=form.username.data, password=hashed_password, role='student') # Default role student
         db_session.add(new_user)
         db_session.commit()
@@ -50,8 +110,11 @@ def login():
     form = LoginForm()
     if form.validate_on_submit():
         user = db_session.query(User).filter_by(username=form.username.data).first()
-        if user and check_password_hash(user.password, form.password.data):
-            login_user(user)
+        if user and password_hasher.verify(user.password, form.password.data):
+            if password_hasher.needs_rehash(user.password): # Parameter hashing berubah sejak password disimpan
+                user.password = password_hasher.hash(form.password.data)
+                db_session.commit()
+            login_user(user_cache.put(user))
             flash('Login berhasil!', 'success')
             next_page = request.args.get('next')
             return redirect(next_page or url_for('dashboard'))
@@ -73,11 +136,29 @@ def dashboard():
         exams = db_session.query(Exam).all()
         return render_template('dashboard.html', exams=exams, user=current_user)
     elif current_user.role == 'student':
-        # Tampilkan ujian yang tersedia untuk siswa
-        exams = db_session.query(Exam).all() # Untuk sementara, tampilkan semua ujian
-        return render_template('dashboard.html', exams=exams, user=current_user)
+        # Tampilkan ujian yang tersedia untuk siswa beserta skor jawaban terakhirnya
+        exams = student_exam_rows(db_session, current_user.id)
+        return render_template('dashboard.html', exams=exams, user=current_user, pdf_download=False) # Versi1 belum punya unduhan PDF
     return redirect(url_for('index')) # Atau halaman error
 
+DashboardRow = namedtuple('DashboardRow', 'id title description answer_id score') # Bentuk baris sama dengan dashboard Versi2
+
+def student_exam_rows(session, user_id):
+    latest = (select(Answer.exam_id, func.max(Answer.id).label('answer_id')) # Jawaban terakhir siswa untuk setiap soal
+              .where(Answer.user_id == user_id)
+              .group_by(Answer.exam_id, Answer.question_id)
+              .subquery())
+    results = (select(latest.c.exam_id, func.max(latest.c.answer_id).label('answer_id'), func.count(Option.id).label('score'))
+               .select_from(latest)
+               .join(Answer, Answer.id == latest.c.answer_id)
+               .outerjoin(Option, and_(Option.id == Answer.selected_option_id, Option.is_correct)) # Hanya opsi benar yang dihitung
+               .group_by(latest.c.exam_id)
+               .subquery())
+    query = (session.query(Exam.id, Exam.title, Exam.description, results.c.answer_id, results.c.score)
+             .outerjoin(results, results.c.exam_id == Exam.id)
+             .order_by(Exam.id)) # Satu statement untuk semua ujian
+    return [DashboardRow(*row) for row in query]
+
 @app.route('/manage_exams', methods=['GET', 'POST'])
 @login_required
 def manage_exams():
@@ -113,7 +194,9 @@ def manage_exams():
             if option_text:
                 new_option = Option(question_id=new_question.id, text=option_text, is_correct=is_correct)
                 db_session.add(new_option)
+        bump_exam_version(db_session, Exam, exam.id) # Isi ujian berubah, cache versi lama tidak dipakai lagi
         db_session.commit()
+        exam_contents.invalidate(exam.id)
         flash('Pertanyaan berhasil ditambahkan!', 'success')
         return redirect(url_for('manage_exams'))
 
@@ -127,33 +210,36 @@ def take_exam(exam_id):
         flash('Anda tidak memiliki izin untuk mengakses halaman ini.', 'danger')
         return redirect(url_for('dashboard'))
 
-    exam = db_session.query(Exam).get(exam_id)
+    exam = exam_contents.get(db_session, exam_id) # Isi ujian dimuat eager dan di-cache per versi
     if not exam:
         flash('Ujian tidak ditemukan.', 'danger')
         return redirect(url_for('dashboard'))
 
     if request.method == 'POST': # Proses pengiriman jawaban
-        score = 0
-        for question in exam.questions:
-            selected_option_id = request.form.get(f'question_{question.id}')
-            if selected_option_id:
-                selected_option = db_session.query(Option).get(int(selected_option_id))
-                if selected_option and selected_option.is_correct:
-                    score += 1
-
-                # Simpan jawaban siswa
-                new_answer = Answer(
-                    user_id=current_user.id,
-                    exam_id=exam.id,
-                    question_id=question.id,
-                    selected_option_id=selected_option.id if selected_option else None
-                )
-                db_session.add(new_answer)
-        db_session.commit()
-        flash(f'Anda menyelesaikan ujian {exam.title} dengan skor: {score}/{len(exam.questions)}', 'success')
+        answer_key = exam.answer_key # Kunci jawaban dari cache, tanpa query per soal
+        selections = answer_key.selections_from_form(request.form)
+        score = answer_key.score(selections)
+
+        # Simpan jawaban siswa
+        rows = [dict(user_id=current_user.id,
+                     exam_id=exam.id,
+                     question_id=question_id,
+                     selected_option_id=selections.get(question_id))
+                for question_id in answer_key.question_ids if request.form.get(f'question_{question_id}')]
+        if submission_queue:
+            submission_queue.enqueue(rows) # Satu baris jurnal per pengiriman, ditulis ke database per batch
+        else:
+            db_session.add_all([Answer(**row) for row in rows])
+            db_session.commit()
+        flash(f'Anda menyelesaikan ujian {exam.title} dengan skor: {score}/{len(answer_key)}', 'success')
         return redirect(url_for('dashboard'))
 
-    return render_template('take_exam.html', exam=exam)
+    questions_html = exam_contents.fragment(exam, render_exam_questions) # Dirender sekali per versi ujian
+    return render_template('take_exam.html', exam=exam, questions_html=questions_html)
+
+
+def render_exam_questions(exam):
+    return Markup(render_template('_exam_questions.html', exam=exam))
 
 
 if __name__ == '__main__':
@@ -1,8 +1,15 @@
-from sqlalchemy import create_engine # Inisialisasi koneksi ke database
+import os
+import sys
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR) # Agar paket common dapat diimpor
 from sqlalchemy.orm import scoped_session, sessionmaker # Menggunakan scoped_session untuk thread-safety
 from sqlalchemy.ext.declarative import declarative_base # Deklarasi base class untuk model
 
-engine = create_engine('sqlite:///exam_management.db') # Menggunakan SQLite
+from common.db_engine import load_settings, create_db_engine # Pabrik engine bersama (WAL, busy timeout, pool)
+
+db_settings = load_settings('sqlite:///exam_management.db') # Pengaturan dari environment EXAM_DB_*
+engine = create_db_engine(db_settings) # Menggunakan SQLite
 db_session = scoped_session(sessionmaker(autocommit=False,
                                          autoflush=False,
                                          bind=engine))
@@ -10,6 +17,7 @@ db_session = scoped_session(sessionmaker(autocommit=False,
 Base = declarative_base() # Base class untuk semua model
 Base.query = db_session.query # Menambahkan query ke Base class
 
-def init_db(): # Inisialisasi database
-    import models # Import semua model di sini agar terdeteksi oleh Base.metadata
-    Base.metadata.create_all(bind=engine)
+def init_db(): # Inisialisasi database: terapkan migrasi skema yang belum dijalankan
+    from common.migrations import run_migrations
+    from migrations import MIGRATIONS # Daftar migrasi (lihat migrations.py)
+    run_migrations(engine, MIGRATIONS)
@@ -0,0 +1,31 @@
+# File: migrations.py
+# Daftar migrasi skema Versi1. Jalankan: python migrations.py [status|upgrade]
+from database import Base, engine
+from common.migrations import Migration, add_column_if_missing, create_indexes, main
+from common.submission_queue import create_checkpoint_table
+
+
+def create_tables(connection): # Skema awal: semua tabel dari model
+    import models # Import semua model di sini agar terdeteksi oleh Base.metadata
+    Base.metadata.create_all(bind=connection)
+
+
+def add_exam_version(connection): # Kolom versi ujian untuk invalidasi cache isi ujian
+    add_column_if_missing(connection, 'exams', 'version', 'INTEGER NOT NULL DEFAULT 1')
+
+
+def add_lookup_indexes(connection): # Indeks untuk answers(user_id, exam_id), options(question_id, is_correct), questions(exam_id)
+    import models
+    create_indexes(connection, Base.metadata)
+
+
+MIGRATIONS = [
+    Migration(1, 'create_tables', create_tables),
+    Migration(2, 'add_exam_version', add_exam_version),
+    Migration(3, 'add_lookup_indexes', add_lookup_indexes),
+    Migration(4, 'create_submission_queue_checkpoints', create_checkpoint_table),
+]
+
+
+if __name__ == '__main__':
+    raise SystemExit(main(engine, MIGRATIONS))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey # Import modul yang diperlukan dari SQLAlchemy
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Index # Import modul yang diperlukan dari SQLAlchemy
 from sqlalchemy.orm import relationship # Untuk mengelola relasi antar tabel 
 from flask_login import UserMixin # Untuk integrasi dengan Flask-Login
 from database import Base # Import Base dari database untuk mendefinisikan model
@@ -20,6 +20,7 @@ class Exam(Base):
     id = Column(Integer, primary_key=True)
     title = Column(String(100), nullable=False)
     description = Column(String(255))
+    version = Column(Integer, nullable=False, default=1) # Naik setiap kali isi ujian diubah (untuk invalidasi cache)
 
     questions = relationship('Question', back_populates='exam', cascade='all, delete-orphan')
     answers = relationship('Answer', back_populates='exam', cascade='all, delete-orphan')
@@ -29,6 +30,7 @@ class Exam(Base):
 
 class Question(Base):
     __tablename__ = 'questions'
+    __table_args__ = (Index('ix_questions_exam_id', 'exam_id'),)
     id = Column(Integer, primary_key=True)
     exam_id = Column(Integer, ForeignKey('exams.id'), nullable=False)
     text = Column(String(255), nullable=False)
@@ -42,6 +44,7 @@ class Question(Base):
 
 class Option(Base):
     __tablename__ = 'options'
+    __table_args__ = (Index('ix_options_question_correct', 'question_id', 'is_correct'),)
     id = Column(Integer, primary_key=True)
     question_id = Column(Integer, ForeignKey('questions.id'), nullable=False)
     text = Column(String(255), nullable=False)
@@ -55,6 +58,7 @@ class Option(Base):
 
 class Answer(Base):
     __tablename__ = 'answers'
+    __table_args__ = (Index('ix_answers_user_exam', 'user_id', 'exam_id'),)
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
     exam_id = Column(Integer, ForeignKey('exams.id'), nullable=False)
@@ -1,4 +1,5 @@
 from app import app
+from common.exam_content import bump_exam_version
 from database import db_session
 from models import Exam, Question, Option
 
@@ -33,6 +34,7 @@ with app.app_context():
                     new_option = Option(question_id=question_to_edit.id, text=text, is_correct=is_correct)
                     db_session.add(new_option)
 
+                bump_exam_version(db_session, Exam, exam.id) # Halaman ujian yang di-cache ikut diperbarui
                 db_session.commit()
                 print(f"Pertanyaan '{old_question_text}' berhasil diperbarui menjadi '{new_question_text}'.")
             else:
@@ -0,0 +1,252 @@
+# File: answer_archive.py
+# Arsip jawaban lama: baris answers sebelum batas semester dipindahkan ke file SQLite terpisah.
+# Isinya segmen JSON Lines terkompresi zlib (masing-masing lengkap, bisa dibaca tanpa indeks) dan indeks kecil per jawaban.
+# Tabel answers tetap kecil sehingga indeksnya muat di cache; download_results, dashboard, ekspor dan statistik membaca arsip sebagai cadangan.
+# Jalankan: python answer_archive.py status
+#           python answer_archive.py run --before 2025-07-01 [--batch-size N] [--vacuum]
+import argparse # Untuk argumen CLI
+import base64 # Blob jawaban biner di dalam JSON
+import json # Baris JSON Lines
+import os # Untuk lokasi file arsip
+import time # Untuk mengukur laju
+import zlib # Kompresi segmen
+from collections import namedtuple # Untuk jawaban dari arsip
+from datetime import datetime # Batas semester dan waktu pengarsipan
+from sqlalchemy import Column, DateTime, Index, Integer, LargeBinary, MetaData, Table, bindparam, delete, func, insert, select, update # Skema dan query Core
+from sqlalchemy.engine import make_url # Untuk memeriksa apakah file arsip sudah ada
+from database import engine # Engine database utama (juga menambahkan root repo ke sys.path)
+from common.db_engine import create_db_engine, load_settings # Engine arsip dengan pragma yang sama
+from models import Answer, decode_submission # Model Versi2
+
+ARCHIVE_URL = os.environ.get('EXAM_ARCHIVE_URL', 'sqlite:///exam_archive.db') # File arsip, di samping exam_management.db
+BATCH_SIZE = 5000 # Jawaban yang dipindahkan per transaksi
+SEGMENT_ROWS = 500 # Jawaban per segmen terkompresi (satu pencarian hanya membuka satu segmen)
+
+metadata = MetaData() # Skema arsip terpisah dari models.Base
+
+archive_segments = Table(
+    'archive_segments', metadata,
+    Column('id', Integer, primary_key=True), # ID segmen
+    Column('first_answer_id', Integer, nullable=False), # ID jawaban terkecil di segmen
+    Column('last_answer_id', Integer, nullable=False), # ID jawaban terbesar di segmen
+    Column('row_count', Integer, nullable=False), # Jumlah jawaban di segmen
+    Column('raw_bytes', Integer, nullable=False), # Ukuran JSON Lines sebelum dikompresi
+    Column('archived_at', DateTime, nullable=False), # Waktu pengarsipan
+    Column('payload', LargeBinary, nullable=False), # zlib(JSON Lines), satu jawaban per baris
+)
+
+archived_answers = Table(
+    'archived_answers', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=False), # ID asli dari tabel answers (kunci artefak PDF tetap sama)
+    Column('student_id', Integer), # Siswa
+    Column('exam_id', Integer), # Ujian
+    Column('score', Integer), # Skor (sumber skor terbaru; regrade.py tidak menulis ulang segmen)
+    Column('date_taken', DateTime), # Tanggal pengerjaan
+    Column('segment_id', Integer, nullable=False), # Segmen yang berisi jawaban lengkap
+    Index('ix_archived_student_exam', 'student_id', 'exam_id'), # Hasil satu siswa; urutan pembangunan ulang statistik
+    Index('ix_archived_exam', 'exam_id'), # Ekspor per ujian
+)
+
+ArchiveStatus = namedtuple('ArchiveStatus', 'segments rows raw_bytes stored_bytes') # Ringkasan isi arsip
+
+
+class ArchivedAnswer(namedtuple('ArchivedAnswer', 'id student_id exam_id score date_taken submission submitted_answers')): # Antarmuka sama seperti Answer untuk download_results
+    __slots__ = ()
+
+    def decode_selections(self, answer_key, layouts): # Baca jawaban sebagai {question_id: option_id}
+        return decode_submission(answer_key, self.submission, self.submitted_answers, layouts, strict=False) # Blob yang tidak terbaca = tidak dijawab
+
+
+def encode_row(row): # Baris answers -> satu baris JSON
+    return json.dumps({'id': row.id, 'student_id': row.student_id, 'exam_id': row.exam_id, 'score': row.score,
+                       'date_taken': row.date_taken.isoformat() if row.date_taken else None,
+                       'submission': base64.b64encode(row.submission).decode('ascii') if row.submission is not None else None,
+                       'submitted_answers': row.submitted_answers}, separators=(',', ':'))
+
+
+def decode_row(line): # Satu baris JSON -> ArchivedAnswer
+    data = json.loads(line)
+    return ArchivedAnswer(data['id'], data['student_id'], data['exam_id'], data['score'],
+                          datetime.fromisoformat(data['date_taken']) if data['date_taken'] else None,
+                          base64.b64decode(data['submission']) if data['submission'] is not None else None,
+                          data['submitted_answers'])
+
+
+class AnswerArchive(object): # File arsip dengan engine sendiri; pembaca tidak membuat file jika belum ada
+    def __init__(self, url=ARCHIVE_URL):
+        self.url = url # URL database arsip
+        self.engine = create_db_engine(load_settings(url, environ={})) # Pragma bawaan; tidak terpengaruh EXAM_DB_URL
+        self._available = False # File arsip sudah pernah terlihat
+
+    def available(self): # Ada arsip untuk dibaca (stat file sampai arsip pertama dibuat)
+        if not self._available:
+            url = make_url(self.url)
+            self._available = url.get_backend_name() != 'sqlite' or bool(url.database and os.path.exists(url.database))
+        return self._available
+
+    def ensure_schema(self): # Dipanggil oleh penulis arsip
+        metadata.create_all(self.engine)
+        self._available = True
+
+    # --- Pembacaan ---
+
+    def find(self, student_id, exam_id): # Jawaban pertama siswa untuk ujian ini (sama seperti .first() di tabel answers)
+        if not self.available():
+            return None
+        with self.engine.connect() as connection:
+            located = connection.execute(select(archived_answers.c.id, archived_answers.c.segment_id, archived_answers.c.score)
+                                         .where(archived_answers.c.student_id == student_id, archived_answers.c.exam_id == exam_id)
+                                         .order_by(archived_answers.c.id).limit(1)).first()
+            if located is None:
+                return None
+            payload = connection.execute(select(archive_segments.c.payload).where(archive_segments.c.id == located.segment_id)).scalar()
+        for line in zlib.decompress(payload).decode('utf-8').splitlines(): # Satu segmen: paling banyak SEGMENT_ROWS baris
+            if line.startswith(f'{{"id":{located.id},'):
+                return decode_row(line)._replace(score=located.score) # Skor di segmen bisa sudah dinilai ulang
+        return None
+
+    def latest_results(self, student_id, exam_ids): # {exam_id: (answer_id, skor, tanggal)} jawaban terakhir siswa, untuk dashboard
+        if not exam_ids or not self.available():
+            return {}
+        latest = (select(func.max(archived_answers.c.id))
+                  .where(archived_answers.c.student_id == student_id, archived_answers.c.exam_id.in_(exam_ids))
+                  .group_by(archived_answers.c.exam_id))
+        with self.engine.connect() as connection:
+            rows = connection.execute(select(archived_answers.c.exam_id, archived_answers.c.id, archived_answers.c.score,
+                                             archived_answers.c.date_taken).where(archived_answers.c.id.in_(latest))).all()
+        return {exam_id: (answer_id, score, date_taken) for exam_id, answer_id, score, date_taken in rows}
+
+    def exam_ids(self, student_id): # Ujian yang pernah dikerjakan siswa menurut arsip
+        if not self.available():
+            return set()
+        with self.engine.connect() as connection:
+            return set(connection.execute(select(archived_answers.c.exam_id).distinct()
+                                          .where(archived_answers.c.student_id == student_id)).scalars())
+
+    def exam_partitions(self, exam_id, batch_size=BATCH_SIZE): # Baris (id, student_id, skor, tanggal) satu ujian per partisi, urut ID
+        if not self.available():
+            return
+        query = (select(archived_answers.c.id, archived_answers.c.student_id, archived_answers.c.score, archived_answers.c.date_taken)
+                 .where(archived_answers.c.exam_id == exam_id).order_by(archived_answers.c.id))
+        with self.engine.connect() as connection:
+            for partition in connection.execution_options(stream_results=True, yield_per=batch_size).execute(query).partitions():
+                yield partition
+
+    def exam_answers(self, exam_id): # ArchivedAnswer lengkap satu ujian, segmen demi segmen (untuk regrade.py); skor dari indeks
+        if not self.available():
+            return
+        with self.engine.connect() as connection:
+            scores = dict(connection.execute(select(archived_answers.c.id, archived_answers.c.score).where(archived_answers.c.exam_id == exam_id)).all())
+            segment_ids = sorted(connection.execute(select(archived_answers.c.segment_id).distinct()
+                                                    .where(archived_answers.c.exam_id == exam_id)).scalars())
+        for segment_id in segment_ids:
+            with self.engine.connect() as connection:
+                payload = connection.execute(select(archive_segments.c.payload).where(archive_segments.c.id == segment_id)).scalar()
+            rows = [decode_row(line) for line in zlib.decompress(payload).decode('utf-8').splitlines()]
+            yield [row._replace(score=scores[row.id]) for row in rows if row.exam_id == exam_id and row.id in scores]
+
+    def update_scores(self, updates): # [{'answer_id', 'old_score', 'new_score'}] -> skor di indeks; baris yang skornya sudah berubah dilewati
+        with self.engine.begin() as connection:
+            connection.execute(update(archived_answers)
+                               .where(archived_answers.c.id == bindparam('answer_id'), archived_answers.c.score == bindparam('old_score'))
+                               .values(score=bindparam('new_score')), updates)
+
+    def score_rows(self, exam_ids=None, batch_size=BATCH_SIZE): # (student_id, exam_id, skor, tanggal) urut (siswa, ujian), untuk exam_stats.rebuild_stats
+        if not self.available():
+            return
+        query = (select(archived_answers.c.student_id, archived_answers.c.exam_id, archived_answers.c.score, archived_answers.c.date_taken)
+                 .order_by(archived_answers.c.student_id, archived_answers.c.exam_id)) # Urutan indeks ix_archived_student_exam
+        if exam_ids is not None:
+            query = query.where(archived_answers.c.exam_id.in_(exam_ids))
+        with self.engine.connect() as connection:
+            for partition in connection.execution_options(stream_results=True, yield_per=batch_size).execute(query).partitions():
+                yield from partition
+
+    def status(self): # Jumlah segmen, jawaban, dan ukuran sebelum/sesudah kompresi
+        if not self.available():
+            return ArchiveStatus(0, 0, 0, 0)
+        with self.engine.connect() as connection:
+            row = connection.execute(select(func.count(), func.coalesce(func.sum(archive_segments.c.row_count), 0),
+                                            func.coalesce(func.sum(archive_segments.c.raw_bytes), 0),
+                                            func.coalesce(func.sum(func.length(archive_segments.c.payload)), 0))).one()
+        return ArchiveStatus(*row)
+
+    # --- Pengarsipan ---
+
+    def write_segments(self, rows): # Tulis baris answers yang belum ada di arsip; aman diulang setelah proses terhenti
+        ids = [row.id for row in rows]
+        now = datetime.now()
+        with self.engine.begin() as connection:
+            stored = set(connection.execute(select(archived_answers.c.id).where(archived_answers.c.id.in_(ids))).scalars())
+            pending = [row for row in rows if row.id not in stored]
+            for start in range(0, len(pending), SEGMENT_ROWS):
+                chunk = pending[start:start + SEGMENT_ROWS]
+                raw = '\n'.join(encode_row(row) for row in chunk).encode('utf-8')
+                segment_id = connection.execute(insert(archive_segments).values(
+                    first_answer_id=chunk[0].id, last_answer_id=chunk[-1].id, row_count=len(chunk), raw_bytes=len(raw),
+                    archived_at=now, payload=zlib.compress(raw, 9))).inserted_primary_key[0]
+                connection.execute(insert(archived_answers), [
+                    {'id': row.id, 'student_id': row.student_id, 'exam_id': row.exam_id, 'score': row.score,
+                     'date_taken': row.date_taken, 'segment_id': segment_id} for row in chunk])
+        return len(pending)
+
+    def archive_before(self, live_engine, before, batch_size=BATCH_SIZE, log=print): # Pindahkan jawaban dengan date_taken < before
+        self.ensure_schema()
+        table = Answer.__table__
+        with live_engine.connect() as connection:
+            newest = connection.execute(select(func.max(table.c.id))).scalar() or 0 # Jawaban terbaru selalu tinggal: SQLite tidak memakai ulang ID yang sudah diarsipkan
+            total = connection.execute(select(func.count()).select_from(table)
+                                       .where(table.c.date_taken < before, table.c.id < newest)).scalar()
+        moved = 0
+        after_id = 0
+        started = time.perf_counter()
+        while True:
+            with live_engine.connect() as connection: # Keyset per batch: tidak ada transaksi panjang di database utama
+                rows = connection.execute(select(table.c.id, table.c.student_id, table.c.exam_id, table.c.score, table.c.date_taken,
+                                                 table.c.submission, table.c.submitted_answers)
+                                          .where(table.c.date_taken < before, table.c.id < newest, table.c.id > after_id)
+                                          .order_by(table.c.id).limit(batch_size)).all()
+            if not rows:
+                break
+            after_id = rows[-1].id
+            self.write_segments(rows) # Arsip di-commit lebih dulu: jika proses terhenti, baris hanya ada di dua tempat, tidak hilang
+            with live_engine.begin() as connection:
+                connection.execute(delete(table).where(table.c.id.in_([row.id for row in rows]), table.c.date_taken < before))
+            moved += len(rows)
+            if log:
+                log(f'{moved}/{total} jawaban diarsipkan ({moved / max(time.perf_counter() - started, 1e-9):.0f} jawaban/detik).')
+        return moved
+
+
+def vacuum(live_engine): # Kecilkan file database utama setelah banyak baris dipindahkan
+    with live_engine.connect() as connection:
+        connection.execution_options(isolation_level='AUTOCOMMIT').exec_driver_sql('VACUUM')
+
+
+# --- CLI ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Arsip jawaban ujian lama (file SQLite terpisah, segmen terkompresi).')
+    parser.add_argument('--archive', default=ARCHIVE_URL, help='URL database arsip (bawaan: EXAM_ARCHIVE_URL)')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('status', help='Tampilkan isi arsip')
+    run = commands.add_parser('run', help='Pindahkan jawaban sebelum batas semester ke arsip')
+    run.add_argument('--before', required=True, type=datetime.fromisoformat, help='Batas semester (YYYY-MM-DD); jawaban sebelum tanggal ini diarsipkan')
+    run.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Jawaban per transaksi')
+    run.add_argument('--vacuum', action='store_true', help='Jalankan VACUUM pada database utama setelah selesai')
+    args = parser.parse_args(argv)
+
+    archive = AnswerArchive(args.archive)
+    if args.command == 'run':
+        moved = archive.archive_before(engine, args.before, args.batch_size)
+        if args.vacuum:
+            vacuum(engine)
+        print(f'Selesai: {moved} jawaban dipindahkan ke arsip.')
+    status = archive.status()
+    ratio = status.raw_bytes / status.stored_bytes if status.stored_bytes else 0
+    print(f'Arsip: {status.rows} jawaban dalam {status.segments} segmen, {status.stored_bytes} byte ({ratio:.1f}x terkompresi).')
+    return 0
+
+
+if __name__ == '__main__': # Jalankan dari CLI
+    raise SystemExit(main())
@@ -1,24 +1,120 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from flask import Flask, render_template, request, redirect, url_for, flash, make_response 
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file, Response, stream_with_context, abort 
+from markupsafe import Markup # Untuk menandai potongan HTML yang sudah dirender sebagai aman
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, scoped_session
-from models import Base, User, Exam, Question, Option, Answer
-from fpdf import FPDF # Untuk membuat PDF
-import json # Untuk mengonversi string JSON
+from database import engine, db_session, db_settings # Engine dan sesi bersama dari pabrik engine
+from models import Base, User, Exam, Question, Option, Answer, ExamDraft
+import atexit # Untuk menguras antrean pengiriman saat proses berhenti
+import logging # Log aplikasi (pengganti print untuk debugging)
+from datetime import datetime # Untuk waktu pengiriman jawaban
 import os # Untuk operasi file
-from forms import LoginForm, RegisterForm, ExamForm, QuestionForm # Impor formulir dari forms.py
+import time # Untuk mengukur lama pencarian bank soal
+import sys # Untuk menambahkan root repo ke sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))) # Agar paket common dapat diimpor
+from common.db_engine import effective_settings # Laporan pengaturan database yang berlaku
+from common.exam_content import ExamContentCache, bump_exam_version, encode_exam_document # Cache isi ujian per versi dan dokumen API
+from common.instrumentation import Instrumentation # Metrik per route dan SQL untuk /metrics
+from common.migrations import run_migrations # Runner migrasi skema
+from common.password_hashing import SCRYPT_METHOD, PasswordHasher, HashingBusy, busy_response # Hashing password di process pool
+from common.scoring import get_grade # Nilai huruf berdasarkan skor
+from common.startup import configure_template_cache # Cache bytecode Jinja di disk
+from common.static_assets import StaticFingerprints # URL file statis bersidik konten
+from common.submission_queue import SubmissionQueue # Antrean pengiriman write-behind
+from common.user_cache import UserCache # Cache identitas pengguna untuk Flask-Login
+from common.variants import ExamVariant # Urutan soal dan opsi per siswa tanpa salinan ujian
+from migrations import MIGRATIONS # Daftar migrasi Versi2
+from forms import LoginForm, RegisterForm, ExamForm, QuestionForm, ImportQuestionsForm # Impor formulir dari forms.py
+from question_import import ImportFormatError, import_questions # Impor bank soal massal
+from dashboard_queries import exam_page, exam_history, dashboard_totals # Query dashboard berhalaman dan riwayat lengkap
+from results_export import EXPORT_FORMATS, stream_results # Ekspor hasil ujian satu kelas
+from exam_layouts import LayoutStore # Tata letak ujian yang dirujuk blob jawaban v3
+from exam_drafts import DraftBuffer # Draf jawaban (autosave) yang ditulis per batch
+from exam_stats import LEADERBOARD_SIZE, load_stats, record_submissions # Statistik ujian yang diperbarui per pengiriman
+from question_search import near_duplicates, search_questions # Pencarian bank soal (FTS5) dan soal mirip
+from convert_submissions import start_background as convert_old_submissions # Konversi jawaban JSON lama ke format biner
+from answer_archive import ARCHIVE_URL, AnswerArchive # Jawaban lama di file arsip terpisah
+from result_documents import ArtifactStore, ResultDocumentService, artifact_key, build_result_document # Dokumen hasil ujian
 
 app = Flask(__name__) # Inisialisasi aplikasi Flask
 app.secret_key = 'your_super_secret_key' # Ganti dengan kunci rahasia yang kuat
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///exam_management.db' # Konfigurasi database
+app.config['SQLALCHEMY_DATABASE_URI'] = db_settings.url # Konfigurasi database (EXAM_DB_URL)
+app.config['RESULT_ARTIFACT_DIR'] = os.environ.get('RESULT_ARTIFACT_DIR', os.path.join(app.root_path, 'artifacts', 'results')) # Lokasi artefak PDF hasil ujian
+app.config['RESULT_PDF_WORKERS'] = int(os.environ.get('RESULT_PDF_WORKERS', 2)) # Jumlah proses untuk render PDF
+app.config['SUBMISSION_QUEUE'] = os.environ.get('EXAM_SUBMISSION_QUEUE') == '1' # Mode antrean write-behind untuk take_exam (opsional)
+app.config['SUBMISSION_JOURNAL_DIR'] = os.environ.get('EXAM_SUBMISSION_JOURNAL_DIR', os.path.join(app.root_path, 'journal')) # Lokasi jurnal antrean
+app.config['SUBMISSION_BATCH_SIZE'] = int(os.environ.get('EXAM_SUBMISSION_BATCH_SIZE', 500)) # Pengiriman per transaksi
+app.config['EXAM_PAGE_SIZE'] = int(os.environ.get('EXAM_PAGE_SIZE', 10)) # Soal per halaman saat mengerjakan ujian (0 = semua soal dalam satu halaman)
+app.config['EXAM_SHUFFLE'] = os.environ.get('EXAM_SHUFFLE', '1') == '1' # Urutan soal dan opsi diacak per siswa ('0' = urutan asli untuk semua siswa)
+app.config['DRAFT_FLUSH_INTERVAL'] = float(os.environ.get('EXAM_DRAFT_FLUSH_INTERVAL', 2.0)) # Jeda maksimum sebelum draf autosave ditulis
+app.config['TEMPLATE_CACHE_DIR'] = os.environ.get('EXAM_TEMPLATE_CACHE_DIR', os.path.join(app.root_path, 'template_cache')) # Cache bytecode Jinja bersama ('' = nonaktif)
+app.config['LEADERBOARD_SIZE'] = LEADERBOARD_SIZE # Jumlah siswa di papan peringkat setiap ujian (EXAM_LEADERBOARD_SIZE, lihat exam_stats.py)
+app.config['ARCHIVE_URL'] = ARCHIVE_URL # Database arsip jawaban lama (EXAM_ARCHIVE_URL, lihat answer_archive.py)
+app.config['DEFER_SERVICES'] = os.environ.get('EXAM_DEFER_SERVICES') == '1' # Thread latar belakang dijalankan per pekerja setelah fork (lihat wsgi.py)
 
-engine = create_engine(app.config['SQLALCHEMY_DATABASE_URI']) # Membuat engine database
-db_session = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine)) # Membuat sesi database
 Base.query = db_session.query_property() # Menambahkan properti query ke Base
+logger = logging.getLogger(__name__) # Logger aplikasi
+
+instrumentation = Instrumentation.from_env().init_app(app, engine) # Waktu route, query SQL, /metrics dan profiler opsional (EXAM_PROFILE_SLOW_MS)
+static_assets = StaticFingerprints().init_app(app) # url_for('static') menambahkan ?v=<sidik>, di-cache selamanya
+configure_template_cache(app, app.config['TEMPLATE_CACHE_DIR']) # Template tidak dikompilasi ulang di setiap pekerja
+
+if os.environ.get('EXAM_AUTO_MIGRATE', '1') == '1': # Migrasi skema sekali saat aplikasi dimuat (bisa dimatikan dan dijalankan lewat CLI)
+    run_migrations(engine, MIGRATIONS, log=logger.info) # Tidak ada refleksi skema di jalur permintaan
+
+exam_contents = ExamContentCache(Exam, Question, Option) # Cache isi ujian, kunci jawaban dan HTML pertanyaan per versi ujian
+result_documents = ResultDocumentService(ArtifactStore(app.config['RESULT_ARTIFACT_DIR']), # Layanan PDF hasil ujian
+                                         max_workers=app.config['RESULT_PDF_WORKERS'])
+answer_archive = AnswerArchive(app.config['ARCHIVE_URL']) # Dibaca hanya jika jawaban tidak ada di tabel answers
+layouts = LayoutStore(engine) # Tata letak jawaban per isi ujian, di-cache per proses
+
+user_cache = UserCache(User, max_entries=int(os.environ.get('EXAM_USER_CACHE_SIZE', 1024)), # Snapshot pengguna untuk user_loader
+                       ttl=float(os.environ.get('EXAM_USER_CACHE_TTL', 300))).watch() # Dibuang otomatis saat role/password di-commit
+
+password_hasher = PasswordHasher.from_env(default_method=SCRYPT_METHOD) # Layanan hashing (EXAM_HASH_WORKERS, EXAM_HASH_QUEUE, EXAM_PASSWORD_METHOD); Versi2 tetap scrypt
+app.register_error_handler(HashingBusy, busy_response) # Antrean hashing penuh -> 503 + Retry-After
+
+drafts = DraftBuffer(engine, ExamDraft.__table__, Answer.__table__, flush_interval=app.config['DRAFT_FLUSH_INTERVAL']) # Autosave digabung per siswa, ditulis per batch
+
+def submissions_flushed(connection, rows): # Dipanggil penulis antrean di transaksi batch yang menyimpan baris answers
+    record_submissions(connection, rows, size=app.config['LEADERBOARD_SIZE']) # Statistik ujian
+    drafts.delete_submitted(connection, rows) # Draf yang sudah dikirim
+
+submission_queue = None # Antrean pengiriman (hanya aktif jika EXAM_SUBMISSION_QUEUE=1)
+if app.config['SUBMISSION_QUEUE']: # Jika mode antrean aktif
+    submission_queue = SubmissionQueue(engine, Answer.__table__, app.config['SUBMISSION_JOURNAL_DIR'], # Jurnal + penulis latar belakang
+                                       batch_size=app.config['SUBMISSION_BATCH_SIZE'], datetime_columns=('date_taken',),
+                                       binary_columns=('submission',), # Jurnal lama diputar ulang saat start
+                                       on_flush=submissions_flushed) # Statistik ujian dan hapus draf di transaksi batch yang sama
+
+services_pid = None # Proses yang thread latar belakangnya sudah berjalan
+
+def start_services(): # Jalankan thread latar belakang sekali per proses
+    global services_pid
+    if services_pid == os.getpid(): # Sudah berjalan di proses ini
+        return
+    services_pid = os.getpid() # Tandai proses ini
+    password_hasher.start() # Fork pekerja hashing dulu, selagi proses ini belum punya thread latar belakang
+    result_documents.start() # Pekerja render PDF juga di-fork sebelum thread mana pun berjalan
+    if os.environ.get('EXAM_CONVERT_SUBMISSIONS', '1') == '1': # Konversi jawaban JSON lama secara bertahap di thread latar belakang
+        convert_old_submissions(engine) # Batch kecil dengan jeda; aman dijalankan bersamaan oleh beberapa proses
+    if submission_queue: # Jika mode antrean aktif
+        submission_queue.start() # Klaim slot jurnal dan jalankan penulis
+        atexit.register(submission_queue.stop) # Tulis sisa antrean saat proses berhenti
+    drafts.start() # Penulis draf autosave
+    atexit.register(drafts.stop) # Tulis sisa draf saat proses berhenti
+
+if app.config['DEFER_SERVICES']: # Mode preload: thread tidak ikut di-fork, jadi setiap pekerja memulainya sendiri
+    app.before_request(start_services) # Pada permintaan pertama di setiap pekerja
+else: # Mode biasa
+    start_services() # Langsung saat aplikasi dimuat
+
+instrumentation.register_collector('user_cache', user_cache.metrics) # Metrik layanan lain ikut diekspor sebagai gauge
+instrumentation.register_collector('password_hashing', password_hasher.metrics)
+instrumentation.register_collector('drafts', drafts.metrics)
+if submission_queue: # Jika mode antrean aktif
+    instrumentation.register_collector('submission_queue', submission_queue.metrics)
 
 login_manager = LoginManager() # Inisialisasi LoginManager
 login_manager.init_app(app) # Mengaitkan dengan aplikasi Flask
@@ -30,7 +126,7 @@ def shutdown_session(exception=None): # Fungsi untuk menutup sesi
 
 @login_manager.user_loader # Fungsi untuk memuat pengguna berdasarkan ID
 def load_user(user_id): # Fungsi untuk memuat pengguna
-    return db_session.query(User).get(int(user_id)) # Mengambil pengguna dari database
+    return user_cache.load(db_session, user_id) # Snapshot dari cache; query hanya saat miss atau kedaluwarsa
 
 @app.route('/') # Halaman beranda
 def index(): # Fungsi untuk halaman beranda
@@ -47,8 +143,11 @@ def login(): # Fungsi untuk halaman login
         password = form.password.data # Ambil data password
         user = db_session.query(User).filter_by(username=username).first() # Cari pengguna di database
         
-        if user and check_password_hash(user.password, password): # Jika pengguna ditemukan dan password cocok
-            login_user(user) # Login pengguna
+        if user and password_hasher.verify(user.password, password): # Jika pengguna ditemukan dan password cocok
+            if password_hasher.needs_rehash(user.password): # Parameter hashing berubah sejak password disimpan
+                user.password = password_hasher.hash(password) # Rehash dengan parameter baru
+                db_session.commit() # Simpan hash baru
+            login_user(user_cache.put(user)) # Login pengguna dan simpan snapshot-nya di cache
             flash('Login berhasil!', 'success') # Flash pesan sukses
             return redirect(url_for('dashboard')) # Redirect ke dashboard
         else: # Jika login gagal
@@ -72,7 +171,7 @@ def register(): # Fungsi untuk halaman registrasi
             flash('Nama pengguna sudah ada.', 'danger') # Flash pesan error
             return redirect(url_for('register')) # Redirect ke halaman registrasi
             
-        hashed_password = generate_password_hash(password) # Hash password
+        hashed_password = password_hasher.hash(password) # Hash password di process pool
         new_user = User(username=username, password=hashed_password, role=role) # Buat instance User baru
         db_session.add(new_user) # Tambahkan ke sesi database
         db_session.commit() # Commit perubahan ke database
@@ -91,108 +190,169 @@ def logout(): # Fungsi untuk logout
 @app.route('/dashboard') # Halaman dashboard
 @login_required # Hanya bisa diakses jika sudah login
 def dashboard(): # Fungsi untuk halaman dashboard
-    exams = db_session.query(Exam).all() # Ambil semua ujian dari database
-    if current_user.role == 'student': # Jika pengguna adalah siswa
-        student_answers = db_session.query(Answer).filter_by(student_id=current_user.id).all() # Ambil semua jawaban siswa
-        exam_answers_dict = {answer.exam_id: answer for answer in student_answers} # Buat dictionary untuk jawaban siswa
-        for exam in exams: # Untuk setiap ujian
-            exam.student_answer = exam_answers_dict.get(exam.id) # Tambahkan jawaban siswa ke ujian
-    
-    return render_template('dashboard.html', exams=exams, user=current_user) # Render template dashboard.html dengan ujian dan pengguna
+    if current_user.role != 'student': # Guru hanya melihat tautan ke halaman kelola ujian
+        return render_template('dashboard.html', exams=[], user=current_user) # Tidak perlu memuat ujian
+    after = request.args.get('after', type=int) # Kursor halaman berikutnya (ID ujian terakhir)
+    before = request.args.get('before', type=int) # Kursor halaman sebelumnya (ID ujian pertama)
+    page = exam_page(db_session, current_user.id, after=after, before=before, archive=answer_archive) # Satu halaman ujian + jawaban terakhir siswa (termasuk arsip)
+    history = exam_history(db_session, current_user.id, archive=answer_archive) # Riwayat lengkap, tidak terbatas halaman ujian di atas
+    totals = dashboard_totals(db_session, current_user.id, archive=answer_archive) # Jumlah total ujian dan ujian yang sudah dikerjakan
+    return render_template('dashboard.html', exams=page.rows, page=page, history=history, totals=totals, user=current_user) # Render template dashboard.html dengan ujian dan pengguna
 
 @app.route('/take_exam/<int:exam_id>', methods=['GET', 'POST']) #   Halaman untuk mengambil ujian
 @login_required # Hanya bisa diakses jika sudah login
 def take_exam(exam_id): # Fungsi untuk mengambil ujian
-    exam = db_session.query(Exam).get(exam_id) # Ambil ujian berdasarkan ID
+    exam = exam_contents.get(db_session, exam_id) # Ambil isi ujian (pertanyaan + opsi dimuat eager, di-cache per versi)
     if not exam: # Jika ujian tidak ditemukan
         flash('Ujian tidak ditemukan!', 'danger') # Flash pesan error
         return redirect(url_for('dashboard')) # Redirect ke dashboard
     
+    answer_key = exam.answer_key # Kunci jawaban ikut di-cache bersama isi ujian
+    page_size = app.config['EXAM_PAGE_SIZE'] # Soal per halaman
+    page_count = max(1, -(-len(exam.questions) // page_size)) if page_size else 1 # Jumlah halaman (pembulatan ke atas)
+
     if request.method == 'POST': # Jika metode permintaan adalah POST (mengirim jawaban)
-        user_answers = {} # Inisialisasi dictionary untuk jawaban pengguna
-        score = 0 # Inisialisasi skor
-        
-        for question in exam.questions: # Untuk setiap pertanyaan dalam ujian
-            submitted_option_id = request.form.get(f'question_{question.id}') # Ambil jawaban yang dikirimkan pengguna
-            if submitted_option_id: # Jika ada jawaban yang dikirimkan
-                user_answers[question.id] = int(submitted_option_id) # Simpan jawaban pengguna
-                correct_option = db_session.query(Option).filter_by(question_id=question.id, is_correct=True).first() # Ambil opsi yang benar
-                if correct_option and correct_option.id == int(submitted_option_id): # Jika jawaban benar
-                    score += 1 # Tambah skor
+        page_answers = answer_key.selections_from_form(request.form) # Jawaban yang valid di halaman yang dikirim
+        target = request.form.get('nav', type=int) # Tombol Sebelumnya/Berikutnya: pindah halaman, bukan selesai
+        if target: # Pindah halaman
+            drafts.record(current_user.id, exam.id, answer_key, page_answers) # Simpan jawaban halaman ini ke draf
+            return redirect(url_for('take_exam', exam_id=exam.id, page=min(max(target, 1), page_count))) # Tampilkan halaman tujuan
+
+        user_answers = drafts.load(current_user.id, exam.id, answer_key) # Jawaban dari halaman lain (draf autosave)
+        user_answers.update(page_answers) # Jawaban di halaman terakhir paling baru
+        score = answer_key.score(user_answers) # Hitung skor dalam satu putaran
+        layout = layouts.register(exam.id, answer_key) # Sekali per isi ujian, sebelum transaksi penulisan dimulai
         
-        new_answer = Answer( #  Buat instance Answer baru
+        new_answer = dict( #  Data Answer baru
             student_id=current_user.id, #   ID siswa
             exam_id=exam.id, # ID ujian
             score=score, # Skor
-            submitted_answers=json.dumps(user_answers) # Jawaban yang dikirimkan dalam format JSON
+            submission=Answer.encode_selections(layout, user_answers), # Jawaban dalam format biner ringkas
+            date_taken=datetime.now() # Waktu pengiriman (bukan waktu penulisan batch)
         )
-        db_session.add(new_answer) # Tambahkan ke sesi database
-        db_session.commit() # Commit perubahan ke database
+        drafts.forget(current_user.id, exam.id) # Perubahan draf yang belum ditulis tidak diperlukan lagi
+        if submission_queue: # Mode antrean: simpan ke jurnal dan balas segera
+            submission_queue.enqueue([new_answer]) # Ditulis ke database oleh penulis latar belakang (draf dihapus di batch yang sama)
+        else: # Mode biasa: tulis langsung
+            db_session.add(Answer(**new_answer)) # Tambahkan ke sesi database
+            record_submissions(db_session.connection(), [new_answer], {exam.id: len(answer_key)}, # Statistik ujian di transaksi yang sama
+                               app.config['LEADERBOARD_SIZE'])
+            drafts.delete_submitted(db_session.connection(), [new_answer]) # Hapus draf di transaksi yang sama
+            db_session.commit() # Commit perubahan ke database
         
-        flash(f'Anda menyelesaikan ujian {exam.title} dengan skor: {score}/{len(exam.questions)}', 'success') # Flash pesan sukses
+        flash(f'Anda menyelesaikan ujian {exam.title} dengan skor: {score}/{len(answer_key)}', 'success') # Flash pesan sukses
         return redirect(url_for('dashboard')) # Redirect ke dashboard
         
-    return render_template('take_exam.html', exam=exam) # Render template take_exam.html dengan ujian
+    page = min(max(request.args.get('page', 1, type=int), 1), page_count) # Halaman yang diminta
+    first = (page - 1) * page_size # Indeks soal pertama di halaman ini
+    last = first + page_size if page_size else None # Batas soal halaman ini (None = sampai akhir)
+    if app.config['EXAM_SHUFFLE']: # Halaman berbeda per siswa: dirender dari isi ujian yang sama (di-cache), tanpa salinan per siswa
+        questions_html = render_exam_questions(exam, first, questions=student_view(exam).page(first, last))
+    else: # Semua siswa melihat halaman yang sama
+        questions_html = exam_contents.fragment(exam, lambda content: render_exam_questions(content, first, last), # HTML satu halaman dirender sekali per versi ujian
+                                                part=(first, last))
+    draft = drafts.load(current_user.id, exam.id, answer_key, db_session.connection()) # Jawaban yang sudah tersimpan (dicentang ulang oleh scripts.js); lewat sesi permintaan agar ikut async di asgi.py
+    return render_template('take_exam.html', exam=exam, questions_html=questions_html, page=page, page_count=page_count, # Render template take_exam.html dengan satu halaman ujian
+                           draft=draft, autosave_url=url_for('autosave_exam', exam_id=exam.id))
+
+@app.route('/take_exam/<int:exam_id>/autosave', methods=['POST']) # Autosave JSON: {"answers": {"<question_id>": <option_id>}}
+@login_required # Hanya bisa diakses jika sudah login
+def autosave_exam(exam_id): # Fungsi untuk menyimpan jawaban sementara
+    exam = exam_contents.get(db_session, exam_id) # Isi ujian (dari cache)
+    if not exam: # Jika ujian tidak ditemukan
+        return jsonify(saved=0, error='Ujian tidak ditemukan.'), 404 # Tidak ada yang disimpan
+    if request.origin and request.origin != request.host_url.rstrip('/'): # Body text/plain juga bisa dikirim formulir situs lain
+        return jsonify(saved=0, error='Asal permintaan tidak diizinkan.'), 403 # Tolak permintaan lintas situs
+    answers = (request.get_json(silent=True, force=True) or {}).get('answers') # JSON dari fetch (application/json) atau sendBeacon (text/plain)
+    if not isinstance(answers, dict): # Format permintaan tidak valid
+        return jsonify(saved=0, error='Format autosave tidak valid.'), 400 # Tolak permintaan
+    selections = exam.answer_key.selections_from_form({f'question_{question_id}': option_id # Validasi sama seperti formulir
+                                                       for question_id, option_id in answers.items()})
+    drafts.record(current_user.id, exam.id, exam.answer_key, selections) # Digabung di memori, ditulis per batch
+    return jsonify(saved=len(selections)) # Respons kecil
+
+@app.route('/api/exams/<int:exam_id>') # Isi ujian versi terbaru (JSON, tanpa kunci jawaban); selalu divalidasi ulang
+@app.route('/api/exams/<int:exam_id>/v<int:version>') # Isi ujian satu versi; tidak pernah berubah
+@login_required # Hanya bisa diakses jika sudah login
+def exam_api(exam_id, version=None): # Fungsi untuk API isi ujian dengan ETag
+    current = db_session.query(Exam.version, Exam.content_hash).filter(Exam.id == exam_id).first() # Satu query ke tabel exams saja
+    if current is None: # Jika ujian tidak ditemukan
+        return jsonify(error='Ujian tidak ditemukan.'), 404 # Tidak ada dokumen
+    if version is not None and version != current.version: # Versi lama tidak disimpan
+        return jsonify(error='Versi ujian sudah tidak tersedia.', # Arahkan ke versi terbaru
+                       current=url_for('exam_api', exam_id=exam_id, version=current.version)), 404
+    etag = current.content_hash # ETag tersimpan hanya berlaku untuk versi yang tercatat di dalamnya
+    if etag and etag.startswith(f'{current.version}.') and request.if_none_match.contains(etag): # Browser sudah punya versi ini
+        return exam_api_response(Response(status=304), exam_id, current.version, etag, version is not None) # Tanpa query ke tabel soal
+
+    exam = exam_contents.get(db_session, exam_id) # Isi ujian (dari cache)
+    if not exam or (version is not None and exam.version != version): # Ujian berubah di antara dua query
+        return jsonify(error='Versi ujian sudah tidak tersedia.'), 404 # Minta klien mengambil ulang
+    body, etag = exam_contents.fragment(exam, encode_exam_document, part='api') # Dokumen dan ETag dibuat sekali per versi
+    if current.content_hash != etag: # Catat ETag versi ini untuk validasi ulang berikutnya
+        db_session.query(Exam).filter(Exam.id == exam_id, Exam.version == exam.version).update( # Hanya jika versinya masih sama
+            {Exam.content_hash: etag}, synchronize_session=False)
+        db_session.commit() # Commit perubahan ke database
+    if request.if_none_match.contains(etag): # Browser sudah punya versi ini
+        return exam_api_response(Response(status=304), exam_id, exam.version, etag, version is not None) # Tanpa body
+    return exam_api_response(Response(body, mimetype='application/json'), exam_id, exam.version, etag, version is not None) # Kirim dokumen
+
+def exam_api_response(response, exam_id, version, etag, pinned): # Header cache untuk API isi ujian
+    response.set_etag(etag) # ETag kuat
+    response.cache_control.private = True # Hanya untuk siswa yang login, bukan cache bersama
+    if pinned: # URL berversi tidak pernah berubah
+        response.cache_control.max_age = 365 * 24 * 3600 # Satu tahun
+        response.cache_control.immutable = True # Tidak perlu divalidasi ulang saat reload
+    else: # URL terbaru selalu divalidasi ulang (304 jika belum berubah)
+        response.cache_control.no_cache = True # Validasi ulang setiap kali
+        response.headers['Content-Location'] = url_for('exam_api', exam_id=exam_id, version=version) # URL berversi untuk dokumen ini
+    return response # Kembalikan respons
+
+def render_exam_questions(exam, first=0, last=None, questions=None): # Render blok pertanyaan ujian (tanpa varian, hasilnya di-cache oleh exam_contents)
+    if questions is None: # Urutan asli
+        questions = exam.questions[first:last]
+    return Markup(render_template('_exam_questions.html', exam=exam, questions=questions, first=first)) # Tandai sebagai HTML aman
+
+def student_view(exam): # Isi ujian dalam urutan yang dilihat siswa yang sedang login (halaman ujian dan PDF hasil)
+    return ExamVariant(exam, current_user.id) if app.config['EXAM_SHUFFLE'] else exam
 
 
 @app.route('/download_results/<int:exam_id>') # Halaman untuk mengunduh hasil ujian
 @login_required # Hanya bisa diakses jika sudah login   
 def download_results(exam_id): # Fungsi untuk mengunduh hasil ujian
-    exam = db_session.query(Exam).get(exam_id) # Ambil ujian berdasarkan ID
-    answers = db_session.query(Answer).filter_by(exam_id=exam_id, student_id=current_user.id).first() # Ambil jawaban siswa untuk ujian tersebut
-    
+    exam, answers = find_result(exam_id) # Ambil ujian dan jawaban siswa
     if not exam or not answers: # Jika ujian atau jawaban tidak ditemukan
         flash('Hasil ujian tidak ditemukan.', 'danger') # Flash pesan error
         return redirect(url_for('dashboard')) # Redirect ke dashboard
-        
-    user_answers = json.loads(answers.submitted_answers) # Muat jawaban pengguna dari format JSON
-    total_questions = len(exam.questions) # Hitung total pertanyaan
-    grade = get_grade(answers.score, total_questions) # Dapatkan nilai berdasarkan skor
-
-    class PDF(FPDF): # Kelas untuk membuat PDF
-        def header(self): # Header PDF
-            self.set_font('Arial', 'B', 12) # Set font
-            self.cell(0, 10, 'Formulir Hasil Ujian', 0, 1, 'C') # Judul
-            self.ln(5) # Spasi
-            
-        def footer(self): # Footer PDF
-            self.set_y(-15) # Posisi dari bawah
-            self.set_font('Arial', 'I', 8) # Set font
-            self.cell(0, 10, f'Halaman {self.page_no()}', 0, 0, 'C') # Nomor halaman
-
-    pdf = PDF() # Inisialisasi PDF
-    pdf.add_page() # Tambah halaman
-    pdf.set_font('Arial', 'B', 16) # Set font besar
-    pdf.cell(0, 10, f'Hasil Ujian: {exam.title}', 0, 1) # Judul ujian
-    pdf.set_font('Arial', '', 12) # Set font normal
-    pdf.cell(0, 10, f'Nama Siswa: {current_user.username}', 0, 1) # Nama siswa
-    pdf.cell(0, 10, f'Skor: {answers.score}/{total_questions}', 0, 1) # Skor
-    pdf.ln(10) # Spasi
-
-    pdf.cell(0, 10, f'Grade: {grade}', 0, 1) # Tampilkan grade
-    pdf.ln(5) # Spasi
-    
-    for question in exam.questions: # Untuk setiap pertanyaan dalam ujian
-        pdf.set_font('Arial', 'B', 12) # Set font tebal
-        pdf.multi_cell(0, 10, f'Soal {question.id}: {question.text}') # Teks pertanyaan
-        
-        pdf.set_font('Arial', '', 10) # Set font normal
-        user_choice_id = user_answers.get(str(question.id)) # Jawaban pengguna untuk pertanyaan ini
-        
-        for option in question.options: # Untuk setiap opsi dalam pertanyaan
-            status = ' ' # Status default
-            if option.is_correct: # Jika opsi ini adalah jawaban yang benar
-                status = 'V' # Tandai dengan V
-            if user_choice_id and option.id == user_choice_id: # Jika ini adalah jawaban yang dipilih pengguna
-                status = 'X' # Tandai dengan X
-                
-            pdf.multi_cell(0, 5, f'[{status}] {option.text}') # Tampilkan opsi dengan status
-        pdf.ln(5) # Spasi antara pertanyaan
-        
-    response = make_response(pdf.output(dest='S').encode('latin1')) # Buat respons PDF
-    response.headers.set('Content-Disposition', 'attachment', filename=f'hasil_ujian_{exam.id}.pdf') # Set header untuk unduhan
-    response.headers.set('Content-Type', 'application/pdf') # Set tipe konten
-    return response # Kembalikan respons
+
+    key = artifact_key(answers.id, exam.version, answers.score) # Kunci artefak untuk jawaban, versi ujian dan skor ini
+    if result_documents.status(key) == 'ready': # Unduhan berulang langsung dilayani dari penyimpanan artefak
+        return send_file(result_documents.store.path(key), mimetype='application/pdf', # Kirim file PDF
+                         as_attachment=True, download_name=f'hasil_ujian_{exam.id}.pdf') # Set header untuk unduhan
+
+    user_answers = answers.decode_selections(exam.answer_key, layouts) # Jawaban biner (atau JSON lama yang belum dikonversi)
+    grade = get_grade(answers.score, len(exam.questions)) # Dapatkan nilai berdasarkan skor
+    document = build_result_document(student_view(exam), answers.score, user_answers, current_user.username, grade) # Data PDF dalam urutan soal dan opsi yang dilihat siswa
+    result_documents.submit(key, document) # Render PDF di process pool
+    return render_template('result_pending.html', exam=exam, # Halaman tunggu yang memantau status dokumen
+                           status_url=url_for('download_results_status', exam_id=exam.id),
+                           download_url=url_for('download_results', exam_id=exam.id)), 202
+
+@app.route('/download_results/<int:exam_id>/status') # Endpoint status untuk dokumen yang masih dibuat
+@login_required # Hanya bisa diakses jika sudah login
+def download_results_status(exam_id): # Fungsi untuk memeriksa status PDF hasil ujian
+    exam, answers = find_result(exam_id) # Ambil ujian dan jawaban siswa
+    if not exam or not answers: # Jika ujian atau jawaban tidak ditemukan
+        return jsonify(status='missing'), 404 # Tidak ada dokumen untuk diunduh
+    status = result_documents.status(artifact_key(answers.id, exam.version, answers.score)) # ready, pending, failed atau missing
+    return jsonify(status=status, download_url=url_for('download_results', exam_id=exam.id)) # Kembalikan status dalam JSON
+
+def find_result(exam_id): # Ambil isi ujian (dari cache) dan jawaban siswa yang sedang login
+    exam = exam_contents.get(db_session, exam_id) # Isi ujian versi terbaru
+    answers = db_session.query(Answer).filter_by(exam_id=exam_id, student_id=current_user.id).first() # Ambil jawaban siswa untuk ujian tersebut
+    if answers is None: # Jawaban semester lalu sudah dipindahkan ke arsip; ID dan kunci artefak PDF tetap sama
+        answers = answer_archive.find(current_user.id, exam_id)
+    return exam, answers # Kembalikan keduanya
 
 @app.route('/manage_exams', methods=['GET', 'POST']) # Halaman untuk mengelola ujian (hanya untuk guru)
 @login_required # Hanya bisa diakses jika sudah login
@@ -203,6 +363,8 @@ def manage_exams(): #   Fungsi untuk mengelola ujian
 
     exam_form = ExamForm() # Inisialisasi formulir ujian
     question_form = QuestionForm() # Inisialisasi formulir pertanyaan
+    import_form = ImportQuestionsForm() # Inisialisasi formulir impor bank soal
+    import_errors = [] # Kesalahan per baris dari impor bank soal
 
     if request.method == 'POST': # Jika metode permintaan adalah POST
         action = request.form.get('action') # Ambil aksi dari formulir
@@ -210,22 +372,19 @@ def manage_exams(): #   Fungsi untuk mengelola ujian
         if action == 'add_exam' and exam_form.validate_on_submit(): # Jika aksi adalah menambah ujian dan formulir valid
             title = exam_form.title.data # Ambil data judul
             description = exam_form.description.data # Ambil data deskripsi
-            new_exam = Exam(title=title, description=description, author=current_user) # Buat instance Exam baru
+            new_exam = Exam(title=title, description=description, author_id=current_user.id) # Buat instance Exam baru
             db_session.add(new_exam) # Tambahkan ke sesi database
             db_session.commit() # Commit perubahan ke database
             flash('Ujian baru berhasil dibuat!', 'success') # Flash pesan sukses
             return redirect(url_for('manage_exams')) # Redirect ke halaman mengelola ujian
         
         elif action == 'add_question': # Jika aksi adalah menambah pertanyaan
-            print("----- Data Formulir Diterima -----") # Debugging: Tanda terima data
-            print("Exam ID:", request.form.get('exam_id')) # Debugging: Tampilkan Exam ID
-            print("Question Text:", request.form.get('text')) # Debugging: Tampilkan teks pertanyaan
-            print("----------------------------------") # Debugging: Akhir tanda
+            logger.debug('Tambah pertanyaan: exam_id=%s, teks=%r', request.form.get('exam_id'), request.form.get('text')) # Data formulir yang diterima
             if question_form.validate_on_submit(): # Jika formulir valid
                 exam_id = request.form.get('exam_id') # Ambil ID ujian dari formulir
                 exam = db_session.query(Exam).get(exam_id) # Ambil ujian berdasarkan ID
                 
-                if exam and exam.author == current_user: # Jika ujian ditemukan dan milik guru yang sedang login
+                if exam and exam.author_id == current_user.id: # Jika ujian ditemukan dan milik guru yang sedang login
                     new_question = Question(text=question_form.text.data, exam=exam) # Buat instance Question baru
                     db_session.add(new_question) # Tambahkan ke sesi database
                     db_session.commit() # Commit perubahan ke database
@@ -237,58 +396,157 @@ def manage_exams(): #   Fungsi untuk mengelola ujian
                             is_correct=option_data['is_correct'] # Apakah ini jawaban yang benar
                         ) # Tutup pembuatan Option
                         db_session.add(new_option) # Tambahkan ke sesi database
+                    bump_exam_version(db_session, Exam, exam.id) # Naikkan versi agar cache ujian di semua proses diperbarui
                     db_session.commit() # Commit perubahan ke database
+                    exam_contents.invalidate(exam.id) # Buang versi lama dari cache proses ini
                     flash('Pertanyaan berhasil ditambahkan!', 'success') # Flash pesan sukses
                 else: # Jika ujian tidak ditemukan atau bukan milik guru
                     flash('Ujian tidak ditemukan atau Anda tidak memiliki izin.', 'danger') # Flash pesan error
                 return redirect(url_for('manage_exams')) # Redirect ke halaman mengelola ujian
             else: # Jika formulir tidak valid
-                print("----- Validasi Gagal -----") # Debugging: Tanda validasi gagal
-                for field_name, field_errors in question_form.errors.items(): # Tampilkan kesalahan validasi
-                    if isinstance(field_errors, list): # Jika kesalahan adalah daftar
-                        if isinstance(field_errors[0], dict): # Jika kesalahan adalah sub-formulir
-                            for i, option_errors in enumerate(field_errors): # Untuk setiap kesalahan opsi
-                                for sub_field, sub_errors in option_errors.items(): # Untuk setiap bidang dalam opsi
-                                    print(f"Bidang Opsi {i+1} - {sub_field}: {', '.join(sub_errors)}") # Tampilkan kesalahan
-                        else: # Jika kesalahan adalah bidang biasa
-                            print(f"Bidang: {field_name}, Kesalahan: {', '.join(field_errors)}") # Tampilkan kesalahan
-                    else: # Jika kesalahan bukan daftar (kasus tak terduga)
-                        print(f"Bidang: {field_name}, Kesalahan: {field_errors}") # Tampilkan kesalahan
-                print("--------------------------") # Debugging: Akhir tanda
+                logger.info('Validasi pertanyaan gagal: %s', question_form.errors) # Kesalahan per bidang, termasuk sub-formulir opsi
                 flash('Validasi formulir gagal. Pastikan semua bidang diisi dengan benar.', 'danger') # Flash pesan error
+
+        elif action == 'import_questions': # Jika aksi adalah impor bank soal
+            exam = db_session.query(Exam).get(request.form.get('exam_id')) # Ambil ujian tujuan
+            if not exam or exam.author_id != current_user.id: # Jika ujian tidak ditemukan atau bukan milik guru
+                flash('Ujian tidak ditemukan atau Anda tidak memiliki izin.', 'danger') # Flash pesan error
+            elif import_form.validate_on_submit(): # Jika berkas valid
+                upload = import_form.file.data # Berkas yang diunggah
+                try: # Coba baca dan impor berkas
+                    result = import_questions(db_session, exam.id, upload.filename, upload.read().decode('utf-8-sig')) # Validasi lalu bulk insert
+                except (ImportFormatError, UnicodeDecodeError) as e: # Berkas tidak bisa dibaca
+                    db_session.rollback() # Batalkan transaksi
+                    flash(f'Berkas tidak dapat dibaca: {e}', 'danger') # Flash pesan error
+                else: # Berkas berhasil dibaca
+                    if result.errors: # Ada baris yang salah, tidak ada yang disimpan
+                        db_session.rollback() # Batalkan transaksi
+                        import_errors = result.errors # Tampilkan kesalahan per baris
+                        flash('Impor dibatalkan karena ada baris yang tidak valid.', 'danger') # Flash pesan error
+                    else: # Semua baris valid (versi ujian sudah dinaikkan sekali oleh import_questions)
+                        db_session.commit() # Satu commit untuk seluruh bank soal
+                        exam_contents.invalidate(exam.id) # Buang versi lama dari cache proses ini
+                        flash(f'{result.imported} pertanyaan berhasil diimpor!', 'success') # Flash pesan sukses
+                        return redirect(url_for('manage_exams')) # Redirect ke halaman mengelola ujian
+            else: # Jika berkas tidak valid
+                flash('Pilih berkas JSON atau CSV yang valid.', 'danger') # Flash pesan error
         
-    exams = db_session.query(Exam).filter_by(author=current_user).all() # Ambil semua ujian yang dibuat oleh guru yang sedang login
-    return render_template('manage_exams.html', exams=exams, exam_form=exam_form, question_form=question_form) # Render template manage_exams.html dengan ujian dan formulir
+    exams = db_session.query(Exam).filter_by(author_id=current_user.id).all() # Ambil semua ujian yang dibuat oleh guru yang sedang login
+    return render_template('manage_exams.html', exams=exams, exam_form=exam_form, question_form=question_form, # Render template manage_exams.html dengan ujian dan formulir
+                           import_form=import_form, import_errors=import_errors, export_formats=EXPORT_FORMATS,
+                           search_url=url_for('search_question_bank'))
+
+@app.route('/manage_exams/search') # Pencarian bank soal dan deteksi soal mirip untuk guru
+@login_required # Hanya bisa diakses jika sudah login
+def search_question_bank(): # Fungsi untuk mencari pertanyaan (peringkat bm25) atau soal yang mirip dengan teks/pertanyaan tertentu
+    if current_user.role != 'teacher': # Jika bukan guru
+        flash('Akses ditolak.', 'danger') # Flash pesan error
+        return redirect(url_for('dashboard')) # Redirect ke dashboard
+    query = request.args.get('q', '').strip() # Kata kunci atau teks pertanyaan
+    mode = request.args.get('mode', 'cari') # cari = pencarian berperingkat, mirip = deteksi soal mirip
+    question_id = request.args.get('question_id', type=int) # Cari soal yang mirip dengan pertanyaan ini
+    if question_id: # Teks diambil dari pertanyaan milik guru yang sedang login
+        question = (db_session.query(Question.text).join(Exam, Exam.id == Question.exam_id)
+                    .filter(Question.id == question_id, Exam.author_id == current_user.id).first())
+        if not question: # Jika pertanyaan tidak ditemukan atau bukan milik guru
+            flash('Pertanyaan tidak ditemukan atau Anda tidak memiliki izin.', 'danger') # Flash pesan error
+            return redirect(url_for('manage_exams')) # Redirect ke halaman mengelola ujian
+        query, mode = question.text, 'mirip' # Pertanyaan itu sendiri tidak ikut ditampilkan
+    started = time.perf_counter() # Waktu pencarian ditampilkan di halaman
+    hits, duplicates = [], [] # Hasil pencarian atau soal mirip
+    if mode == 'mirip': # Deteksi soal mirip
+        duplicates = near_duplicates(db_session.connection(), current_user.id, query, exclude_id=question_id)
+    else: # Pencarian berperingkat
+        hits = search_questions(db_session.connection(), current_user.id, query)
+    return render_template('question_search.html', query=query, mode=mode, hits=hits, duplicates=duplicates, # Render template question_search.html
+                           elapsed_ms=(time.perf_counter() - started) * 1000.0)
+
+@app.route('/manage_exams/<int:exam_id>/export') # Ekspor semua hasil ujian (CSV / JSON Lines) untuk guru
+@login_required # Hanya bisa diakses jika sudah login
+def export_results(exam_id): # Fungsi untuk mengekspor hasil ujian secara streaming
+    if current_user.role != 'teacher': # Jika bukan guru
+        flash('Akses ditolak.', 'danger') # Flash pesan error
+        return redirect(url_for('dashboard')) # Redirect ke dashboard
+    export_format = request.args.get('format', 'csv') # Format ekspor: csv atau jsonl
+    if export_format not in EXPORT_FORMATS: # Format tidak dikenal
+        abort(400) # Permintaan tidak valid
+    exam = db_session.query(Exam).filter_by(id=exam_id, author_id=current_user.id).first() # Hanya ujian milik guru yang sedang login
+    if not exam: # Jika ujian tidak ditemukan atau bukan milik guru
+        flash('Ujian tidak ditemukan atau Anda tidak memiliki izin.', 'danger') # Flash pesan error
+        return redirect(url_for('manage_exams')) # Redirect ke halaman mengelola ujian
+    total_questions = len(exam_contents.get(db_session, exam_id).questions) # Total pertanyaan dari cache isi ujian
+    body = stream_results(engine, exam_id, total_questions, get_grade, export_format, archive=answer_archive) # Generator baris ekspor (arsip + tabel answers)
+    response = Response(stream_with_context(body), mimetype=EXPORT_FORMATS[export_format]) # Respons streaming, memori tetap konstan
+    response.headers.set('Content-Disposition', 'attachment', filename=f'hasil_ujian_{exam_id}.{export_format}') # Set header untuk unduhan
+    return response # Kembalikan respons
+
+@app.route('/manage_exams/<int:exam_id>/analysis') # Analisis butir soal untuk guru
+@login_required # Hanya bisa diakses jika sudah login
+def exam_analysis(exam_id): # Fungsi untuk menampilkan tingkat kesukaran, daya beda dan pengecoh per soal
+    if current_user.role != 'teacher': # Jika bukan guru
+        flash('Akses ditolak.', 'danger') # Flash pesan error
+        return redirect(url_for('dashboard')) # Redirect ke dashboard
+    if not db_session.query(Exam.id).filter_by(id=exam_id, author_id=current_user.id).first(): # Hanya ujian milik guru yang sedang login
+        flash('Ujian tidak ditemukan atau Anda tidak memiliki izin.', 'danger') # Flash pesan error
+        return redirect(url_for('manage_exams')) # Redirect ke halaman mengelola ujian
+    exam = exam_contents.get(db_session, exam_id) # Isi ujian dan kunci jawaban dari cache
+    from item_analysis import analyze_exam # NumPy dimuat saat analisis pertama, bukan saat pekerja start
+    analysis = analyze_exam(engine, exam.answer_key, exam_id, layouts=layouts, archive=answer_archive) # Matriks respons + statistik vektor (termasuk jawaban arsip)
+    return render_template('item_analysis.html', exam=exam, analysis=analysis, # Render template item_analysis.html
+                           items=list(zip(exam.questions, analysis.questions))) # Pasangan (pertanyaan, statistik)
+
+@app.route('/manage_exams/<int:exam_id>/stats') # Statistik ujian dan papan peringkat untuk guru
+@login_required # Hanya bisa diakses jika sudah login
+def exam_statistics(exam_id): # Fungsi untuk menampilkan ringkasan hasil dari tabel statistik (tanpa memindai jawaban)
+    if current_user.role != 'teacher': # Jika bukan guru
+        flash('Akses ditolak.', 'danger') # Flash pesan error
+        return redirect(url_for('dashboard')) # Redirect ke dashboard
+    if not db_session.query(Exam.id).filter_by(id=exam_id, author_id=current_user.id).first(): # Hanya ujian milik guru yang sedang login
+        flash('Ujian tidak ditemukan atau Anda tidak memiliki izin.', 'danger') # Flash pesan error
+        return redirect(url_for('manage_exams')) # Redirect ke halaman mengelola ujian
+    exam = exam_contents.get(db_session, exam_id) # Judul dan jumlah pertanyaan dari cache
+    stats = load_stats(db_session.connection(), exam_id) # Satu baris ringkasan + K baris papan peringkat
+    return render_template('exam_stats.html', exam=exam, stats=stats, total_questions=len(exam.questions)) # Render template exam_stats.html
+
+@app.route('/health/db') # Halaman health: pengaturan database yang berlaku
+@instrumentation.protected # Hanya guru atau scraper dengan EXAM_METRICS_TOKEN
+def health_db(): # Fungsi untuk melaporkan pragma SQLite dan status pool
+    return jsonify(effective_settings(engine)) # Kembalikan dalam format JSON
+
+@app.route('/metrics/users') # Metrik cache identitas pengguna
+@instrumentation.protected # Hanya guru atau scraper dengan EXAM_METRICS_TOKEN
+def user_cache_metrics(): # Hit/miss, kedaluwarsa dan invalidasi
+    return jsonify(user_cache.metrics()) # Kembalikan metrik dalam JSON
+
+@app.route('/metrics/hashing') # Metrik layanan hashing password
+@instrumentation.protected # Hanya guru atau scraper dengan EXAM_METRICS_TOKEN
+def hashing_metrics(): # Jumlah dan waktu hashing per operasi serta permintaan yang ditolak
+    return jsonify(password_hasher.metrics()) # Kembalikan metrik dalam JSON
+
+@app.route('/metrics/submissions') # Metrik antrean pengiriman jawaban
+@instrumentation.protected # Hanya guru atau scraper dengan EXAM_METRICS_TOKEN
+def submission_metrics(): # Kedalaman antrean, ukuran batch dan latensi flush
+    if not submission_queue: # Mode antrean tidak aktif
+        return jsonify(enabled=False) # Tidak ada metrik
+    return jsonify(enabled=True, **submission_queue.metrics()) # Kembalikan metrik dalam JSON
 
 @app.route('/reset_database') # Halaman untuk mereset database (hanya untuk pengembangan)
 def reset_database(): # Fungsi untuk mereset database
     try: # Coba blok ini
-        if os.path.exists('exam_management.db'): # Jika file database ada
-            os.remove('exam_management.db') # Hapus file database lama
-        engine = create_engine('sqlite:///exam_management.db') # Buat engine baru
-        Base.metadata.create_all(engine) # Buat semua tabel baru
+        db_session.remove() # Lepaskan sesi saat ini
+        engine.dispose() # Tutup semua koneksi di pool sebelum file dihapus
+        db_path = engine.url.database # Lokasi file database
+        for path in (db_path, f'{db_path}-wal', f'{db_path}-shm'): # File database beserta file WAL-nya
+            if path and os.path.exists(path): # Jika file ada
+                os.remove(path) # Hapus file database lama
+        run_migrations(engine, MIGRATIONS, log=logger.info) # Buat semua tabel baru beserta indeksnya
+        exam_contents.clear() # Kosongkan cache isi ujian
+        user_cache.clear() # Pengguna lama sudah tidak ada
+        drafts.clear() # Draf yang belum ditulis milik data lama
         flash('Database berhasil direset dan dibuat ulang!', 'success') # Flash pesan sukses
     except Exception as e: # Jika ada kesalahan
         flash(f'Gagal mereset database: {e}', 'danger') # Flash pesan error
     return redirect(url_for('index')) # Redirect ke halaman beranda
 
-def get_grade(score, total_questions): # Fungsi untuk mendapatkan nilai berdasarkan skor
-    if total_questions == 0: # Jika tidak ada pertanyaan
-        return 'N/A'         # Kembalikan N/A
-    percentage = (score / total_questions) * 100  # Hitung persentase   
-    if percentage >= 90: # Jika persentase >= 90
-        return 'A' # Kembalikan nilai A
-    elif percentage >= 80: # Jika persentase >= 80
-        return 'B' # Kembalikan nilai B
-    elif percentage >= 70: # Jika persentase >= 70
-        return 'C' # Kembalikan nilai C
-    elif percentage >= 60: # Jika persentase >= 60
-        return 'D' # Kembalikan nilai D
-    else: # Jika persentase < 60
-        return 'E' # Kembalikan nilai E
-    
 if __name__ == '__main__': # Jalankan aplikasi
-    if not os.path.exists('exam_management.db'): # Jika file database tidak ada
-        from init_db import init_db # Impor fungsi init_db dari init_db.py
-        init_db() # Inisialisasi database
     app.run(debug=True) # Jalankan aplikasi dalam mode debug
\ No newline at end of file
@@ -0,0 +1,129 @@
+# File: asgi.py
+# Mode ASGI: route baca (dashboard, take_exam GET, hasil ujian, API ujian) dijalankan di event loop dengan sesi SQLAlchemy async (aiosqlite).
+# Kode view yang dijalankan sama persis dengan app.py: db_session diarahkan ke sesi async selama permintaan tersebut.
+# Route lain (login, POST, ekspor, analisis) tetap lewat jalur WSGI di thread pool; hashing dan PDF sudah berjalan di process pool.
+# Batasan: view async (termasuk render template) berjalan di thread event loop; hanya I/O database yang menjadi await.
+# Kerja CPU di view tersebut menahan semua koneksi worker itu, jadi hanya route baca yang murah dirender yang dimasukkan;
+# route yang ternyata berat dikeluarkan lewat EXAM_ASGI_ENDPOINTS agar kembali ke thread pool.
+# Jalankan: pip install -r requirements-asgi.txt && uvicorn asgi:application --workers 4
+import asyncio # Event loop
+import io # Body permintaan sebagai file untuk environ WSGI
+import os # Untuk pengaturan dari environment
+import sys # wsgi.errors
+from concurrent.futures import ThreadPoolExecutor # Thread untuk jalur WSGI dan pembacaan file respons
+try:
+    from asgiref.wsgi import WsgiToAsgi # Adaptor WSGI -> ASGI untuk route yang tidak async
+except ImportError as error: # Dependensi mode ASGI tidak dipasang bersama aplikasi WSGI
+    raise ImportError('Mode ASGI butuh paket di Versi2/requirements-asgi.txt (asgiref, aiosqlite, greenlet).') from error
+from sqlalchemy.ext.asyncio import async_sessionmaker # Sesi async per permintaan
+from werkzeug.exceptions import HTTPException # Route tidak ditemukan
+from database import db_session, db_settings, request_scope # Sesi bersama dan kunci sesi per permintaan
+from common.db_engine import create_async_db_engine # Engine aiosqlite dengan pragma yang sama
+from app import app, instrumentation # Aplikasi Flask yang sama
+
+ASYNC_ENDPOINTS = frozenset(filter(None, os.environ.get('EXAM_ASGI_ENDPOINTS', # Route baca yang dijalankan async (pisahkan dengan koma)
+                                                        'dashboard,take_exam,download_results,download_results_status,exam_api').split(',')))
+ASYNC_METHODS = ('GET', 'HEAD') # Hanya permintaan baca
+
+async_engine = create_async_db_engine(db_settings) # Pool koneksi aiosqlite terpisah dari engine sinkron
+instrumentation.watch_engine(async_engine.sync_engine) # Query async ikut dihitung di /metrics
+
+
+def wsgi_environ(scope, body): # Environ WSGI (PEP 3333) dari scope HTTP ASGI, sama seperti yang dibuat WsgiToAsgi
+    root_path = scope.get('root_path', '')
+    path = scope['path'][len(root_path):] if scope['path'].startswith(root_path) else scope['path']
+    server = scope.get('server') or ('localhost', 80) # None untuk unix socket
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root_path.encode('utf-8').decode('latin-1'),
+        'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin-1')
+        key = name.upper().replace('-', '_') if name in ('content-type', 'content-length') else 'HTTP_' + name.upper().replace('-', '_')
+        value = value.decode('latin-1')
+        environ[key] = f'{environ[key]},{value}' if key in environ else value # Header berulang digabung dengan koma
+    return environ
+
+
+class ExamASGI(object): # Aplikasi ASGI: route baca di event loop, sisanya ke Flask lewat thread pool
+    def __init__(self, flask_app, engine, threads=32):
+        self.flask_app = flask_app # Aplikasi Flask
+        self.engine = engine # Engine async
+        self.threads = threads # Ukuran thread pool untuk jalur WSGI
+        self.sessions = async_sessionmaker(engine, autoflush=False) # Pengaturan sesi sama seperti db_session
+        self.wsgi = WsgiToAsgi(flask_app) # Jalur WSGI (memakai executor bawaan event loop)
+        self.url_adapter = flask_app.url_map.bind('localhost') # Hanya untuk mencari endpoint dari path
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http' or scope['method'] not in ASYNC_METHODS or self.endpoint(scope) not in ASYNC_ENDPOINTS:
+            return await self.wsgi(scope, receive, send)
+        environ = wsgi_environ(scope, await self.read_body(receive))
+        started = []
+        request_scope.set(object()) # db_session di task ini memakai sesi async, bukan sesi thread event loop
+        session = self.sessions()
+        try:
+            app_iter = await session.run_sync(self.dispatch, environ, lambda status, headers, exc_info=None: started.append((status, headers)))
+        finally:
+            await session.close()
+        status, headers = started[-1]
+        await send({'type': 'http.response.start', 'status': int(status.split(' ', 1)[0]),
+                    'headers': [(name.lower().encode('latin1'), value.encode('latin1')) for name, value in headers]})
+        chunks = await asyncio.get_running_loop().run_in_executor(None, self.drain, app_iter) # File (send_file) dibaca di thread
+        await send({'type': 'http.response.body', 'body': b''.join(chunks)})
+
+    def dispatch(self, sync_session, environ, start_response): # Dijalankan di greenlet SQLAlchemy: I/O database menjadi await
+        db_session.registry.set(sync_session) # View, user_loader dan cache memakai sesi ini lewat db_session
+        return self.flask_app.wsgi_app(environ, start_response) # Hook, error handler dan teardown sama seperti WSGI
+
+    @staticmethod
+    def drain(app_iter): # Baca seluruh body respons lalu tutup iterator
+        try:
+            return list(app_iter)
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+    def endpoint(self, scope): # Nama endpoint Flask untuk path ini (None jika tidak cocok)
+        try:
+            return self.url_adapter.match(scope['path'], method=scope['method'])[0]
+        except HTTPException:
+            return None
+
+    @staticmethod
+    async def read_body(receive): # Body permintaan (biasanya kosong untuk GET)
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                return body
+
+    async def lifespan(self, receive, send): # Thread pool dibuat saat startup, engine ditutup saat shutdown
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='wsgi'))
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+application = ExamASGI(app, async_engine, threads=int(os.environ.get('EXAM_ASGI_THREADS', 32))) # Titik masuk ASGI
@@ -0,0 +1,99 @@
+# File: convert_submissions.py
+# Migrasi latar belakang: ubah jawaban JSON lama (answers.submitted_answers) dan blob biner versi 1/2 ke format biner terbaru (v3, tata letak tersimpan)
+# Jalankan: python convert_submissions.py [--batch-size N] [--pause DETIK]
+import argparse # Untuk argumen CLI
+import threading # Untuk menjalankan konversi di thread latar belakang
+import time # Jeda antar batch agar penulis lain tetap mendapat giliran
+from sqlalchemy import bindparam, func, or_, select, update # Query Core
+from sqlalchemy.orm import Session # Sesi singkat untuk memuat isi ujian
+from database import engine # Engine bersama (juga menambahkan root repo ke sys.path)
+from common.exam_content import load_exam_content # Urutan soal dan opsi per ujian
+from models import Exam, Question, Option, Answer, decode_submission # Model Versi2
+from exam_layouts import LayoutStore # Tata letak ujian saat ini untuk blob v3
+import submission_codec # Format biner jawaban
+
+BATCH_SIZE = 1000 # Baris per transaksi
+
+
+def to_binary(answer_key, layout, submission, submitted): # JSON lama, v1 atau v2 -> bytes v3; None jika ada jawaban yang tidak bisa diwakili
+    try:
+        selections = {question_id: option_id for question_id, option_id in
+                      decode_submission(answer_key, submission, submitted, keep_missing=True).items() if option_id is not None}
+    except submission_codec.SubmissionFormatError: # v1 dengan urutan soal yang sudah berubah
+        return None
+    blob = submission_codec.encode(layout, selections)
+    if submission_codec.decode(answer_key, blob, {layout.id: layout}, keep_missing=True) != selections: # Soal/opsi sudah tidak ada: biarkan format lama
+        return None
+    return blob
+
+
+def convert_batch(engine, answer_keys, after_id, batch_size=BATCH_SIZE, layouts=None): # Konversi satu batch; kembalikan (ID terakhir, dikonversi, dilewati)
+    layouts = layouts or LayoutStore(engine)
+    with engine.connect() as connection:
+        rows = connection.execute(select(Answer.id, Answer.exam_id, Answer.submission, Answer.submitted_answers)
+                                  .where(Answer.id > after_id,
+                                         or_(Answer.submission.is_(None) & Answer.submitted_answers.isnot(None),
+                                             func.substr(Answer.submission, 1, 1) != bytes((submission_codec.FORMAT_VERSION,))))
+                                  .order_by(Answer.id).limit(batch_size)).all()
+    if not rows:
+        return None, 0, 0
+    updates, skipped = [], 0
+    for answer_id, exam_id, old_blob, submitted in rows:
+        if exam_id not in answer_keys: # Kunci jawaban dan tata letak dimuat sekali per ujian (sebelum transaksi penulisan)
+            with Session(engine) as session:
+                content = load_exam_content(session, Exam, Question, Option, exam_id)
+            answer_keys[exam_id] = (content.answer_key, layouts.register(exam_id, content.answer_key)) if content else None
+        try:
+            blob = to_binary(*answer_keys[exam_id], old_blob, submitted) if answer_keys[exam_id] else None
+        except (ValueError, TypeError, AttributeError): # JSON rusak
+            blob = None
+        if blob is None:
+            skipped += 1
+            continue
+        updates.append({'answer_id': answer_id, 'old_blob': old_blob, 'blob': blob})
+    if updates:
+        table = Answer.__table__
+        with engine.begin() as connection: # Satu transaksi per batch; hanya baris yang belum berubah sejak dibaca
+            for from_json, batch in ((True, [row for row in updates if row['old_blob'] is None]),
+                                      (False, [row for row in updates if row['old_blob'] is not None])):
+                if batch:
+                    unchanged = table.c.submission.is_(None) if from_json else table.c.submission == bindparam('old_blob')
+                    connection.execute(update(table).where(table.c.id == bindparam('answer_id'), unchanged)
+                                       .values(submission=bindparam('blob'), submitted_answers=None), batch)
+    return rows[-1][0], len(updates), skipped
+
+
+def convert_submissions(engine, batch_size=BATCH_SIZE, pause=0.0, log=print, stop_event=None): # Konversi semua baris, batch demi batch
+    answer_keys = {} # exam_id -> (AnswerKey, Layout)
+    layouts = LayoutStore(engine)
+    after_id, converted, skipped = 0, 0, 0
+    while stop_event is None or not stop_event.is_set():
+        last_id, batch_converted, batch_skipped = convert_batch(engine, answer_keys, after_id, batch_size, layouts)
+        if last_id is None:
+            break
+        after_id = last_id
+        converted += batch_converted
+        skipped += batch_skipped
+        if log:
+            log(f'Jawaban dikonversi: {converted} (dilewati {skipped}), sampai ID {after_id}.')
+        if pause:
+            time.sleep(pause)
+    return converted, skipped
+
+
+def start_background(engine, batch_size=BATCH_SIZE, pause=0.05, log=None): # Jalankan konversi di thread daemon
+    stop_event = threading.Event()
+    thread = threading.Thread(target=convert_submissions, name='convert-submissions',
+                              kwargs={'engine': engine, 'batch_size': batch_size, 'pause': pause,
+                                      'log': log, 'stop_event': stop_event}, daemon=True)
+    thread.start()
+    return thread, stop_event
+
+
+if __name__ == '__main__': # Jalankan dari CLI
+    parser = argparse.ArgumentParser(description='Konversi jawaban JSON lama ke format biner.')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Baris per transaksi')
+    parser.add_argument('--pause', type=float, default=0.0, help='Jeda antar batch (detik)')
+    args = parser.parse_args()
+    converted, skipped = convert_submissions(engine, args.batch_size, args.pause)
+    print(f'Selesai: {converted} dikonversi, {skipped} dilewati.')
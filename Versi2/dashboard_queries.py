@@ -0,0 +1,67 @@
+# File: dashboard_queries.py
+# Lapisan query dashboard: satu halaman ujian (keyset pagination) beserta jawaban terakhir siswa dalam satu query
+# Riwayat ujian siswa diambil terpisah dan lengkap, tidak dibatasi halaman ujian yang sedang dilihat
+from collections import namedtuple # Untuk baris hasil yang ringan dan tidak terikat sesi
+from sqlalchemy import func, select # Fungsi agregat dan subquery
+from models import Exam, Answer # Model yang dibutuhkan
+
+PAGE_SIZE = 20 # Jumlah ujian per halaman dashboard
+
+DashboardRow = namedtuple('DashboardRow', 'id title description answer_id score date_taken') # Satu baris ujian di dashboard
+DashboardPage = namedtuple('DashboardPage', 'rows has_prev has_next first_id last_id') # Satu halaman dashboard
+DashboardTotals = namedtuple('DashboardTotals', 'exams attempted') # Jumlah total untuk ringkasan
+
+
+def exam_page(session, student_id, after=None, before=None, page_size=PAGE_SIZE, archive=None): # Ambil satu halaman ujian
+    latest_answer_id = (select(func.max(Answer.id)) # Jawaban terakhir siswa untuk ujian ini (memakai indeks answers(student_id, exam_id))
+                        .where(Answer.exam_id == Exam.id, Answer.student_id == student_id)
+                        .correlate(Exam)
+                        .scalar_subquery())
+    query = (session.query(Exam.id, Exam.title, Exam.description, Answer.id, Answer.score, Answer.date_taken)
+             .outerjoin(Answer, Answer.id == latest_answer_id)) # Gabungkan ujian dengan jawaban terakhir dalam satu statement
+    backwards = before is not None and after is None # Navigasi ke halaman sebelumnya
+    if backwards:
+        query = query.filter(Exam.id < before).order_by(Exam.id.desc())
+    else:
+        if after is not None:
+            query = query.filter(Exam.id > after)
+        query = query.order_by(Exam.id)
+    rows = [DashboardRow(*row) for row in query.limit(page_size + 1).all()] # Ambil satu baris ekstra untuk mendeteksi halaman berikutnya
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse() # Kembalikan ke urutan naik
+        has_prev, has_next = has_more, True
+    else:
+        has_prev, has_next = after is not None, has_more
+    if archive is not None: # Ujian yang jawabannya sudah diarsipkan (answer_archive.py): satu query indeks arsip
+        archived = archive.latest_results(student_id, [row.id for row in rows if row.answer_id is None])
+        rows = [row._replace(answer_id=archived[row.id][0], score=archived[row.id][1], date_taken=archived[row.id][2])
+                if row.id in archived else row for row in rows]
+    return DashboardPage(rows, has_prev, has_next,
+                         rows[0].id if rows else None, rows[-1].id if rows else None)
+
+
+def exam_history(session, student_id, archive=None): # Semua ujian yang pernah dikerjakan siswa beserta jawaban terakhirnya, urut ID ujian
+    latest_answer_ids = (select(func.max(Answer.id)) # Jawaban terakhir per ujian (memakai indeks answers(student_id, exam_id))
+                         .where(Answer.student_id == student_id)
+                         .group_by(Answer.exam_id))
+    rows = [DashboardRow(*row) for row in session.query(Exam.id, Exam.title, Exam.description, Answer.id, Answer.score, Answer.date_taken)
+            .join(Answer, Answer.exam_id == Exam.id).filter(Answer.id.in_(latest_answer_ids)).order_by(Exam.id).all()]
+    if archive is not None: # Ujian yang jawabannya hanya ada di arsip (answer_archive.py)
+        archived = archive.latest_results(student_id, sorted(archive.exam_ids(student_id) - {row.id for row in rows}))
+        if archived:
+            rows += [DashboardRow(exam_id, title, description, *archived[exam_id]) for exam_id, title, description in
+                     session.query(Exam.id, Exam.title, Exam.description).filter(Exam.id.in_(sorted(archived))).all()]
+            rows.sort(key=lambda row: row.id)
+    return rows
+
+
+def dashboard_totals(session, student_id, archive=None): # Hitung total ujian dan ujian yang sudah dikerjakan dalam satu statement
+    archived = archive.exam_ids(student_id) if archive is not None else set() # Ujian yang hanya ada di arsip dihitung sekali
+    exams = select(func.count()).select_from(Exam).scalar_subquery()
+    attempted = (select(func.count(func.distinct(Answer.exam_id)))
+                 .where(Answer.student_id == student_id, Answer.exam_id.not_in(sorted(archived)))
+                 .scalar_subquery())
+    row = session.execute(select(exams, attempted)).one()
+    return DashboardTotals(row[0], row[1] + len(archived))
@@ -1,11 +1,26 @@
-from sqlalchemy import create_engine # Inisialisasi koneksi ke database
+import contextvars # Kunci sesi per permintaan async (asgi.py)
+import os # Untuk operasi path
+import sys # Untuk menambahkan root repo ke sys.path
+import threading # Kunci sesi per thread (mode WSGI)
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..')) # Root repo
+if ROOT_DIR not in sys.path: # Agar paket common dapat diimpor
+    sys.path.insert(0, ROOT_DIR)
 from sqlalchemy.orm import scoped_session, sessionmaker # Menggunakan scoped_session untuk thread-safety
 from sqlalchemy.ext.declarative import declarative_base # Deklarasi base class untuk model
 
-engine = create_engine('sqlite:///exam_management.db') # Menggunakan SQLite
+from common.db_engine import load_settings, create_db_engine # Pabrik engine bersama (WAL, busy timeout, pool)
+
+db_settings = load_settings('sqlite:///exam_management.db') # Pengaturan dari environment EXAM_DB_*
+engine = create_db_engine(db_settings) # Menggunakan SQLite
+request_scope = contextvars.ContextVar('request_scope', default=None) # Diisi asgi.py agar setiap permintaan async punya sesi sendiri
+
+def session_scope(): # Kunci scoped_session: permintaan async jika ada, selain itu thread
+    return request_scope.get() or threading.get_ident()
+
 db_session = scoped_session(sessionmaker(autocommit=False,
                                          autoflush=False,
-                                         bind=engine))
+                                         bind=engine),
+                            scopefunc=session_scope) # Mode WSGI tetap satu sesi per thread
 # Inisialisasi Base class untuk model
 Base = declarative_base() # Base class untuk semua model
 Base.query = db_session.query # Menambahkan query ke Base class
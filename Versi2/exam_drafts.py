@@ -0,0 +1,188 @@
+# File: exam_drafts.py
+# Draf jawaban ujian (autosave): perubahan per siswa digabung di memori lalu ditulis per batch oleh thread latar belakang
+import threading # Thread penulis latar belakang
+import time # Untuk mengukur waktu flush
+from datetime import datetime # Waktu pembaruan draf
+from sqlalchemy import bindparam, delete, func, insert, select, tuple_, update # Query Core
+import submission_codec # Draf disimpan dalam format biner v2 (pasangan ID soal, ID opsi)
+
+
+def decode_draft(answer_key, blob): # Blob draf -> {question_id: option_id}; draf yang tidak terbaca lagi diabaikan
+    if blob is None:
+        return {}
+    return submission_codec.decode_lenient(answer_key, blob)
+
+
+class DraftBuffer(object): # Satu baris draf per (siswa, ujian); banyak klik digabung menjadi satu penulisan
+    def __init__(self, engine, table, answers=None, flush_interval=2.0, batch_size=500):
+        self.engine = engine # Engine database tujuan
+        self.table = table # Tabel draf (ExamDraft.__table__)
+        self.answers = answers # Tabel jawaban akhir (Answer.__table__): draf yang lebih lama dari pengiriman tidak ditulis lagi
+        self.flush_interval = flush_interval # Jeda maksimum sebelum perubahan ditulis
+        self.batch_size = batch_size # Jumlah draf kotor yang memicu flush lebih awal
+        self._pending = {} # (student_id, exam_id) -> (AnswerKey, {question_id: option_id}, waktu perubahan terakhir) yang belum ditulis
+        self._inflight = {} # Batch yang sedang ditulis (tetap terlihat oleh load)
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock() # Flush dan clear tidak boleh saling mendahului
+        self._thread = None
+        self._stopping = False
+        self._metrics = {'recorded': 0, 'coalesced': 0, 'flushes': 0, 'rows_written': 0, 'submitted_skipped': 0, 'errors': 0,
+                         'last_flush_ms': 0.0, 'max_flush_ms': 0.0}
+
+    def start(self): # Jalankan penulis latar belakang
+        self._thread = threading.Thread(target=self._run, name='draft-writer', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=10): # Tulis sisa draf lalu hentikan penulis
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    # --- Jalur permintaan ---
+
+    def record(self, student_id, exam_id, answer_key, selections): # Gabungkan perubahan ke draf di memori; tidak ada query
+        if not selections:
+            return
+        key = (student_id, exam_id)
+        now = datetime.now()
+        with self._cond:
+            pending = self._pending.get(key)
+            if pending is not None and pending[0] is answer_key:
+                pending[1].update(selections)
+                self._pending[key] = (answer_key, pending[1], now)
+                self._metrics['coalesced'] += 1
+            else: # Draf baru atau versi ujian berubah: kunci jawaban terbaru yang dipakai
+                merged = dict(pending[1]) if pending is not None else {}
+                merged.update(selections)
+                self._pending[key] = (answer_key, merged, now)
+            self._metrics['recorded'] += 1
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+
+    def load(self, student_id, exam_id, answer_key, connection=None): # Draf tersimpan + perubahan yang belum ditulis
+        table = self.table
+        query = select(table.c.submission).where(table.c.student_id == student_id, table.c.exam_id == exam_id)
+        if connection is not None: # Koneksi milik sesi permintaan (juga sesi async di asgi.py)
+            blob = connection.execute(query).scalar()
+        else:
+            with self.engine.connect() as own_connection:
+                blob = own_connection.execute(query).scalar()
+        selections = decode_draft(answer_key, blob)
+        with self._cond:
+            for buffered in (self._inflight, self._pending): # Yang lebih baru menimpa yang lebih lama
+                entry = buffered.get((student_id, exam_id))
+                if entry is not None:
+                    selections.update(entry[1])
+        return selections
+
+    def forget(self, student_id, exam_id): # Buang perubahan yang belum ditulis setelah jawaban akhir dikirim; tanpa query
+        with self._cond:
+            self._pending.pop((student_id, exam_id), None)
+
+    def delete_submitted(self, connection, rows): # Hapus draf baris answers yang baru disimpan, di transaksi yang menyimpannya
+        table = self.table
+        keys = {(row['student_id'], row['exam_id']) for row in rows}
+        if keys:
+            connection.execute(delete(table).where(tuple_(table.c.student_id, table.c.exam_id).in_(keys)))
+
+    def clear(self): # Buang perubahan yang belum ditulis (database direset)
+        with self._flush_lock:
+            with self._cond:
+                self._pending.clear()
+
+    def metrics(self): # Jumlah perubahan, penggabungan dan penulisan
+        with self._cond:
+            report = dict(self._metrics)
+            report['dirty'] = len(self._pending)
+        return report
+
+    # --- Penulis latar belakang ---
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if len(self._pending) < self.batch_size and not self._stopping:
+                    self._cond.wait(self.flush_interval) # Kumpulkan perubahan lain sebelum menulis
+                stopping = self._stopping
+            try:
+                self.flush()
+            except Exception: # Database sibuk atau error lain: coba lagi pada putaran berikutnya
+                with self._cond:
+                    self._metrics['errors'] += 1
+                if stopping:
+                    return
+                time.sleep(self.flush_interval)
+                continue
+            if stopping:
+                return
+
+    def flush(self): # Tulis semua draf kotor dalam satu transaksi
+        with self._flush_lock:
+            with self._cond:
+                batch, self._pending = self._pending, {}
+                self._inflight = batch
+            if not batch:
+                return
+            started = time.monotonic()
+            try:
+                written, skipped = self._write(batch)
+            except Exception: # Kembalikan ke antrean; perubahan yang lebih baru tetap menang
+                with self._cond:
+                    self._inflight = {}
+                    for key, (answer_key, selections, changed_at) in batch.items():
+                        newer = self._pending.get(key)
+                        if newer is not None:
+                            selections = {**selections, **newer[1]} if newer[0] is answer_key else newer[1]
+                            answer_key, changed_at = newer[0], newer[2]
+                        self._pending[key] = (answer_key, selections, changed_at)
+                raise
+            with self._cond:
+                self._inflight = {}
+        flush_ms = (time.monotonic() - started) * 1000.0
+        with self._cond:
+            metrics = self._metrics
+            metrics['flushes'] += 1
+            metrics['rows_written'] += written
+            metrics['submitted_skipped'] += skipped
+            metrics['last_flush_ms'] = flush_ms
+            metrics['max_flush_ms'] = max(metrics['max_flush_ms'], flush_ms)
+
+    def _write(self, batch): # Baca draf yang ada, gabungkan, lalu update/insert per batch
+        table = self.table
+        now = datetime.now()
+        students, exams = {key[0] for key in batch}, {key[1] for key in batch}
+        with self.engine.begin() as connection:
+            existing = {(student_id, exam_id): blob for student_id, exam_id, blob in connection.execute(
+                select(table.c.student_id, table.c.exam_id, table.c.submission)
+                .where(table.c.student_id.in_(students), table.c.exam_id.in_(exams)))}
+            submitted = {}
+            if self.answers is not None: # Pengiriman terakhir per (siswa, ujian), juga dari proses pekerja lain
+                answers = self.answers
+                submitted = {(student_id, exam_id): taken for student_id, exam_id, taken in connection.execute(
+                    select(answers.c.student_id, answers.c.exam_id, func.max(answers.c.date_taken))
+                    .where(answers.c.student_id.in_(students), answers.c.exam_id.in_(exams))
+                    .group_by(answers.c.student_id, answers.c.exam_id))}
+            updates, inserts, skipped = [], [], 0
+            for (student_id, exam_id), (answer_key, selections, changed_at) in batch.items():
+                taken = submitted.get((student_id, exam_id))
+                if taken is not None and taken >= changed_at: # Ujian sudah dikirim setelah perubahan ini: draf tidak dihidupkan lagi
+                    skipped += 1
+                    continue
+                merged = decode_draft(answer_key, existing.get((student_id, exam_id)))
+                merged.update(selections)
+                blob = submission_codec.encode_pairs(answer_key, merged) # Pasangan ID: draf tidak butuh tabel tata letak
+                if (student_id, exam_id) in existing:
+                    updates.append({'b_student': student_id, 'b_exam': exam_id, 'b_blob': blob, 'b_now': now})
+                else:
+                    inserts.append({'student_id': student_id, 'exam_id': exam_id, 'submission': blob, 'updated_at': now})
+            if updates:
+                connection.execute(update(table)
+                                   .where(table.c.student_id == bindparam('b_student'), table.c.exam_id == bindparam('b_exam'))
+                                   .values(submission=bindparam('b_blob'), updated_at=bindparam('b_now')), updates)
+            if inserts:
+                connection.execute(insert(table), inserts)
+        return len(updates) + len(inserts), skipped
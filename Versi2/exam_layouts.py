@@ -0,0 +1,87 @@
+# File: exam_layouts.py
+# Tata letak ujian untuk format jawaban v3 (submission_codec.py): urutan soal dan ID opsi per soal saat jawaban ditulis.
+# Baris exam_layouts hanya ditambah, tidak pernah diubah; blob jawaban menyimpan ID barisnya sehingga posisi opsi tetap bisa
+# dipetakan ke ID opsi yang dipilih siswa walaupun opsi itu kemudian diubah urutannya, dihapus atau dibuat ulang.
+import json # Kolom layout
+import threading # Untuk mengunci cache saat diakses banyak thread
+import zlib # crc32 untuk pencarian tata letak yang sama
+from collections import OrderedDict, namedtuple # Cache LRU dan tata letak yang tidak bisa diubah
+from datetime import datetime # Waktu pencatatan tata letak
+from sqlalchemy import insert, select # Query Core
+from models import ExamLayout # Model tata letak
+
+Layout = namedtuple('Layout', 'id question_ids options') # Atribut question_ids/options sama dengan AnswerKey
+
+
+def layout_text(answer_key): # JSON [[question_id, [option_id, ...]], ...] dalam urutan soal dan opsi
+    return json.dumps([[question_id, list(answer_key.options[question_id])] for question_id in answer_key.question_ids],
+                      separators=(',', ':'))
+
+
+def parse_layout(layout_id, text): # Baris exam_layouts -> Layout
+    entries = json.loads(text)
+    return Layout(layout_id, tuple(question_id for question_id, _ in entries),
+                  {question_id: tuple(option_ids) for question_id, option_ids in entries})
+
+
+def register_layout(connection, exam_id, answer_key): # Layout terdaftar untuk isi ujian ini di transaksi pemanggil; dibuat jika belum ada
+    table = ExamLayout.__table__
+    text = layout_text(answer_key)
+    checksum = zlib.crc32(text.encode('utf-8'))
+    for layout_id, stored in connection.execute(select(table.c.id, table.c.layout)
+                                                .where(table.c.exam_id == exam_id, table.c.checksum == checksum)):
+        if stored == text:
+            return parse_layout(layout_id, text)
+    layout_id = connection.execute(insert(table).values(exam_id=exam_id, checksum=checksum, layout=text,
+                                                        created_at=datetime.now())).inserted_primary_key[0]
+    return parse_layout(layout_id, text)
+
+
+class LayoutStore(object): # Cache tata letak per proses; setiap isi ujian didaftarkan sekali
+    def __init__(self, engine, max_entries=1024):
+        self.engine = engine # Engine database utama (tempat tabel exam_layouts)
+        self.max_entries = max_entries # Batas jumlah tata letak di setiap cache
+        self._layouts = OrderedDict() # layout_id -> Layout
+        self._registered = OrderedDict() # id(answer_key) -> (answer_key, Layout); kunci dicegah dipakai ulang selama entri ada
+        self._lock = threading.Lock()
+
+    def register(self, exam_id, answer_key): # Layout terdaftar untuk isi ujian saat ini
+        with self._lock:
+            entry = self._registered.get(id(answer_key))
+            if entry is not None and entry[0] is answer_key:
+                self._registered.move_to_end(id(answer_key))
+                return entry[1]
+        with self.engine.begin() as connection: # Transaksi sendiri agar ID di cache sudah di-commit; dipanggil sebelum pemanggil menulis (SQLite satu penulis)
+            layout = register_layout(connection, exam_id, answer_key)
+        with self._lock:
+            self._remember(self._registered, id(answer_key), (answer_key, layout))
+            self._remember(self._layouts, layout.id, layout)
+        return layout
+
+    def get(self, layout_id): # Layout untuk header blob v3; None jika tidak ada
+        with self._lock:
+            layout = self._layouts.get(layout_id)
+            if layout is not None:
+                self._layouts.move_to_end(layout_id)
+                return layout
+        table = ExamLayout.__table__
+        with self.engine.connect() as connection:
+            text = connection.execute(select(table.c.layout).where(table.c.id == layout_id)).scalar()
+        if text is None:
+            return None
+        layout = parse_layout(layout_id, text)
+        with self._lock:
+            self._remember(self._layouts, layout_id, layout)
+        return layout
+
+    def for_exam(self, exam_id): # Semua tata letak yang pernah dipakai ujian ini (prefilter regrade.py)
+        table = ExamLayout.__table__
+        with self.engine.connect() as connection:
+            return [parse_layout(layout_id, text) for layout_id, text in
+                    connection.execute(select(table.c.id, table.c.layout).where(table.c.exam_id == exam_id).order_by(table.c.id))]
+
+    def _remember(self, cache, key, value):
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.max_entries:
+            cache.popitem(last=False)
@@ -0,0 +1,187 @@
+# File: exam_stats.py
+# Statistik ujian yang dimaterialisasi: jumlah pengerjaan, jumlah skor dan kuadratnya, histogram nilai dan papan peringkat top-K.
+# Diperbarui di transaksi yang sama dengan penyimpanan jawaban, sehingga halaman statistik tidak memindai tabel answers.
+# Bangun ulang (backfill): python exam_stats.py rebuild [--exam ID ...] [--size K]
+import argparse # Untuk argumen CLI
+import heapq # Papan peringkat terbatas dan penggabungan dengan arsip saat membangun ulang
+import os # Untuk pengaturan dari environment
+import time # Untuk mengukur lama pembangunan ulang
+from collections import namedtuple # Untuk ringkasan statistik
+from datetime import datetime # Waktu pembaruan statistik
+from sqlalchemy import delete, func, insert, select, update # Query Core
+from database import engine # Engine bersama (juga menambahkan root repo ke sys.path)
+from common.scoring import GRADES, get_grade # Nilai huruf yang sama dengan halaman hasil dan ekspor
+from models import Answer, ExamLeader, ExamStats, Question, User # Model Versi2
+from answer_archive import AnswerArchive # Jawaban lama di file arsip
+
+LEADERBOARD_SIZE = int(os.environ.get('EXAM_LEADERBOARD_SIZE', 10)) # K papan peringkat; sama untuk aplikasi, migrasi dan CLI
+GRADE_COLUMNS = {grade: 'grade_' + grade.replace('/', '').lower() for grade in GRADES} # 'A' -> grade_a, 'N/A' -> grade_na
+COUNTERS = ('attempts', 'score_sum', 'score_sq_sum') + tuple(GRADE_COLUMNS.values()) # Kolom yang dijumlahkan
+BATCH_SIZE = 5000 # Baris per partisi saat membangun ulang
+
+ExamSummary = namedtuple('ExamSummary', 'attempts mean std grades leaderboard updated_at') # Ringkasan untuk halaman statistik
+Leader = namedtuple('Leader', 'rank student_id username score date_taken') # Satu baris papan peringkat
+
+
+def question_counts(connection, exam_ids): # {exam_id: jumlah pertanyaan}; dipakai jika pemanggil tidak tahu totalnya
+    return dict(connection.execute(select(Question.exam_id, func.count(Question.id))
+                                   .where(Question.exam_id.in_(exam_ids)).group_by(Question.exam_id)).all())
+
+
+def rank_key(score, date_taken, student_id): # Urutan papan peringkat: skor tertinggi, lalu yang lebih dulu mencapainya
+    return (-score, date_taken or datetime.min, student_id)
+
+
+def empty_counters():
+    return dict.fromkeys(COUNTERS, 0)
+
+
+def count_submission(counters, score, total_questions): # Tambahkan satu pengiriman ke penghitung ujian
+    counters['attempts'] += 1
+    counters['score_sum'] += score
+    counters['score_sq_sum'] += score * score
+    counters[GRADE_COLUMNS[get_grade(score, total_questions)]] += 1
+
+
+# --- Pembaruan inkremental ---
+
+def record_submissions(connection, rows, totals=None, size=LEADERBOARD_SIZE): # Dipanggil di transaksi yang menyimpan baris answers
+    by_exam = {} # exam_id -> baris pengiriman
+    for row in rows:
+        by_exam.setdefault(row['exam_id'], []).append(row)
+    if not by_exam:
+        return
+    if totals is None:
+        totals = question_counts(connection, list(by_exam))
+    now = datetime.now()
+    for exam_id in sorted(by_exam): # Urutan tetap agar transaksi paralel mengunci baris dengan urutan yang sama
+        counters = empty_counters()
+        for row in by_exam[exam_id]:
+            count_submission(counters, row['score'] or 0, totals.get(exam_id, 0))
+        add_counters(connection, exam_id, counters, now)
+        merge_leaderboard(connection, exam_id, by_exam[exam_id], size)
+
+
+def add_counters(connection, exam_id, counters, now): # UPDATE atomik; baris dibuat pada pengiriman pertama
+    table = ExamStats.__table__
+    values = {name: table.c[name] + value for name, value in counters.items()}
+    updated = connection.execute(update(table).where(table.c.exam_id == exam_id).values(updated_at=now, **values)).rowcount
+    if not updated:
+        connection.execute(insert(table).values(exam_id=exam_id, updated_at=now, **counters))
+
+
+def merge_leaderboard(connection, exam_id, rows, size): # Gabungkan pengiriman baru dengan K baris yang tersimpan; O(K) per ujian
+    table = ExamLeader.__table__
+    stored = {student_id: (score, date_taken) for student_id, score, date_taken in connection.execute(
+        select(table.c.student_id, table.c.score, table.c.date_taken).where(table.c.exam_id == exam_id))}
+    best = dict(stored)
+    for row in rows: # Skor terbaik setiap siswa; siswa yang sudah tergeser memang tidak bisa masuk dengan skor lebih rendah
+        score, date_taken = row['score'] or 0, row.get('date_taken')
+        current = best.get(row['student_id'])
+        if current is None or rank_key(score, date_taken, 0) < rank_key(current[0], current[1], 0):
+            best[row['student_id']] = (score, date_taken)
+    top = dict(heapq.nsmallest(size, best.items(), key=lambda item: rank_key(item[1][0], item[1][1], item[0])))
+    removed = [student_id for student_id, entry in stored.items() if top.get(student_id) != entry]
+    added = [{'exam_id': exam_id, 'student_id': student_id, 'score': score, 'date_taken': date_taken}
+             for student_id, (score, date_taken) in top.items() if stored.get(student_id) != (score, date_taken)]
+    if removed:
+        connection.execute(delete(table).where(table.c.exam_id == exam_id, table.c.student_id.in_(removed)))
+    if added:
+        connection.execute(insert(table), added)
+
+
+# --- Halaman statistik ---
+
+def load_stats(connection, exam_id): # Hanya membaca baris ringkasan dan K baris papan peringkat
+    stats = connection.execute(select(ExamStats.__table__).where(ExamStats.exam_id == exam_id)).mappings().first()
+    if not stats or not stats['attempts']:
+        return ExamSummary(0, None, None, [(grade, 0) for grade in GRADES], [], None)
+    attempts = stats['attempts']
+    mean = stats['score_sum'] / attempts
+    std = max(stats['score_sq_sum'] / attempts - mean * mean, 0.0) ** 0.5 # Simpangan baku populasi
+    table = ExamLeader.__table__
+    leaders = connection.execute(select(table.c.student_id, User.username, table.c.score, table.c.date_taken)
+                                 .outerjoin(User, User.id == table.c.student_id)
+                                 .where(table.c.exam_id == exam_id)).all()
+    leaders.sort(key=lambda row: rank_key(row.score, row.date_taken, row.student_id))
+    return ExamSummary(attempts, mean, std, [(grade, stats[column]) for grade, column in GRADE_COLUMNS.items()],
+                       [Leader(rank, *row) for rank, row in enumerate(leaders, 1)], stats['updated_at'])
+
+
+# --- Pembangunan ulang ---
+
+def rebuild_stats(connection, exam_ids=None, size=LEADERBOARD_SIZE, batch_size=BATCH_SIZE, archive=None): # Hitung ulang dari tabel answers dan arsip (backfill)
+    stats_table, leader_table = ExamStats.__table__, ExamLeader.__table__
+    for table in (stats_table, leader_table): # Tulis lebih dulu: pengiriman yang masuk bersamaan menunggu transaksi ini
+        statement = delete(table)
+        if exam_ids is not None:
+            statement = statement.where(table.c.exam_id.in_(exam_ids))
+        connection.execute(statement)
+    totals_query = select(Question.exam_id, func.count(Question.id)).group_by(Question.exam_id)
+    answers_query = (select(Answer.student_id, Answer.exam_id, Answer.score, Answer.date_taken)
+                     .order_by(Answer.student_id, Answer.exam_id)) # Urutan indeks ix_answers_student_exam
+    if exam_ids is not None:
+        totals_query = totals_query.where(Question.exam_id.in_(exam_ids))
+        answers_query = answers_query.where(Answer.exam_id.in_(exam_ids))
+    totals = dict(connection.execute(totals_query).all())
+    result = connection.execution_options(stream_results=True, yield_per=batch_size).execute(answers_query)
+    rows = (row for partition in result.partitions() for row in partition)
+    if archive is not None: # Jawaban yang sudah diarsipkan (answer_archive.py) ikut dihitung, urutannya sama
+        rows = heapq.merge(rows, archive.score_rows(exam_ids, batch_size), key=lambda row: (row[0], row[1]))
+
+    counters = {} # exam_id -> penghitung
+    heaps = {} # exam_id -> heap K siswa terbaik (elemen terburuk di puncak)
+    group, group_best = None, None # Pengiriman satu siswa untuk satu ujian berurutan
+    for student_id, exam_id, score, date_taken in rows:
+        score = score or 0
+        count_submission(counters.setdefault(exam_id, empty_counters()), score, totals.get(exam_id, 0))
+        if group != (student_id, exam_id):
+            push_leader(heaps, group, group_best, size)
+            group, group_best = (student_id, exam_id), None
+        key = rank_key(score, date_taken, student_id)
+        if group_best is None or key < group_best[0]:
+            group_best = (key, score, date_taken)
+    push_leader(heaps, group, group_best, size)
+
+    now = datetime.now()
+    if counters:
+        connection.execute(insert(stats_table), [dict(values, exam_id=exam_id, updated_at=now) for exam_id, values in counters.items()])
+    leaders = [{'exam_id': exam_id, 'student_id': entry[1], 'score': entry[2], 'date_taken': entry[3]}
+               for exam_id, heap in heaps.items() for entry in heap]
+    if leaders:
+        connection.execute(insert(leader_table), leaders)
+    return len(counters)
+
+
+def push_leader(heaps, group, group_best, size): # Masukkan skor terbaik satu siswa ke heap ujiannya (paling banyak K elemen)
+    if group is None:
+        return
+    student_id, exam_id = group
+    _, score, date_taken = group_best
+    worst_first = (score, -date_taken.timestamp() if date_taken else float('inf'), -student_id) # Heap minimum: peringkat terburuk di puncak
+    heap = heaps.setdefault(exam_id, [])
+    if len(heap) < size:
+        heapq.heappush(heap, (worst_first, student_id, score, date_taken))
+    elif worst_first > heap[0][0]:
+        heapq.heapreplace(heap, (worst_first, student_id, score, date_taken))
+
+
+# --- CLI ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Statistik ujian yang dimaterialisasi.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    rebuild = commands.add_parser('rebuild', help='Hitung ulang statistik dan papan peringkat dari tabel answers')
+    rebuild.add_argument('--exam', type=int, action='append', help='Hanya ujian ini (bisa diulang); bawaan: semua ujian')
+    rebuild.add_argument('--size', type=int, default=LEADERBOARD_SIZE, help='Jumlah siswa di papan peringkat')
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    with engine.begin() as connection: # Satu transaksi: halaman statistik tidak pernah melihat hasil setengah jadi
+        rebuilt = rebuild_stats(connection, args.exam, args.size, archive=AnswerArchive())
+    print(f'Selesai: statistik {rebuilt} ujian dibangun ulang dalam {time.perf_counter() - started:.1f} detik.')
+    return 0
+
+
+if __name__ == '__main__': # Jalankan dari CLI
+    raise SystemExit(main())
@@ -1,4 +1,5 @@
 from flask_wtf import FlaskForm # Import FlaskForm untuk membuat formulir
+from flask_wtf.file import FileField, FileRequired, FileAllowed # Field untuk unggah berkas
 from wtforms import StringField, PasswordField, SubmitField, SelectField, TextAreaField, BooleanField, FieldList, FormField # Import berbagai jenis field dari WTForms
 from wtforms.validators import DataRequired, Length, EqualTo, ValidationError # Import validator untuk validasi input
  
@@ -37,4 +38,8 @@ class OptionForm(FlaskForm): # Formulir untuk opsi jawaban
 class QuestionForm(FlaskForm): # Formulir untuk pertanyaan
     text = TextAreaField('Teks Pertanyaan', validators=[DataRequired()]) # Field untuk teks pertanyaan
     options = FieldList(FormField(OptionForm), min_entries=4, max_entries=4) # Daftar opsi jawaban
-    submit = SubmitField('Tambah Pertanyaan') # Tombol submit
\ No newline at end of file
+    submit = SubmitField('Tambah Pertanyaan') # Tombol submit
+
+class ImportQuestionsForm(FlaskForm): # Formulir untuk impor bank soal (JSON / CSV)
+    file = FileField('Berkas Bank Soal', validators=[FileRequired(), FileAllowed(['json', 'csv'], 'Hanya berkas JSON atau CSV.')]) # Berkas bank soal
+    submit = SubmitField('Impor Pertanyaan') # Tombol submit
\ No newline at end of file
@@ -1,17 +1,26 @@
-from sqlalchemy import create_engine # Inisialisasi koneksi ke database
-from models import Base # Pastikan model Base diimpor dari models.py
+from database import engine # Engine bersama dari pabrik engine
+from migrations import MIGRATIONS # Daftar migrasi skema
+from common.migrations import run_migrations # Runner migrasi skema
 import os # Untuk operasi file
+import sys # Untuk argumen CLI
 
-DB_PATH = 'exam_management.db' # Nama file database
+DB_PATH = engine.url.database # Lokasi file database
 
-def init_db(): # Inisialisasi database
+def init_db(reset=False): # Inisialisasi database; database lama diperbarui di tempat kecuali reset=True
+    if not reset: # Perbarui skema tanpa menghapus data
+        run_migrations(engine, MIGRATIONS, log=print) # Terapkan migrasi yang belum dijalankan
+        print("Skema database sudah versi terbaru.") # Konfirmasi migrasi
+        return
+    engine.dispose() # Tutup koneksi yang masih terbuka
     if os.path.exists(DB_PATH): # Hapus database lama jika ada
         os.remove(DB_PATH) # Hapus file database lama           
+        for path in (f'{DB_PATH}-wal', f'{DB_PATH}-shm'): # File pendamping mode WAL
+            if os.path.exists(path):
+                os.remove(path)
         print("Database lama dihapus.") # Konfirmasi penghapusan
     
-    engine = create_engine(f'sqlite:///{DB_PATH}') # Gunakan SQLite
-    Base.metadata.create_all(engine) # Buat semua tabel berdasarkan model
+    run_migrations(engine, MIGRATIONS, log=print) # Buat semua tabel dan indeks berdasarkan migrasi
     print("Database dan tabel baru berhasil dibuat.") # Konfirmasi pembuatan database
 
 if __name__ == '__main__': # Jalankan inisialisasi database jika file ini dieksekusi langsung
-    init_db() # Panggil fungsi inisialisasi database
\ No newline at end of file
+    init_db(reset='--reset' in sys.argv[1:]) # Gunakan --reset untuk menghapus dan membuat ulang database
\ No newline at end of file
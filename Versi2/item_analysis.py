@@ -0,0 +1,270 @@
+# File: item_analysis.py
+# Analisis butir soal: matriks respons NumPy (siswa x soal) lalu statistik per soal dihitung secara vektor
+# Jawaban yang sudah dipindahkan ke arsip (answer_archive.py) ikut dianalisis bersama jawaban di tabel answers
+import json # Jawaban tersimpan dalam format JSON
+import warnings # Untuk membungkam peringatan NumPy saat teks tidak terbaca sampai habis
+from collections import namedtuple # Untuk hasil analisis
+import numpy as np # Perhitungan vektor
+from sqlalchemy import func, select # Untuk query Core tanpa membuat objek ORM
+from models import Answer # Model jawaban
+from submission_codec import FORMAT_VERSION, HEADER, PAIR_TYPES, PAIRS_VERSION, SubmissionFormatError, check_layout, read_header # Format biner jawaban
+
+BATCH_SIZE = 5000 # Jumlah baris yang diambil per batch dari cursor
+NO_ANSWER = -1 # Nilai sel matriks untuk soal yang tidak dijawab
+JSON_PUNCTUATION = str.maketrans('{}":,', '     ') # Tanda baca JSON diganti spasi agar hanya angka yang tersisa
+
+QuestionStats = namedtuple('QuestionStats', [
+    'question_id', # ID pertanyaan
+    'p_value', # Tingkat kesukaran: proporsi siswa yang menjawab benar
+    'point_biserial', # Daya beda: korelasi benar/salah dengan skor sisa (tanpa soal ini)
+    'option_rates', # Proporsi siswa yang memilih setiap opsi (urutan tampil)
+    'omitted_rate', # Proporsi siswa yang tidak menjawab
+])
+
+ItemAnalysis = namedtuple('ItemAnalysis', [
+    'students', # Jumlah pengiriman yang dianalisis
+    'questions', # Daftar QuestionStats dalam urutan soal
+    'distribution', # Jumlah siswa untuk setiap skor 0..jumlah soal
+    'mean', # Rata-rata skor
+    'std', # Simpangan baku skor
+    'kr20', # Reliabilitas KR-20 (None jika tidak bisa dihitung)
+])
+
+
+def iter_submissions(engine, exam_id, latest_only=True, batch_size=BATCH_SIZE, archive=None): # Baca kolom jawaban saja (biner, JSON lama), per batch
+    archived = {} # student_id -> jawaban arsip terbaru (latest_only)
+    if latest_only and archive is not None and archive.available():
+        archived = latest_archived(archive, exam_id)
+    statement = select(Answer.student_id, Answer.id, Answer.submission, Answer.submitted_answers).where(Answer.exam_id == exam_id)
+    if latest_only: # Hanya pengiriman terakhir setiap siswa
+        latest = (select(func.max(Answer.id)).where(Answer.exam_id == exam_id)
+                  .group_by(Answer.student_id))
+        statement = statement.where(Answer.id.in_(latest))
+    with engine.connect() as connection:
+        result = connection.execution_options(stream_results=True, yield_per=batch_size).execute(statement)
+        for partition in result.partitions():
+            for row in partition:
+                older = archived.pop(row.student_id, None)
+                if older is not None and older.id > row.id: # Pengiriman terakhir siswa ini ada di arsip
+                    row = older
+                yield row.submission, row.submitted_answers
+    if latest_only: # Siswa yang semua jawabannya sudah diarsipkan
+        for row in archived.values():
+            yield row.submission, row.submitted_answers
+    elif archive is not None and archive.available(): # Semua pengiriman: segmen arsip dibaca satu per satu
+        for rows in archive.exam_answers(exam_id):
+            for row in rows:
+                yield row.submission, row.submitted_answers
+
+
+def latest_archived(archive, exam_id): # {student_id: ArchivedAnswer dengan ID terbesar}
+    latest = {}
+    for rows in archive.exam_answers(exam_id):
+        for row in rows:
+            current = latest.get(row.student_id)
+            if current is None or row.id > current.id:
+                latest[row.student_id] = row
+    return latest
+
+
+def flatten_submissions(submissions): # Ubah JSON {"question_id": option_id} menjadi larik datar (baris, pertanyaan, opsi)
+    blobs = [submitted or '{}' for submitted in submissions]
+    counts = np.fromiter((blob.count(':') for blob in blobs), dtype=np.int64, count=len(blobs)) # Jumlah pasangan per siswa
+    # Jalur cepat: semua angka dibaca sekaligus oleh NumPy (null menjadi 0, ID yang tidak pernah ada)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore') # Versi NumPy lama hanya memberi peringatan jika teks tidak terbaca sampai habis
+            numbers = np.fromstring(' '.join(blobs).replace('null', '0').translate(JSON_PUNCTUATION), dtype=np.int64, sep=' ')
+    except ValueError:
+        numbers = None
+    if numbers is None or len(numbers) != 2 * counts.sum(): # Format tidak terduga: urai satu per satu dengan json
+        return _flatten_json(blobs)
+    pairs = numbers.reshape(-1, 2)
+    return len(blobs), np.repeat(np.arange(len(blobs)), counts), pairs[:, 0], pairs[:, 1]
+
+
+def _flatten_json(blobs): # Jalur lambat yang selalu benar
+    rows, questions, options = [], [], []
+    for row, blob in enumerate(blobs):
+        for question_id, option_id in json.loads(blob).items():
+            try:
+                question_id, option_id = int(question_id), int(option_id or 0)
+            except (TypeError, ValueError): # Pasangan yang tidak valid diabaikan
+                continue
+            rows.append(row)
+            questions.append(question_id)
+            options.append(option_id)
+    return (len(blobs), np.array(rows, dtype=np.int64), np.array(questions, dtype=np.int64),
+            np.array(options, dtype=np.int64))
+
+
+def response_matrix(answer_key, submissions, layouts=None): # Matriks (siswa x soal) berisi indeks opsi yang dipilih, NO_ANSWER jika kosong
+    binary_rows, binary_blobs, json_rows, json_blobs = [], [], [], [] # Pisahkan format biner dan JSON lama
+    students = 0
+    for submission, submitted in submissions:
+        if submission is not None:
+            binary_rows.append(students)
+            binary_blobs.append(bytes(submission))
+        else:
+            json_rows.append(students)
+            json_blobs.append(submitted)
+        students += 1
+    matrix = np.full((students, len(answer_key.question_ids)), NO_ANSWER, dtype=np.int16)
+    fill_binary(answer_key, matrix, binary_rows, binary_blobs, layouts)
+    fill_json(answer_key, matrix, json_rows, json_blobs)
+    return matrix
+
+
+def fill_binary(answer_key, matrix, rows, blobs, layouts=None): # v2: semua pasangan dibaca sekaligus; v1/v3: blob dengan header yang sama sebagai satu larik
+    groups = {} # header v1/v3 -> (baris, blob)
+    pairs = {} # lebar ID -> (baris, blob) format v2
+    for row, blob in zip(rows, blobs):
+        if blob[:1] == bytes((PAIRS_VERSION,)):
+            group = pairs.setdefault(blob[1], ([], []))
+            group[0].append(row)
+            group[1].append(blob)
+            continue
+        group = groups.setdefault(blob[:HEADER.size], ([], []))
+        group[0].append(row)
+        group[1].append(blob)
+    option_counts = np.array([len(answer_key.options[question_id]) for question_id in answer_key.question_ids], dtype=np.int16)
+    for header, (group_rows, group_blobs) in groups.items():
+        try:
+            version, width, count, checksum = read_header(group_blobs[0])
+            if version == FORMAT_VERSION:
+                layout = layouts.get(checksum) if layouts is not None else None # Header v3 menyimpan ID tata letak
+                if layout is None or len(layout.question_ids) != count:
+                    continue
+            else:
+                check_layout(answer_key, count, checksum)
+        except SubmissionFormatError: # Tata letak lama yang tidak cocok lagi: dianggap tidak dijawab
+            continue
+        expected = HEADER.size + width * count
+        valid = [(row, blob) for row, blob in zip(group_rows, group_blobs) if len(blob) == expected]
+        if not valid or not count:
+            continue
+        cells = np.frombuffer(b''.join(blob[HEADER.size:] for _, blob in valid),
+                              dtype='<u1' if width == 1 else '<u2').reshape(len(valid), count)
+        if version == FORMAT_VERSION: # Posisi menurut tata letak tersimpan -> ID opsi, lalu dipetakan ke isi ujian saat ini
+            fill_layout_cells(answer_key, matrix, layout, np.array([row for row, _ in valid], dtype=np.int64), cells)
+            continue
+        cells = cells.astype(np.int16) - 1 # Posisi opsi; 0 (tidak dijawab) menjadi NO_ANSWER
+        cells[cells >= option_counts[:count]] = NO_ANSWER # Posisi di luar jumlah opsi diabaikan
+        matrix[np.array([row for row, _ in valid]), :count] = cells
+    for width, (group_rows, group_blobs) in pairs.items():
+        fill_pairs_binary(answer_key, matrix, width, group_rows, group_blobs)
+
+
+def fill_layout_cells(answer_key, matrix, layout, rows, cells): # Sel v3 (siswa x soal tata letak) -> pasangan (baris, ID soal, ID opsi)
+    count = len(layout.question_ids)
+    choices = np.full((count, max(len(options) for options in layout.options.values()) + 1), -1, dtype=np.int64) # Kolom 0 = tidak dijawab
+    for column, question_id in enumerate(layout.question_ids):
+        options = layout.options[question_id]
+        choices[column, 1:len(options) + 1] = options
+    cells = cells.astype(np.int64).clip(0, choices.shape[1] - 1) # Posisi di luar jumlah opsi dianggap tidak dijawab
+    picked = choices[np.arange(count)[None, :], cells]
+    answered = picked >= 0
+    fill_pairs(answer_key, matrix, np.broadcast_to(rows[:, None], picked.shape)[answered],
+               np.broadcast_to(np.array(layout.question_ids, dtype=np.int64)[None, :], picked.shape)[answered], picked[answered])
+
+
+def fill_pairs_binary(answer_key, matrix, width, rows, blobs): # Blob v2 dengan lebar ID yang sama: satu frombuffer untuk semua pasangan
+    valid = []
+    for row, blob in zip(rows, blobs):
+        try:
+            read_header(blob)
+        except SubmissionFormatError: # Blob rusak: dianggap tidak dijawab
+            continue
+        valid.append((row, blob))
+    if not valid or width not in PAIR_TYPES:
+        return
+    counts = np.array([(len(blob) - HEADER.size) // (2 * width) for _, blob in valid], dtype=np.int64) # Pasangan per siswa
+    values = np.frombuffer(b''.join(blob[HEADER.size:] for _, blob in valid), dtype=f'<u{width}').astype(np.int64).reshape(-1, 2)
+    fill_pairs(answer_key, matrix, np.repeat(np.array([row for row, _ in valid], dtype=np.int64), counts), values[:, 0], values[:, 1])
+
+
+def fill_json(answer_key, matrix, rows, blobs): # Jawaban JSON lama yang belum dikonversi
+    if not blobs:
+        return
+    rows = np.array(rows, dtype=np.int64)
+    _, blob_rows, picked_questions, picked_options = flatten_submissions(blobs)
+    fill_pairs(answer_key, matrix, rows[blob_rows], picked_questions, picked_options) # Baris di dalam daftar JSON -> baris matriks
+
+
+def fill_pairs(answer_key, matrix, rows, picked_questions, picked_options): # Pasangan (baris, ID soal, ID opsi) -> indeks opsi di matriks
+    question_ids = np.array(answer_key.question_ids, dtype=np.int64)
+    question_order = np.argsort(question_ids) # Untuk memetakan ID pertanyaan ke kolom dengan searchsorted
+    option_ids = [] # Semua ID opsi ujian
+    option_columns = [] # Kolom pertanyaan pemilik setiap opsi
+    option_indexes = [] # Posisi opsi di dalam pertanyaannya
+    for column, question_id in enumerate(answer_key.question_ids):
+        for index, option_id in enumerate(answer_key.options[question_id]):
+            option_ids.append(option_id)
+            option_columns.append(column)
+            option_indexes.append(index)
+    option_ids = np.array(option_ids, dtype=np.int64)
+    option_order = np.argsort(option_ids)
+    option_columns = np.array(option_columns, dtype=np.int64)[option_order]
+    option_indexes = np.array(option_indexes, dtype=np.int16)[option_order]
+    option_ids = option_ids[option_order]
+
+    if not len(picked_options) or not len(option_ids):
+        return
+
+    question_pos = np.searchsorted(question_ids[question_order], picked_questions).clip(0, len(question_ids) - 1)
+    columns = question_order[question_pos]
+    option_pos = np.searchsorted(option_ids, picked_options).clip(0, len(option_ids) - 1)
+    valid = ((question_ids[columns] == picked_questions) # Pertanyaan masih ada di ujian
+             & (option_ids[option_pos] == picked_options) # Opsi masih ada
+             & (option_columns[option_pos] == columns)) # Opsi milik pertanyaan yang sama
+    matrix[rows[valid], columns[valid]] = option_indexes[option_pos[valid]]
+
+
+def analyze(answer_key, matrix): # Hitung statistik butir soal dari matriks respons
+    students, question_count = matrix.shape
+    max_options = max([len(answer_key.options[question_id]) for question_id in answer_key.question_ids] or [0])
+    key = np.zeros((question_count, max_options + 1), dtype=bool) # Kolom terakhir = tidak menjawab (selalu salah)
+    for column, question_id in enumerate(answer_key.question_ids):
+        correct = answer_key.correct[question_id]
+        for index, option_id in enumerate(answer_key.options[question_id]):
+            key[column, index] = option_id in correct
+
+    if students == 0 or question_count == 0:
+        return ItemAnalysis(students, [QuestionStats(question_id, None, None, [0.0] * len(answer_key.options[question_id]), 0.0)
+                                       for question_id in answer_key.question_ids],
+                            [0] * (question_count + 1), 0.0, 0.0, None)
+
+    cells = np.where(matrix == NO_ANSWER, max_options, matrix) # Indeks kolom kunci untuk setiap sel
+    columns = np.arange(question_count)
+    scored = key[columns, cells] # Matriks benar/salah (siswa x soal)
+    totals = scored.sum(axis=1)
+
+    p_values = scored.mean(axis=0)
+    item_var = p_values * (1 - p_values)
+    total_var = totals.var()
+    cov_total = (scored * totals[:, None]).mean(axis=0) - p_values * totals.mean() # Kovarians soal dengan skor total
+    rest_var = total_var - 2 * cov_total + item_var # Varians skor sisa (total tanpa soal ini)
+    denominator = np.sqrt(item_var * rest_var)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        point_biserial = np.where(denominator > 0, (cov_total - item_var) / denominator, np.nan)
+
+    counts = np.bincount((columns * (max_options + 1) + cells).ravel(),
+                         minlength=question_count * (max_options + 1)).reshape(question_count, max_options + 1)
+    rates = counts / students
+
+    kr20 = None
+    if question_count > 1 and total_var > 0:
+        kr20 = float(question_count / (question_count - 1) * (1 - item_var.sum() / total_var))
+
+    questions = [QuestionStats(question_id,
+                               float(p_values[column]),
+                               None if np.isnan(point_biserial[column]) else float(point_biserial[column]),
+                               [float(rate) for rate in rates[column, :len(answer_key.options[question_id])]],
+                               float(rates[column, max_options]))
+                 for column, question_id in enumerate(answer_key.question_ids)]
+    return ItemAnalysis(students, questions, np.bincount(totals, minlength=question_count + 1).tolist(),
+                        float(totals.mean()), float(np.sqrt(total_var)), kr20)
+
+
+def analyze_exam(engine, answer_key, exam_id, latest_only=True, layouts=None, archive=None): # Jalankan seluruh analisis untuk satu ujian
+    return analyze(answer_key, response_matrix(answer_key, iter_submissions(engine, exam_id, latest_only, archive=archive), layouts))
@@ -0,0 +1,135 @@
+# File: migrations.py
+# Daftar migrasi skema Versi2. Jalankan: python migrations.py [status|upgrade]
+from sqlalchemy import text # Untuk DDL trigger
+from database import engine # Engine bersama dari pabrik engine
+from models import Base, ChangedQuestion, ExamBulkEdit, ExamDraft, ExamLayout, ExamLeader, ExamStats # Metadata semua model
+from common.migrations import Migration, add_column_if_missing, create_indexes, main # Runner migrasi bersama
+from common.submission_queue import create_checkpoint_table # Tabel checkpoint antrean pengiriman
+from exam_stats import LEADERBOARD_SIZE, rebuild_stats # Backfill statistik ujian dari jawaban yang sudah ada
+from question_search import SEARCH_TRIGGERS, create_search_index # Indeks FTS5 bank soal
+
+
+def create_tables(connection): # Skema awal: semua tabel dari model
+    Base.metadata.create_all(bind=connection) # Tabel yang sudah ada tidak diubah
+
+
+def add_exam_version(connection): # Kolom versi ujian untuk invalidasi cache isi ujian
+    add_column_if_missing(connection, 'exams', 'version', 'INTEGER NOT NULL DEFAULT 1') # Database lama belum memiliki kolom ini
+
+
+def add_answer_submission(connection): # Kolom jawaban biner; baris JSON lama dikonversi oleh convert_submissions.py
+    add_column_if_missing(connection, 'answers', 'submission', 'BLOB') # Konversi data berjalan di latar belakang, bukan di migrasi
+
+
+def create_exam_drafts(connection): # Tabel draf jawaban untuk autosave
+    ExamDraft.__table__.create(bind=connection, checkfirst=True) # Database baru sudah membuatnya lewat create_tables
+
+
+def add_exam_content_hash(connection): # ETag dokumen API isi ujian
+    add_column_if_missing(connection, 'exams', 'content_hash', 'VARCHAR(64)') # Dihitung ulang saat versi ujian berubah
+
+
+SKIP_BULK = ' AND id NOT IN (SELECT exam_id FROM exam_bulk_edits)' # Impor massal (question_import.bulk_content_edit) menaikkan versi sekali di akhir
+
+CONTENT_TRIGGERS = { # Perubahan isi ujian dari skrip mana pun menaikkan versi ujian (SQLite)
+    'questions_bump_version_insert': f'AFTER INSERT ON questions BEGIN UPDATE exams SET version = version + 1 WHERE id = NEW.exam_id{SKIP_BULK}; END',
+    'questions_bump_version_update': f'AFTER UPDATE ON questions BEGIN UPDATE exams SET version = version + 1 WHERE id IN (OLD.exam_id, NEW.exam_id){SKIP_BULK}; END',
+    'questions_bump_version_delete': f'AFTER DELETE ON questions BEGIN UPDATE exams SET version = version + 1 WHERE id = OLD.exam_id{SKIP_BULK}; END',
+    'options_bump_version_insert': 'AFTER INSERT ON options BEGIN UPDATE exams SET version = version + 1 '
+                                   f'WHERE id = (SELECT exam_id FROM questions WHERE id = NEW.question_id){SKIP_BULK}; END',
+    'options_bump_version_update': 'AFTER UPDATE ON options BEGIN UPDATE exams SET version = version + 1 '
+                                   f'WHERE id IN (SELECT exam_id FROM questions WHERE id IN (OLD.question_id, NEW.question_id)){SKIP_BULK}; END',
+    'options_bump_version_delete': 'AFTER DELETE ON options BEGIN UPDATE exams SET version = version + 1 '
+                                   f'WHERE id = (SELECT exam_id FROM questions WHERE id = OLD.question_id){SKIP_BULK}; END',
+    'exams_bump_version_update': 'AFTER UPDATE OF title, description ON exams BEGIN UPDATE exams SET version = version + 1 WHERE id = NEW.id; END',
+}
+
+
+def create_content_triggers(connection): # Skrip pemeliharaan yang lupa memanggil bump_exam_version tetap membuat versi baru
+    if connection.dialect.name != 'sqlite': # Dialek lain mengandalkan bump_exam_version di aplikasi
+        return
+    ExamBulkEdit.__table__.create(bind=connection, checkfirst=True) # Dibaca trigger (database baru sudah membuatnya lewat create_tables)
+    for name, body in CONTENT_TRIGGERS.items():
+        connection.execute(text(f'CREATE TRIGGER IF NOT EXISTS {name} {body}'))
+
+
+def add_lookup_indexes(connection): # Indeks untuk answers(student_id, exam_id), options(question_id, is_correct), questions(exam_id)
+    create_indexes(connection, Base.metadata) # Indeks didefinisikan di models.py
+
+
+def create_exam_stats(connection): # Statistik ujian yang dimaterialisasi, diisi dari jawaban yang sudah ada
+    for model in (ExamStats, ExamLeader): # Database baru sudah membuatnya lewat create_tables
+        model.__table__.create(bind=connection, checkfirst=True)
+    rebuild_stats(connection, size=LEADERBOARD_SIZE) # Sekali pindai tabel answers; selanjutnya diperbarui per pengiriman
+
+
+CHANGED_QUESTION_ROW = ("INSERT INTO changed_questions (question_id, exam_id, exam_version, changed_at) "
+                        "SELECT q.id, q.exam_id, COALESCE((SELECT MIN(c.exam_version) FROM changed_questions c WHERE c.question_id = q.id), e.version), " # Versi pertama yang belum dinilai ulang tetap dipakai
+                        "datetime('now', 'localtime') FROM questions q JOIN exams e ON e.id = q.exam_id WHERE q.id IN ({ids}); "
+                        "DELETE FROM changed_questions WHERE question_id IN ({ids}) AND id NOT IN " # Satu baris per pertanyaan: yang terbaru (ID-nya lebih besar dari yang sedang diproses regrade.py)
+                        "(SELECT MAX(id) FROM changed_questions WHERE question_id IN ({ids}) GROUP BY question_id);")
+
+REGRADE_TRIGGERS = { # Perubahan opsi (termasuk hapus lalu buat ulang seperti Versi1/ubahdata.py) dicatat untuk regrade.py (SQLite)
+    'options_changed_insert': 'AFTER INSERT ON options WHEN NEW.is_correct AND EXISTS (SELECT 1 FROM questions q JOIN exam_stats s ON s.exam_id = q.exam_id ' # Hanya kunci baru di ujian yang sudah dikerjakan; impor soal baru tidak dicatat
+                              f'WHERE q.id = NEW.question_id AND s.attempts > 0 AND q.exam_id NOT IN (SELECT exam_id FROM exam_bulk_edits)) BEGIN {CHANGED_QUESTION_ROW.format(ids="NEW.question_id")} END',
+    'options_changed_update': 'AFTER UPDATE OF is_correct, question_id ON options WHEN OLD.is_correct IS NOT NEW.is_correct OR OLD.question_id IS NOT NEW.question_id '
+                              f'BEGIN {CHANGED_QUESTION_ROW.format(ids="OLD.question_id, NEW.question_id")} END',
+    'options_changed_delete': f'AFTER DELETE ON options BEGIN {CHANGED_QUESTION_ROW.format(ids="OLD.question_id")} END',
+}
+
+
+def create_changed_questions(connection): # Tabel pertanyaan yang berubah untuk penilaian ulang inkremental
+    ChangedQuestion.__table__.create(bind=connection, checkfirst=True) # Database baru sudah membuatnya lewat create_tables
+    if connection.dialect.name != 'sqlite': # Dialek lain memanggil regrade.mark_questions_changed dari skrip pengubah
+        return
+    for name, body in REGRADE_TRIGGERS.items():
+        connection.execute(text(f'CREATE TRIGGER IF NOT EXISTS {name} {body}'))
+
+
+def narrow_changed_questions(connection): # Trigger versi awal mencatat setiap opsi yang diimpor, berkali-kali per pertanyaan
+    create_indexes(connection, Base.metadata) # ix_changed_questions_question untuk trigger baru
+    if connection.dialect.name != 'sqlite':
+        return
+    connection.execute(text('UPDATE changed_questions SET exam_version = (SELECT MIN(c.exam_version) FROM changed_questions c ' # Gabungkan baris lama per pertanyaan
+                            'WHERE c.question_id = changed_questions.question_id)'))
+    connection.execute(text('DELETE FROM changed_questions WHERE id NOT IN (SELECT MAX(id) FROM changed_questions GROUP BY question_id)'))
+    for name, body in REGRADE_TRIGGERS.items():
+        connection.execute(text(f'DROP TRIGGER IF EXISTS {name}'))
+        connection.execute(text(f'CREATE TRIGGER {name} {body}'))
+
+
+def skip_bulk_version_bumps(connection): # Trigger versi awal menaikkan versi sekali per baris (25000 kali untuk impor 5000 soal)
+    if connection.dialect.name != 'sqlite':
+        return
+    ExamBulkEdit.__table__.create(bind=connection, checkfirst=True)
+    triggers = dict(CONTENT_TRIGGERS, options_search_insert=SEARCH_TRIGGERS['options_search_insert'], # Indeks opsi diisi sekali per impor
+                    options_changed_insert=REGRADE_TRIGGERS['options_changed_insert']) # Soal yang baru diimpor belum pernah dijawab
+    for name, body in triggers.items():
+        connection.execute(text(f'DROP TRIGGER IF EXISTS {name}'))
+        connection.execute(text(f'CREATE TRIGGER {name} {body}'))
+
+
+def create_exam_layouts(connection): # Tata letak ujian untuk jawaban format v3; jawaban lama dikonversi oleh convert_submissions.py
+    ExamLayout.__table__.create(bind=connection, checkfirst=True) # Database baru sudah membuatnya lewat create_tables
+
+
+MIGRATIONS = [ # Urutan migrasi; jangan ubah migrasi yang sudah dirilis, tambahkan yang baru di akhir
+    Migration(1, 'create_tables', create_tables),
+    Migration(2, 'add_exam_version', add_exam_version),
+    Migration(3, 'add_lookup_indexes', add_lookup_indexes),
+    Migration(4, 'create_submission_queue_checkpoints', create_checkpoint_table),
+    Migration(5, 'add_answer_submission', add_answer_submission),
+    Migration(6, 'create_exam_drafts', create_exam_drafts),
+    Migration(7, 'add_exam_content_hash', add_exam_content_hash),
+    Migration(8, 'create_content_triggers', create_content_triggers),
+    Migration(9, 'create_exam_stats', create_exam_stats),
+    Migration(10, 'create_changed_questions', create_changed_questions),
+    Migration(11, 'create_question_search', create_search_index),
+    Migration(12, 'narrow_changed_questions', narrow_changed_questions),
+    Migration(13, 'skip_bulk_version_bumps', skip_bulk_version_bumps),
+    Migration(14, 'create_exam_layouts', create_exam_layouts),
+]
+
+
+if __name__ == '__main__': # Jalankan dari CLI
+    raise SystemExit(main(engine, MIGRATIONS))
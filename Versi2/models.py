@@ -1,8 +1,10 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, Boolean, ForeignKey # Import SQLAlchemy core dan tipe data
+from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Index, LargeBinary # Import SQLAlchemy core dan tipe data
 from sqlalchemy.orm import sessionmaker, relationship # Import ORM dan relationship
 from sqlalchemy.ext.declarative import declarative_base # Import declarative_base untuk model
 from flask_login import UserMixin # Import UserMixin untuk integrasi Flask-Login
 from datetime import datetime # Import datetime untuk timestamp
+import json # Untuk membaca jawaban format lama (JSON)
+import submission_codec # Format biner jawaban siswa
 
 # Inisialisasi declarative_base untuk model
 Base = declarative_base() # Base class untuk semua model
@@ -29,6 +31,8 @@ class Exam(Base): # Model untuk ujian
     title = Column(String(100), nullable=False) # Kolom judul ujian
     description = Column(Text, nullable=True) # Kolom deskripsi ujian
     author_id = Column(Integer, ForeignKey('users.id')) # Kolom foreign key ke User
+    version = Column(Integer, nullable=False, default=1) # Versi isi ujian, naik setiap kali ujian diedit (untuk invalidasi cache)
+    content_hash = Column(String(64), nullable=True) # ETag dokumen API untuk versi yang tercatat ("<versi>.<sha256>"), diisi saat pertama diminta
     
     author = relationship("User", back_populates="exams") # Relasi ke User
     questions = relationship("Question", back_populates="exam", cascade="all, delete-orphan") # Relasi ke Question
@@ -36,6 +40,7 @@ class Exam(Base): # Model untuk ujian
 
 class Question(Base): # Model untuk pertanyaan
     __tablename__ = 'questions' # Nama tabel di database
+    __table_args__ = (Index('ix_questions_exam_id', 'exam_id'),) # Indeks untuk memuat pertanyaan per ujian
     id = Column(Integer, primary_key=True) # Kolom ID sebagai primary key
     exam_id = Column(Integer, ForeignKey('exams.id')) # Kolom foreign key ke Exam
     text = Column(Text, nullable=False) # Kolom teks pertanyaan
@@ -45,6 +50,7 @@ class Question(Base): # Model untuk pertanyaan
 
 class Option(Base): # Model untuk opsi jawaban
     __tablename__ = 'options' # Nama tabel di database
+    __table_args__ = (Index('ix_options_question_correct', 'question_id', 'is_correct'),) # Indeks untuk opsi per pertanyaan dan kunci jawaban
     id = Column(Integer, primary_key=True) # Kolom ID sebagai primary key
     question_id = Column(Integer, ForeignKey('questions.id')) # Kolom foreign key ke Question
     text = Column(Text, nullable=False) # Kolom teks opsi
@@ -54,12 +60,82 @@ class Option(Base): # Model untuk opsi jawaban
 
 class Answer(Base): # Model untuk jawaban siswa
     __tablename__ = 'answers' # Nama tabel di database
+    __table_args__ = (Index('ix_answers_student_exam', 'student_id', 'exam_id'),) # Indeks untuk jawaban siswa per ujian
     id = Column(Integer, primary_key=True) # Kolom ID sebagai primary key
     exam_id = Column(Integer, ForeignKey('exams.id')) # Kolom foreign key ke Exam
     student_id = Column(Integer, ForeignKey('users.id')) # Kolom foreign key ke User (siswa)
     score = Column(Integer) # Kolom skor jawaban
     date_taken = Column(DateTime, default=datetime.now) # Kolom tanggal pengambilan ujian
-    submitted_answers = Column(Text) # Kolom untuk menyimpan jawaban yang diajukan (misalnya dalam format JSON)
+    submitted_answers = Column(Text) # Jawaban format lama (JSON), dikosongkan setelah dikonversi ke kolom submission
+    submission = Column(LargeBinary) # Jawaban dalam format biner ringkas (lihat submission_codec.py)
     
     exam = relationship("Exam", back_populates="answers") # Relasi ke Exam
-    student = relationship("User", back_populates="answers") # Relasi ke User (siswa)
\ No newline at end of file
+    student = relationship("User", back_populates="answers") # Relasi ke User (siswa)
+
+    @staticmethod
+    def encode_selections(layout, selections): # {question_id: option_id} -> nilai kolom submission (juga untuk baris antrean berupa dict)
+        return submission_codec.encode(layout, selections) # Posisi opsi per soal menurut tata letak terdaftar (exam_layouts.py)
+
+    def decode_selections(self, answer_key, layouts): # Baca jawaban sebagai {question_id: option_id} untuk ditampilkan (PDF hasil)
+        return decode_submission(answer_key, self.submission, self.submitted_answers, layouts, strict=False) # Blob yang tidak terbaca = tidak dijawab
+
+def decode_submission(answer_key, submission, submitted_answers, layouts=None, strict=True, keep_missing=False): # Kolom jawaban (biner atau JSON lama) -> {question_id: option_id}
+    try:
+        if submission is not None: # Format biner
+            return submission_codec.decode(answer_key, submission, layouts, keep_missing) # Pilihan yang soal/opsinya sudah dihapus diabaikan kecuali keep_missing
+        if submitted_answers: # Format lama yang belum dikonversi
+            return {int(question_id): option_id for question_id, option_id in json.loads(submitted_answers).items()} # Kunci JSON berupa teks
+    except (submission_codec.SubmissionFormatError, ValueError, TypeError, IndexError):
+        if strict: # regrade.py harus tahu jawaban ini tidak terbaca (skornya tidak boleh dinolkan)
+            raise
+    return {} # Tidak ada jawaban
+
+class ExamDraft(Base): # Draf jawaban ujian yang sedang dikerjakan (autosave, lihat exam_drafts.py)
+    __tablename__ = 'exam_drafts' # Nama tabel di database
+    student_id = Column(Integer, ForeignKey('users.id'), primary_key=True) # Siswa pemilik draf
+    exam_id = Column(Integer, ForeignKey('exams.id'), primary_key=True) # Ujian yang sedang dikerjakan
+    submission = Column(LargeBinary, nullable=False) # Jawaban sementara dalam format biner ringkas
+    updated_at = Column(DateTime, default=datetime.now) # Waktu autosave terakhir
+
+class ExamLayout(Base): # Urutan soal dan ID opsi ujian saat jawaban ditulis; hanya ditambah, tidak pernah diubah (lihat exam_layouts.py)
+    __tablename__ = 'exam_layouts' # Nama tabel di database
+    __table_args__ = (Index('ix_exam_layouts_exam_checksum', 'exam_id', 'checksum'),) # Pencarian tata letak yang sama saat mendaftar
+    id = Column(Integer, primary_key=True) # Disimpan di header blob jawaban v3
+    exam_id = Column(Integer, nullable=False) # Ujian pemilik (tanpa foreign key: jawaban arsip tetap bisa dibaca)
+    checksum = Column(Integer, nullable=False) # crc32 kolom layout
+    layout = Column(Text, nullable=False) # JSON [[question_id, [option_id, ...]], ...]
+    created_at = Column(DateTime, default=datetime.now) # Waktu tata letak pertama dipakai
+
+class ExamStats(Base): # Ringkasan hasil per ujian, diperbarui di transaksi yang sama dengan setiap pengiriman (lihat exam_stats.py)
+    __tablename__ = 'exam_stats' # Nama tabel di database
+    exam_id = Column(Integer, ForeignKey('exams.id'), primary_key=True) # Ujian yang diringkas
+    attempts = Column(Integer, nullable=False, default=0) # Jumlah pengiriman
+    score_sum = Column(Integer, nullable=False, default=0) # Jumlah skor (untuk rata-rata)
+    score_sq_sum = Column(Integer, nullable=False, default=0) # Jumlah kuadrat skor (untuk simpangan baku)
+    grade_a = Column(Integer, nullable=False, default=0) # Histogram nilai huruf dari get_grade
+    grade_b = Column(Integer, nullable=False, default=0)
+    grade_c = Column(Integer, nullable=False, default=0)
+    grade_d = Column(Integer, nullable=False, default=0)
+    grade_e = Column(Integer, nullable=False, default=0)
+    grade_na = Column(Integer, nullable=False, default=0) # Ujian tanpa pertanyaan
+    updated_at = Column(DateTime, default=datetime.now) # Waktu pengiriman terakhir yang dihitung
+
+class ExamLeader(Base): # Papan peringkat top-K per ujian: skor terbaik setiap siswa, paling banyak K baris per ujian
+    __tablename__ = 'exam_leaderboard' # Nama tabel di database
+    exam_id = Column(Integer, ForeignKey('exams.id'), primary_key=True) # Ujian
+    student_id = Column(Integer, ForeignKey('users.id'), primary_key=True) # Siswa di papan peringkat
+    score = Column(Integer, nullable=False) # Skor terbaik siswa
+    date_taken = Column(DateTime) # Waktu skor terbaik pertama kali dicapai (penentu urutan jika skor sama)
+
+class ExamBulkEdit(Base): # Ujian yang sedang diubah massal oleh transaksi aktif; trigger versi melewatinya (lihat question_import.bulk_content_edit)
+    __tablename__ = 'exam_bulk_edits' # Nama tabel di database; selalu kosong di luar transaksi impor
+    exam_id = Column(Integer, primary_key=True) # Ujian yang diimpor
+
+class ChangedQuestion(Base): # Pertanyaan yang opsinya berubah sejak penilaian ulang terakhir (diisi trigger, dikosongkan regrade.py)
+    __tablename__ = 'changed_questions' # Nama tabel di database
+    __table_args__ = (Index('ix_changed_questions_question', 'question_id'),) # Trigger menyimpan satu baris per pertanyaan
+    id = Column(Integer, primary_key=True) # Urutan perubahan; regrade.py hanya menghapus baris yang sudah diprosesnya
+    question_id = Column(Integer, nullable=False) # Pertanyaan yang berubah (satu baris per pertanyaan, lihat migrations.REGRADE_TRIGGERS)
+    exam_id = Column(Integer) # Ujian pemilik pertanyaan saat perubahan dicatat
+    exam_version = Column(Integer) # Versi ujian saat perubahan dicatat (PDF dari versi ini sampai versi terbaru dibuang)
+    changed_at = Column(DateTime, default=datetime.now) # Waktu perubahan
@@ -0,0 +1,255 @@
+# File: provision.py
+# Provisioning massal: impor roster CSV (hash password paralel + bulk insert dengan penanganan konflik username)
+# dan pembuat data sekolah sintetis skala jutaan baris untuk uji kapasitas.
+# Jalankan: python provision.py roster siswa.csv [--role student] [--on-conflict skip|update]
+#           python provision.py synthetic --students 20000 --teachers 50 --exams-per-teacher 4 --attempts 2
+import argparse # Untuk argumen CLI
+import csv # Untuk membaca roster
+import io # Untuk membaca berkas roster sebagai teks
+import os # Untuk jumlah CPU
+import time # Untuk mengukur laju
+from collections import namedtuple # Untuk hasil provisioning
+from concurrent.futures import ProcessPoolExecutor # Hashing password paralel
+from datetime import datetime, timedelta # Tanggal pengerjaan sintetis
+from sqlalchemy import func, insert, select # Query Core
+from database import engine # Engine bersama (juga menambahkan root repo ke sys.path)
+from common.password_hashing import SCRYPT_METHOD, hash_password # Fungsi dan metode hashing yang sama dengan aplikasi Versi2
+from models import User, Exam, Question, Option, Answer # Model Versi2
+from exam_stats import record_submissions # Statistik ujian ikut diperbarui
+from question_import import bulk_content_edit # Trigger versi ujian dilewati selama impor
+from exam_layouts import Layout, register_layout # Tata letak yang dirujuk blob jawaban
+import submission_codec # Format biner jawaban
+
+BATCH_SIZE = 5000 # Baris per transaksi
+HASH_CHUNK = 64 # Password per tugas process pool
+ROLES = ('student', 'teacher') # Role yang valid
+MAX_USERNAME = User.__table__.c.username.type.length # Panjang maksimum username (80)
+
+ProvisionResult = namedtuple('ProvisionResult', 'inserted updated skipped errors') # Ringkasan impor roster
+
+
+# --- Roster ---
+
+def read_roster(text, default_role='student'): # Baca CSV username,password[,role]; kembalikan (baris valid, kesalahan)
+    reader = csv.DictReader(io.StringIO(text))
+    fields = [name.strip().lower() for name in reader.fieldnames or []]
+    if 'username' not in fields or 'password' not in fields:
+        return [], [(1, 'Kolom wajib: username, password (role opsional).')]
+    reader.fieldnames = fields
+    rows, errors, seen = [], [], set()
+    for line, record in enumerate(reader, start=2): # Baris 1 adalah header
+        username = (record.get('username') or '').strip()
+        password = record.get('password') or ''
+        role = (record.get('role') or default_role).strip().lower()
+        if not username or len(username) > MAX_USERNAME:
+            errors.append((line, f'Username kosong atau lebih dari {MAX_USERNAME} karakter.'))
+        elif not password:
+            errors.append((line, f'Password untuk {username} kosong.'))
+        elif role not in ROLES:
+            errors.append((line, f'Role tidak dikenal: {role}.'))
+        elif username in seen:
+            errors.append((line, f'Username {username} muncul lebih dari sekali di roster.'))
+        else:
+            seen.add(username)
+            rows.append((username, password, role))
+    return rows, errors
+
+
+def hash_many(passwords, method): # Dijalankan di proses pekerja: satu tugas untuk banyak password
+    return [hash_password(password, method) for password in passwords]
+
+
+def hash_parallel(executor, passwords, method): # Bagi ke potongan kecil agar semua pekerja sibuk
+    chunks = [passwords[i:i + HASH_CHUNK] for i in range(0, len(passwords), HASH_CHUNK)]
+    return [pwhash for hashes in executor.map(hash_many, chunks, [method] * len(chunks)) for pwhash in hashes]
+
+
+def upsert_statement(connection, update_columns=()): # INSERT ... ON CONFLICT (username) sesuai dialek database
+    table = User.__table__
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        statement = dialect_insert(table)
+        if update_columns:
+            return statement.on_conflict_do_update(index_elements=['username'],
+                                                   set_={column: statement.excluded[column] for column in update_columns})
+        return statement.on_conflict_do_nothing(index_elements=['username'])
+    if dialect in ('mysql', 'mariadb'):
+        if update_columns:
+            from sqlalchemy.dialects.mysql import insert as dialect_insert
+            statement = dialect_insert(table)
+            return statement.on_duplicate_key_update({column: statement.inserted[column] for column in update_columns})
+        return insert(table).prefix_with('IGNORE')
+    raise NotImplementedError(f'Dialek {dialect} belum didukung untuk upsert username.')
+
+
+def provision_roster(engine, rows, on_conflict='skip', batch_size=BATCH_SIZE, workers=None, method=SCRYPT_METHOD, log=print):
+    inserted = updated = skipped = 0
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+        for offset in range(0, len(rows), batch_size):
+            batch = rows[offset:offset + batch_size]
+            with engine.connect() as connection: # Username yang sudah ada tidak perlu di-hash dalam mode skip
+                existing = set(connection.execute(select(User.username)
+                                                  .where(User.username.in_([row[0] for row in batch]))).scalars())
+            if on_conflict == 'skip':
+                skipped += len(existing)
+                batch = [row for row in batch if row[0] not in existing]
+            if batch:
+                hashes = hash_parallel(executor, [row[1] for row in batch], method)
+                values = [{'username': username, 'password': pwhash, 'role': role}
+                          for (username, _, role), pwhash in zip(batch, hashes)]
+                with engine.begin() as connection: # Satu transaksi per batch; konflik dari proses lain tetap aman
+                    statement = upsert_statement(connection, ('password', 'role') if on_conflict == 'update' else ())
+                    connection.execute(statement, values)
+                changed = sum(1 for username, _, _ in batch if username in existing)
+                updated += changed
+                inserted += len(batch) - changed
+            if log:
+                done = min(offset + batch_size, len(rows))
+                log(f'{done}/{len(rows)} baris diproses ({done / (time.perf_counter() - started):.0f} baris/detik).')
+    return inserted, updated, skipped
+
+
+# --- Data sintetis ---
+
+FIRST_NAMES = ('adi', 'ayu', 'bagus', 'budi', 'citra', 'dewi', 'dimas', 'eka', 'fajar', 'fitri', 'gilang', 'indah',
+               'intan', 'joko', 'kartika', 'lestari', 'maya', 'nanda', 'putra', 'putri', 'rani', 'rizki', 'sari',
+               'siti', 'teguh', 'tri', 'wahyu', 'wulan', 'yoga', 'yusuf') # Nama depan untuk username sintetis
+SUBJECTS = ('Matematika', 'Bahasa Indonesia', 'Bahasa Inggris', 'IPA', 'IPS', 'PPKn', 'Seni Budaya', 'Informatika') # Mata pelajaran
+EXAM_KINDS = ('Ulangan Harian', 'Penilaian Tengah Semester', 'Penilaian Akhir Semester', 'Kuis') # Jenis ujian
+
+
+def next_id(connection, column): # ID berikutnya; ID ditentukan sendiri agar insert massal tidak perlu RETURNING
+    return (connection.execute(select(func.max(column))).scalar() or 0) + 1
+
+
+def insert_chunks(connection, table, rows, batch_size): # executemany per potongan
+    for offset in range(0, len(rows), batch_size):
+        connection.execute(insert(table), rows[offset:offset + batch_size])
+
+
+def synthetic_school(engine, school='sekolah1', students=1000, teachers=10, exams_per_teacher=5, questions=20,
+                     options=4, attempts=1, days=120, password='password123', seed=1, batch_size=20000, log=print):
+    import numpy as np # Hanya dibutuhkan untuk data sintetis
+    rng = np.random.default_rng(seed)
+    started = time.perf_counter()
+    pwhash = hash_password(password, SCRYPT_METHOD) # Satu hash untuk semua akun sintetis
+    counts = {}
+
+    with engine.begin() as connection: # Pengguna
+        first_user = next_id(connection, User.id)
+        names = rng.choice(FIRST_NAMES, size=students + teachers)
+        users = [{'id': first_user + i, 'username': f'{school}_guru_{names[i]}_{i}', 'password': pwhash, 'role': 'teacher'}
+                 for i in range(teachers)]
+        users += [{'id': first_user + teachers + i, 'username': f'{school}_siswa_{names[teachers + i]}_{i}',
+                   'password': pwhash, 'role': 'student'} for i in range(students)]
+        insert_chunks(connection, User.__table__, users, batch_size)
+        counts['users'] = len(users)
+    student_ids = np.arange(first_user + teachers, first_user + teachers + students)
+    ability = rng.normal(0.0, 1.0, size=students) # Kemampuan siswa (model Rasch)
+    if log:
+        log(f'{len(users)} pengguna dibuat.')
+
+    counts.update(exams=0, questions=0, options=0, answers=0)
+    now = datetime.now()
+    for teacher_index in range(teachers):
+        for exam_index in range(exams_per_teacher):
+            with engine.begin() as connection: # Satu transaksi per ujian beserta seluruh jawabannya
+                exam_id = next_id(connection, Exam.id)
+                question_id = next_id(connection, Question.id)
+                option_id = next_id(connection, Option.id)
+                subject = SUBJECTS[(teacher_index + exam_index) % len(SUBJECTS)]
+                connection.execute(insert(Exam.__table__), [{
+                    'id': exam_id, 'author_id': first_user + teacher_index, 'version': 1,
+                    'title': f'{EXAM_KINDS[exam_index % len(EXAM_KINDS)]} {subject} {exam_index + 1}',
+                    'description': f'Data sintetis {school}: {questions} soal {subject}.'}])
+                with bulk_content_edit(connection, exam_id, bump=False): # Ujian baru: versi 1, tanpa kenaikan per baris oleh trigger
+                    question_ids = list(range(question_id, question_id + questions))
+                    correct_positions = rng.integers(0, options, size=questions)
+                    connection.execute(insert(Question.__table__), [
+                        {'id': qid, 'exam_id': exam_id, 'text': f'{subject}: soal nomor {n + 1}'} for n, qid in enumerate(question_ids)])
+                    option_rows, option_table = [], {}
+                    for n, qid in enumerate(question_ids):
+                        option_table[qid] = tuple(range(option_id + n * options, option_id + (n + 1) * options))
+                        option_rows += [{'id': oid, 'question_id': qid, 'text': f'Pilihan {chr(65 + k)}', 'is_correct': bool(k == correct_positions[n])}
+                                        for k, oid in enumerate(option_table[qid])]
+                    insert_chunks(connection, Option.__table__, option_rows, batch_size) # Ujian baru belum dikerjakan: trigger regrade tidak mencatatnya
+
+                # Jawaban: peluang benar = logistik(kemampuan - kesukaran); jawaban salah tersebar ke pengecoh
+                difficulty = rng.normal(0.0, 1.0, size=questions)
+                takers = rng.random(students) < 0.9 # Sebagian kecil siswa tidak mengerjakan
+                taker_ids = np.repeat(student_ids[takers], attempts)
+                taker_ability = np.repeat(ability[takers], attempts)
+                correct = rng.random((len(taker_ids), questions)) < 1.0 / (1.0 + np.exp(difficulty[None, :] - taker_ability[:, None]))
+                wrong = (correct_positions[None, :] + rng.integers(1, options, size=correct.shape)) % options
+                positions = np.where(correct, correct_positions[None, :], wrong)
+                omitted = rng.random(correct.shape) < 0.03
+                layout = register_layout(connection, exam_id, Layout(None, question_ids, option_table)) # Tata letak v3 di transaksi ujian ini
+                width = submission_codec.cell_width(layout)
+                cells = np.where(omitted, 0, positions + 1).astype(f'<u{width}') # Posisi opsi + 1 per soal (0 = tidak dijawab)
+                scores = (correct & ~omitted).sum(axis=1)
+                taken = rng.integers(0, days * 24 * 3600, size=len(taker_ids))
+                answer_id = next_id(connection, Answer.id)
+                answer_rows = [{'id': answer_id + i, 'exam_id': exam_id, 'student_id': int(taker_ids[i]), 'score': int(scores[i]),
+                                'date_taken': now - timedelta(seconds=int(taken[i])), 'submitted_answers': None,
+                                'submission': submission_codec.pack_cells(layout.id, cells[i].tobytes(), questions, width)}
+                               for i in range(len(taker_ids))]
+                insert_chunks(connection, Answer.__table__, answer_rows, batch_size)
+                record_submissions(connection, answer_rows, {exam_id: questions}) # Statistik dan papan peringkat di transaksi yang sama
+            counts['exams'] += 1
+            counts['questions'] += questions
+            counts['options'] += len(option_rows)
+            counts['answers'] += len(answer_rows)
+            if log:
+                log(f"Ujian {counts['exams']}/{teachers * exams_per_teacher}: {len(answer_rows)} jawaban "
+                    f"({counts['answers'] / (time.perf_counter() - started):.0f} jawaban/detik).")
+    return counts
+
+
+# --- CLI ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Provisioning pengguna massal dan data sekolah sintetis.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    roster = commands.add_parser('roster', help='Impor roster CSV (username,password[,role])')
+    roster.add_argument('path', help='Berkas CSV')
+    roster.add_argument('--role', default='student', choices=ROLES, help='Role bawaan jika kolom role kosong')
+    roster.add_argument('--on-conflict', default='skip', choices=('skip', 'update'), help='Username yang sudah ada: lewati atau perbarui password/role')
+    roster.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Baris per transaksi')
+    roster.add_argument('--workers', type=int, help='Jumlah proses hashing (bawaan: jumlah CPU)')
+    roster.add_argument('--method', default=os.environ.get('EXAM_PASSWORD_METHOD', SCRYPT_METHOD), help='Metode hashing password')
+
+    synthetic = commands.add_parser('synthetic', help='Buat data sekolah sintetis untuk uji kapasitas')
+    synthetic.add_argument('--school', default='sekolah1', help='Awalan username')
+    synthetic.add_argument('--students', type=int, default=1000)
+    synthetic.add_argument('--teachers', type=int, default=10)
+    synthetic.add_argument('--exams-per-teacher', type=int, default=5)
+    synthetic.add_argument('--questions', type=int, default=20)
+    synthetic.add_argument('--options', type=int, default=4)
+    synthetic.add_argument('--attempts', type=int, default=1, help='Jumlah pengerjaan per siswa per ujian')
+    synthetic.add_argument('--days', type=int, default=120, help='Rentang tanggal pengerjaan ke belakang')
+    synthetic.add_argument('--seed', type=int, default=1)
+    synthetic.add_argument('--batch-size', type=int, default=20000, help='Baris per executemany')
+
+    args = parser.parse_args(argv)
+    if args.command == 'roster':
+        with open(args.path, encoding='utf-8-sig') as handle:
+            rows, errors = read_roster(handle.read(), args.role)
+        for line, message in errors:
+            print(f'Baris {line}: {message}')
+        inserted, updated, skipped = provision_roster(engine, rows, args.on_conflict, args.batch_size, args.workers, args.method)
+        print(f'Selesai: {inserted} dibuat, {updated} diperbarui, {skipped} dilewati, {len(errors)} baris tidak valid.')
+        return 1 if errors else 0
+    counts = synthetic_school(engine, args.school, args.students, args.teachers, args.exams_per_teacher, args.questions,
+                              args.options, args.attempts, args.days, seed=args.seed, batch_size=args.batch_size)
+    print('Selesai: ' + ', '.join(f'{count} {name}' for name, count in counts.items()))
+    return 0
+
+
+if __name__ == '__main__': # Jalankan dari CLI
+    raise SystemExit(main())
@@ -0,0 +1,111 @@
+# File: question_import.py
+# Impor bank soal (JSON / CSV) ke sebuah ujian: validasi satu putaran lalu bulk insert dalam satu transaksi
+import csv # Untuk membaca berkas CSV
+import io # Untuk membungkus isi berkas sebagai teks
+import json # Untuk membaca berkas JSON
+from collections import namedtuple # Untuk hasil impor
+from contextlib import contextmanager # Untuk blok impor massal
+from sqlalchemy import delete, insert, update # Untuk bulk insert (executemany) dan penanda impor
+from models import Exam, ExamBulkEdit, Question, Option # Model yang dibutuhkan
+from question_search import refresh_exam_options # Indeks FTS5 opsi diisi sekali setelah impor
+
+MAX_OPTIONS = 10 # Batas jumlah opsi per pertanyaan
+
+ImportResult = namedtuple('ImportResult', 'imported errors') # Jumlah pertanyaan yang diimpor dan daftar kesalahan per baris
+
+
+class ImportFormatError(ValueError): # Berkas tidak bisa dibaca sama sekali
+    pass
+
+
+def parse_json(data): # Baca bank soal JSON: daftar pertanyaan atau {"questions": [...]}
+    try:
+        payload = json.loads(data)
+    except ValueError as e:
+        raise ImportFormatError(f'JSON tidak valid: {e}')
+    if isinstance(payload, dict):
+        payload = payload.get('questions')
+    if not isinstance(payload, list):
+        raise ImportFormatError('JSON harus berupa daftar pertanyaan.')
+    rows = [] # (teks, [(teks opsi, benar)])
+    for item in payload:
+        if not isinstance(item, dict):
+            rows.append((None, []))
+            continue
+        options = [(option.get('text'), bool(option.get('is_correct')))
+                   for option in item.get('options') or [] if isinstance(option, dict)]
+        rows.append((item.get('text'), options))
+    return rows
+
+
+def parse_csv(data): # Baca bank soal CSV: kolom question, option_1..option_N, correct (nomor opsi, pisahkan dengan ';')
+    reader = csv.DictReader(io.StringIO(data))
+    if not reader.fieldnames or 'question' not in reader.fieldnames:
+        raise ImportFormatError("CSV harus memiliki kolom 'question'.")
+    option_columns = sorted((name for name in reader.fieldnames if name.startswith('option_')),
+                            key=lambda name: int(name.split('_', 1)[1]) if name.split('_', 1)[1].isdigit() else 0)
+    rows = []
+    for record in reader:
+        texts = [(record.get(column) or '').strip() for column in option_columns]
+        texts = [text for text in texts if text] # Kolom opsi yang kosong diabaikan
+        correct = set()
+        for value in (record.get('correct') or '').split(';'):
+            value = value.strip()
+            if value:
+                correct.add(int(value) if value.isdigit() else -1) # -1 menandai nomor opsi yang tidak valid
+        if -1 in correct or any(index > len(texts) for index in correct):
+            rows.append((record.get('question'), None)) # Nomor opsi benar tidak valid
+        else:
+            rows.append((record.get('question'), [(text, index in correct) for index, text in enumerate(texts, start=1)]))
+    return rows
+
+
+def validate_rows(rows): # Validasi semua baris dalam satu putaran; kembalikan baris valid dan kesalahan per baris
+    valid = []
+    errors = []
+    for number, (text, options) in enumerate(rows, start=1):
+        if not text or not str(text).strip():
+            errors.append((number, 'Teks pertanyaan kosong.'))
+        elif options is None:
+            errors.append((number, 'Nomor opsi benar tidak valid.'))
+        elif len(options) < 2 or len(options) > MAX_OPTIONS:
+            errors.append((number, f'Jumlah opsi harus antara 2 dan {MAX_OPTIONS}.'))
+        elif any(not option_text or not str(option_text).strip() for option_text, _ in options):
+            errors.append((number, 'Teks opsi kosong.'))
+        elif not any(is_correct for _, is_correct in options):
+            errors.append((number, 'Tidak ada opsi yang ditandai benar.'))
+        else:
+            valid.append((str(text).strip(), [(str(option_text).strip(), is_correct) for option_text, is_correct in options]))
+    return valid, errors
+
+
+@contextmanager
+def bulk_content_edit(connection, exam_id, bump=True): # Trigger versi dan indeks opsi per baris dilewati; keduanya diperbarui sekali di akhir
+    table = ExamBulkEdit.__table__
+    connection.execute(insert(table).values(exam_id=exam_id)) # Hanya terlihat oleh transaksi ini
+    try:
+        yield
+    finally:
+        connection.execute(delete(table).where(table.c.exam_id == exam_id))
+    refresh_exam_options(connection, exam_id)
+    if bump: # Ujian baru (provision.py) tidak perlu versi baru
+        connection.execute(update(Exam.__table__).where(Exam.id == exam_id).values(version=Exam.version + 1))
+
+
+def import_questions(session, exam_id, filename, data): # Impor bank soal; tidak ada yang disimpan jika ada baris yang salah
+    if filename.lower().endswith('.csv'):
+        rows = parse_csv(data)
+    else:
+        rows = parse_json(data)
+    valid, errors = validate_rows(rows)
+    if errors or not valid:
+        return ImportResult(0, errors or [(0, 'Berkas tidak berisi pertanyaan.')])
+    with bulk_content_edit(session.connection(), exam_id): # Satu kenaikan versi untuk seluruh bank soal
+        question_ids = session.execute( # Satu executemany untuk semua pertanyaan, ID dikembalikan sesuai urutan baris
+            insert(Question).returning(Question.id, sort_by_parameter_order=True),
+            [{'exam_id': exam_id, 'text': text} for text, _ in valid]).scalars().all()
+        session.execute(insert(Option), [ # Satu executemany untuk semua opsi
+            {'question_id': question_id, 'text': option_text, 'is_correct': is_correct}
+            for question_id, (_, options) in zip(question_ids, valid)
+            for option_text, is_correct in options])
+    return ImportResult(len(valid), [])
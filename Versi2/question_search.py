@@ -0,0 +1,163 @@
+# File: question_search.py
+# Pencarian bank soal: indeks SQLite FTS5 atas teks pertanyaan dan teks opsi, dijaga sinkron oleh trigger.
+# Pencarian berperingkat (bm25) dan deteksi soal mirip; setiap dokumen diberi token pemilik agar filter guru ikut memakai indeks.
+# Bangun ulang: python question_search.py rebuild
+import argparse # Untuk argumen CLI
+import re # Untuk memecah kueri menjadi kata
+import time # Untuk mengukur lama pembangunan ulang
+from collections import namedtuple # Untuk hasil pencarian
+from difflib import SequenceMatcher # Kemiripan teks untuk deteksi duplikat
+from markupsafe import Markup, escape # Sorotan hasil aman untuk template
+from sqlalchemy import select, text # Query Core dan SQL FTS5
+from database import engine # Engine bersama (juga menambahkan root repo ke sys.path)
+from models import Exam, Question # Model Versi2
+
+SEARCH_TABLE = 'question_search' # Tabel virtual FTS5: rowid = questions.id
+HIGHLIGHT_START, HIGHLIGHT_END = '\x02', '\x03' # Penanda sorotan dari FTS5, diganti <mark> setelah teks di-escape
+MAX_TERMS = 16 # Kata paling banyak dalam satu kueri (kueri soal mirip memakai kata terpanjang)
+WEIGHTS = (2.0, 1.0, 0.0) # Bobot bm25: teks pertanyaan, teks opsi, token pemilik
+
+SearchHit = namedtuple('SearchHit', 'question_id exam_id exam_title text options rank') # Satu hasil pencarian
+Duplicate = namedtuple('Duplicate', 'hit similarity') # Soal mirip dan tingkat kemiripannya (0..1)
+
+OPTIONS_OF = "(SELECT coalesce(group_concat(text, ' '), '') FROM options WHERE question_id = {0})" # Teks semua opsi satu pertanyaan
+OWNER_OF = "(SELECT 'u' || coalesce(author_id, 0) FROM exams WHERE id = {0})" # Token pemilik: u<author_id>
+
+SEARCH_TRIGGERS = { # Indeks ikut berubah di transaksi yang sama dengan perubahan pertanyaan, opsi dan pemilik ujian
+    'questions_search_insert': f'AFTER INSERT ON questions BEGIN INSERT INTO {SEARCH_TABLE} (rowid, text, options, owner) '
+                               f'VALUES (NEW.id, NEW.text, {OPTIONS_OF.format("NEW.id")}, {OWNER_OF.format("NEW.exam_id")}); END',
+    'questions_search_update': f'AFTER UPDATE OF text, exam_id ON questions BEGIN UPDATE {SEARCH_TABLE} '
+                               f'SET text = NEW.text, owner = {OWNER_OF.format("NEW.exam_id")} WHERE rowid = NEW.id; END',
+    'questions_search_delete': f'AFTER DELETE ON questions BEGIN DELETE FROM {SEARCH_TABLE} WHERE rowid = OLD.id; END',
+    'options_search_insert': 'AFTER INSERT ON options WHEN (SELECT exam_id FROM questions WHERE id = NEW.question_id) NOT IN (SELECT exam_id FROM exam_bulk_edits) ' # Impor massal: refresh_exam_options sekali di akhir
+                             f'BEGIN UPDATE {SEARCH_TABLE} '
+                             f'SET options = {OPTIONS_OF.format("NEW.question_id")} WHERE rowid = NEW.question_id; END',
+    'options_search_update': f'AFTER UPDATE OF text, question_id ON options BEGIN '
+                             f'UPDATE {SEARCH_TABLE} SET options = {OPTIONS_OF.format("OLD.question_id")} WHERE rowid = OLD.question_id; '
+                             f'UPDATE {SEARCH_TABLE} SET options = {OPTIONS_OF.format("NEW.question_id")} WHERE rowid = NEW.question_id; END',
+    'options_search_delete': f'AFTER DELETE ON options BEGIN UPDATE {SEARCH_TABLE} '
+                             f'SET options = {OPTIONS_OF.format("OLD.question_id")} WHERE rowid = OLD.question_id; END',
+    'exams_search_owner': f'AFTER UPDATE OF author_id ON exams BEGIN UPDATE {SEARCH_TABLE} '
+                          f"SET owner = 'u' || coalesce(NEW.author_id, 0) WHERE rowid IN (SELECT id FROM questions WHERE exam_id = NEW.id); END",
+}
+
+
+def uses_fts(connection): # FTS5 hanya untuk SQLite; dialek lain memakai LIKE
+    return connection.dialect.name == 'sqlite'
+
+
+def create_search_index(connection): # Dipanggil dari migrasi: tabel FTS5, trigger dan isi awal
+    if not uses_fts(connection):
+        return
+    connection.execute(text(f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+                            "text, options, owner, tokenize = 'unicode61 remove_diacritics 2')"))
+    for name, body in SEARCH_TRIGGERS.items():
+        connection.execute(text(f'CREATE TRIGGER IF NOT EXISTS {name} {body}'))
+    rebuild_search_index(connection)
+
+
+def refresh_exam_options(connection, exam_id): # Teks opsi semua soal satu ujian dalam satu UPDATE (akhir question_import.bulk_content_edit)
+    if uses_fts(connection):
+        connection.execute(text(f'UPDATE {SEARCH_TABLE} SET options = {OPTIONS_OF.format(SEARCH_TABLE + ".rowid")} '
+                                'WHERE rowid IN (SELECT id FROM questions WHERE exam_id = :exam_id)'), {'exam_id': exam_id})
+
+
+def rebuild_search_index(connection): # Isi ulang seluruh indeks dari tabel questions dan options
+    connection.execute(text(f'DELETE FROM {SEARCH_TABLE}'))
+    connection.execute(text(f'INSERT INTO {SEARCH_TABLE} (rowid, text, options, owner) '
+                            "SELECT q.id, q.text, coalesce(o.options, ''), 'u' || coalesce(e.author_id, 0) FROM questions q "
+                            'LEFT JOIN exams e ON e.id = q.exam_id '
+                            "LEFT JOIN (SELECT question_id, group_concat(text, ' ') AS options FROM options GROUP BY question_id) o "
+                            'ON o.question_id = q.id'))
+    connection.execute(text(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')")) # Gabungkan segmen indeks
+    return connection.execute(text(f'SELECT count(*) FROM {SEARCH_TABLE}')).scalar()
+
+
+def query_terms(query): # Kata-kata kueri dalam huruf kecil, tanpa duplikat, urutan dipertahankan
+    return list(dict.fromkeys(word.lower() for word in re.findall(r'\w+', query or '')))
+
+
+def match_expression(terms, any_term=False, prefix=True): # Ekspresi MATCH yang aman: setiap kata dikutip, tidak ada sintaks dari pengguna
+    quoted = [f'"{term}"' for term in terms]
+    if prefix and quoted and not any_term: # Kata terakhir boleh belum selesai diketik
+        quoted[-1] += '*'
+    return '(' + (' OR ' if any_term else ' AND ').join(quoted) + ')'
+
+
+def highlight(value): # Teks dari FTS5 -> HTML dengan <mark>, isi lain di-escape
+    return Markup(str(escape(value or '')).replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>'))
+
+
+def fts_hits(connection, author_id, expression, limit): # Hasil berperingkat bm25; filter pemilik ikut dicocokkan di indeks
+    rows = connection.execute(text(
+        f"SELECT {SEARCH_TABLE}.rowid, q.exam_id, e.title, highlight({SEARCH_TABLE}, 0, :start, :end), highlight({SEARCH_TABLE}, 1, :start, :end), "
+        f"bm25({SEARCH_TABLE}, {', '.join(str(weight) for weight in WEIGHTS)}) AS score "
+        f"FROM {SEARCH_TABLE} JOIN questions q ON q.id = {SEARCH_TABLE}.rowid JOIN exams e ON e.id = q.exam_id "
+        f"WHERE {SEARCH_TABLE} MATCH :match ORDER BY score LIMIT :limit"),
+        {'match': f'{{text options}} : {expression} AND owner : "u{int(author_id)}"', 'limit': limit,
+         'start': HIGHLIGHT_START, 'end': HIGHLIGHT_END}).all()
+    return [SearchHit(question_id, exam_id, title, highlight(question_text), highlight(options), -score)
+            for question_id, exam_id, title, question_text, options, score in rows]
+
+
+def like_hits(connection, author_id, terms, limit): # Cadangan untuk dialek tanpa FTS5: semua kata harus muncul di teks pertanyaan
+    query = (select(Question.id, Question.exam_id, Exam.title, Question.text)
+             .join(Exam, Exam.id == Question.exam_id).where(Exam.author_id == author_id))
+    for term in terms:
+        query = query.where(Question.text.ilike(f'%{term}%'))
+    return [SearchHit(question_id, exam_id, title, escape(question_text), Markup(''), 0.0)
+            for question_id, exam_id, title, question_text in connection.execute(query.order_by(Question.id).limit(limit))]
+
+
+def search_questions(connection, author_id, query, limit=20): # Pencarian berperingkat di bank soal milik satu guru
+    terms = query_terms(query)[:MAX_TERMS]
+    if not terms:
+        return []
+    if not uses_fts(connection):
+        return like_hits(connection, author_id, terms, limit)
+    return fts_hits(connection, author_id, match_expression(terms), limit)
+
+
+def similarity(first, second): # Kemiripan dua teks pertanyaan (0..1), tanpa membedakan huruf besar dan tanda baca
+    return SequenceMatcher(None, normalize(first), normalize(second)).ratio()
+
+
+def normalize(value): # Huruf kecil, kata dipisah satu spasi
+    return ' '.join(re.findall(r'\w+', (value or '').lower()))
+
+
+def near_duplicates(connection, author_id, question_text, exclude_id=None, limit=10, threshold=0.75, candidates=50):
+    terms = sorted(query_terms(question_text), key=len, reverse=True)[:MAX_TERMS] # Kata terpanjang paling membedakan
+    if not terms:
+        return []
+    if uses_fts(connection): # Kandidat: soal yang memuat salah satu kata, diurutkan bm25
+        hits = fts_hits(connection, author_id, match_expression(terms, any_term=True, prefix=False), candidates)
+    else:
+        hits = like_hits(connection, author_id, terms[:1], candidates)
+    texts = dict(connection.execute(select(Question.id, Question.text).where(Question.id.in_([hit.question_id for hit in hits]))).all()) if hits else {}
+    duplicates = [Duplicate(hit, similarity(question_text, texts.get(hit.question_id, ''))) for hit in hits if hit.question_id != exclude_id]
+    duplicates = [duplicate for duplicate in duplicates if duplicate.similarity >= threshold]
+    duplicates.sort(key=lambda duplicate: duplicate.similarity, reverse=True)
+    return duplicates[:limit]
+
+
+# --- CLI ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Indeks pencarian bank soal (SQLite FTS5).')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('rebuild', help='Bangun ulang indeks dari tabel questions dan options')
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        if not uses_fts(connection):
+            print('Database ini bukan SQLite; pencarian memakai LIKE tanpa indeks FTS5.')
+            return 1
+        indexed = rebuild_search_index(connection)
+    print(f'Selesai: {indexed} pertanyaan diindeks dalam {time.perf_counter() - started:.1f} detik.')
+    return 0
+
+
+if __name__ == '__main__': # Jalankan dari CLI
+    raise SystemExit(main())
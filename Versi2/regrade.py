@@ -0,0 +1,196 @@
+# File: regrade.py
+# Penilaian ulang inkremental: hanya jawaban yang menjawab pertanyaan yang opsinya berubah (tabel changed_questions) yang dinilai ulang.
+# Skor baru ditulis per batch dalam transaksi terpisah; PDF hasil dan statistik hanya dibuang untuk jawaban/ujian yang terdampak.
+# Hanya blob yang menjawab soal yang berubah dibaca dari database (prefilter sel v3 / instr() v2); jawaban arsip (answer_archive.py) ikut dinilai ulang.
+# Jalankan: python regrade.py status
+#           python regrade.py run [--exam ID ...] [--batch-size N] [--artifacts DIR]
+import argparse # Untuk argumen CLI
+import os # Untuk lokasi artefak bawaan
+import time # Untuk mengukur laju
+from collections import namedtuple # Untuk ringkasan penilaian ulang
+from functools import partial # Untuk mengikat engine ke penulis skor
+from sqlalchemy import and_, bindparam, delete, func, insert, or_, select, update # Query Core
+from sqlalchemy.orm import Session # Sesi singkat untuk memuat isi ujian
+from database import engine # Engine bersama (juga menambahkan root repo ke sys.path)
+from common.exam_content import load_exam_content # Kunci jawaban terbaru per ujian
+from models import Answer, ChangedQuestion, Exam, Question, Option, decode_submission # Model Versi2
+from exam_stats import LEADERBOARD_SIZE, rebuild_stats # Statistik ujian yang terdampak dihitung ulang
+from answer_archive import AnswerArchive # Jawaban arsip tetap dihitung di statistik
+from result_documents import ArtifactStore, artifact_key # PDF hasil dengan skor lama dibuang
+from exam_layouts import LayoutStore # Tata letak blob v3
+from submission_codec import FORMAT_VERSION, HEADER, PAIRS_VERSION, POSITIONS_VERSION, SubmissionFormatError, cell_width, pair_width # Prefilter blob; jawaban yang tidak terbaca tidak dinilai ulang
+
+BATCH_SIZE = 1000 # Jawaban yang diperiksa per transaksi
+PREFILTER_LIMIT = 200 # Soal berubah maksimum untuk prefilter instr() di SQL
+
+RegradeResult = namedtuple('RegradeResult', 'exam_id examined affected changed unreadable') # Ringkasan per ujian
+
+
+def mark_questions_changed(connection, exam_id, question_ids): # Untuk dialek tanpa trigger (lihat migrations.REGRADE_TRIGGERS)
+    version = connection.execute(select(Exam.version).where(Exam.id == exam_id)).scalar()
+    rows = [{'question_id': question_id, 'exam_id': exam_id, 'exam_version': version} for question_id in question_ids]
+    if rows:
+        connection.execute(insert(ChangedQuestion.__table__), rows)
+
+
+def pending_changes(connection, exam_ids=None): # {exam_id: (set(question_id), versi ujian pertama)} dan ID perubahan terakhir
+    table = ChangedQuestion.__table__
+    query = select(table.c.id, table.c.exam_id, table.c.question_id, table.c.exam_version).where(table.c.exam_id.isnot(None))
+    if exam_ids is not None:
+        query = query.where(table.c.exam_id.in_(exam_ids))
+    changes, last_id = {}, 0
+    for change_id, exam_id, question_id, exam_version in connection.execute(query):
+        question_ids, first_version = changes.get(exam_id, (set(), exam_version))
+        question_ids.add(question_id)
+        changes[exam_id] = (question_ids, min(first_version or 1, exam_version or 1))
+        last_id = max(last_id, change_id)
+    return changes, last_id
+
+
+def candidate_filter(table, question_ids, exam_layouts=()): # Prefilter SQL: blob v3 yang sel soal berubahnya terisi, blob v2 yang memuat byte ID soal; v1 dan JSON lama selalu diperiksa
+    cells = [(layout, layout.question_ids.index(question_id)) for layout in exam_layouts
+             for question_id in sorted(question_ids) if question_id in layout.options] # (tata letak, posisi soal) yang perlu diperiksa
+    if len(question_ids) + len(cells) > PREFILTER_LIMIT: # Terlalu banyak pola: baca semua jawaban ujian
+        return None
+    submission = table.c.submission
+    version = func.substr(submission, 1, 1)
+    terms = [submission.is_(None), version == bytes([POSITIONS_VERSION])]
+    terms += [and_(version == bytes([PAIRS_VERSION]), # Pola 4 byte juga cocok dengan ID lebar 8 byte (little-endian)
+                   func.instr(submission, question_id.to_bytes(pair_width(question_id), 'little')) > 0) for question_id in sorted(question_ids)]
+    for layout, position in cells: # Header v3: byte 5-8 = ID tata letak; sel soal di posisi tetap
+        width = cell_width(layout)
+        terms.append(and_(version == bytes([FORMAT_VERSION]), func.substr(submission, 5, 4) == layout.id.to_bytes(4, 'little'),
+                          func.substr(submission, HEADER.size + position * width + 1, width) != bytes(width)))
+    return or_(*terms)
+
+
+def live_batches(engine, exam_id, candidates, batch_size): # Baris (id, skor, submission, submitted_answers) tabel answers per batch
+    table = Answer.__table__
+    after_id = 0
+    while True:
+        query = (select(table.c.id, table.c.score, table.c.submission, table.c.submitted_answers)
+                 .where(table.c.exam_id == exam_id, table.c.id > after_id))
+        if candidates is not None:
+            query = query.where(candidates)
+        with engine.connect() as connection: # Keyset per batch: tidak ada cursor panjang yang menahan penulis lain
+            rows = connection.execute(query.order_by(table.c.id).limit(batch_size)).all()
+        if not rows:
+            return
+        after_id = rows[-1].id
+        yield rows
+
+
+def archive_batches(archive, exam_id): # Baris arsip dengan bentuk yang sama, satu segmen per batch
+    for rows in archive.exam_answers(exam_id):
+        yield [(row.id, row.score, row.submission, row.submitted_answers) for row in rows]
+
+
+def write_scores(engine, updates): # Satu transaksi per batch; baris yang skornya berubah di tengah jalan dilewati
+    table = Answer.__table__
+    with engine.begin() as connection:
+        connection.execute(update(table)
+                           .where(table.c.id == bindparam('answer_id'), table.c.score == bindparam('old_score'))
+                           .values(score=bindparam('new_score')), updates)
+
+
+def rescore(answer_key, changed, rows, layouts=None): # -> (perubahan skor, jumlah terdampak, jumlah tidak terbaca)
+    updates, affected, unreadable = [], 0, 0
+    for answer_id, score, submission, submitted_answers in rows:
+        try:
+            selections = decode_submission(answer_key, submission, submitted_answers, layouts, keep_missing=True) # Opsi yang sudah dihapus tetap terbaca (dinilai salah)
+        except (SubmissionFormatError, ValueError, IndexError):
+            unreadable += 1
+            continue
+        if changed.isdisjoint(selections): # Tidak menjawab pertanyaan yang berubah (atau lolos prefilter secara kebetulan): skor tetap sama
+            continue
+        affected += 1
+        new_score = answer_key.score(selections)
+        if new_score != score:
+            updates.append({'answer_id': answer_id, 'old_score': score, 'new_score': new_score})
+    return updates, affected, unreadable
+
+
+def regrade_exam(engine, exam_id, question_ids, first_version=None, store=None, batch_size=BATCH_SIZE, log=print, archive=None,
+                 leaderboard_size=LEADERBOARD_SIZE, layouts=None): # Nilai ulang satu ujian batch demi batch
+    layouts = layouts or LayoutStore(engine)
+    with Session(engine) as session:
+        content = load_exam_content(session, Exam, Question, Option, exam_id)
+    if content is None: # Ujian sudah dihapus
+        return RegradeResult(exam_id, 0, 0, 0, 0)
+    answer_key = content.answer_key
+    changed = set(question_ids) & set(answer_key.question_ids) # Pertanyaan yang sudah dihapus tidak dinilai
+    if not changed:
+        return RegradeResult(exam_id, 0, 0, 0, 0)
+    versions = range(max((first_version or content.version) - 1, 1), content.version + 1) # PDF dari sebelum perubahan sampai versi terbaru
+    candidates = candidate_filter(Answer.__table__, changed, layouts.for_exam(exam_id))
+    sources = [(live_batches(engine, exam_id, candidates, batch_size), partial(write_scores, engine))]
+    if archive is not None and archive.available(): # Skor arsip ikut dinilai ulang (indeks arsip, segmen tidak ditulis ulang)
+        sources.append((archive_batches(archive, exam_id), archive.update_scores))
+    examined = affected = rescored = unreadable = 0
+    started = time.perf_counter()
+    for batches, write in sources:
+        for rows in batches:
+            updates, hit, bad = rescore(answer_key, changed, rows, layouts)
+            examined += len(rows)
+            affected += hit
+            unreadable += bad
+            if updates:
+                write(updates)
+                rescored += len(updates)
+                if store is not None: # PDF dengan skor lama, termasuk yang sempat dibuat sebelum penilaian ulang ini berjalan
+                    for row in updates:
+                        for version in versions:
+                            store.delete(artifact_key(row['answer_id'], version, row['old_score']))
+            if log:
+                log(f'Ujian {exam_id}: {examined} jawaban kandidat diperiksa, {affected} menjawab soal yang berubah, '
+                    f'{rescored} skor diperbarui ({examined / max(time.perf_counter() - started, 1e-9):.0f} jawaban/detik).')
+    if rescored:
+        with engine.begin() as connection: # Histogram nilai dan papan peringkat tidak bisa dikurangi secara inkremental
+            rebuild_stats(connection, [exam_id], leaderboard_size, archive=archive) # K yang sama dengan aplikasi
+    return RegradeResult(exam_id, examined, affected, rescored, unreadable)
+
+
+def regrade(engine, exam_ids=None, store=None, batch_size=BATCH_SIZE, log=print, archive=None, leaderboard_size=LEADERBOARD_SIZE): # Proses semua perubahan yang tercatat
+    with engine.connect() as connection:
+        changes, last_id = pending_changes(connection, exam_ids)
+    results = []
+    table = ChangedQuestion.__table__
+    layouts = LayoutStore(engine) # Cache tata letak dipakai bersama oleh semua ujian
+    for exam_id in sorted(changes):
+        question_ids, first_version = changes[exam_id]
+        results.append(regrade_exam(engine, exam_id, question_ids, first_version, store, batch_size, log, archive, leaderboard_size, layouts))
+        with engine.begin() as connection: # Perubahan yang dicatat selama ujian ini dinilai ulang tetap tersimpan untuk putaran berikutnya
+            connection.execute(delete(table).where(table.c.exam_id == exam_id, table.c.id <= last_id))
+    return results
+
+
+# --- CLI ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Penilaian ulang jawaban setelah kunci jawaban berubah.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('status', help='Tampilkan pertanyaan yang menunggu penilaian ulang')
+    run = commands.add_parser('run', help='Nilai ulang jawaban yang terdampak')
+    run.add_argument('--exam', type=int, action='append', help='Hanya ujian ini (bisa diulang); bawaan: semua ujian')
+    run.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Jawaban per transaksi')
+    run.add_argument('--size', type=int, default=LEADERBOARD_SIZE, help='Jumlah siswa di papan peringkat (bawaan: EXAM_LEADERBOARD_SIZE)')
+    run.add_argument('--artifacts', default=os.environ.get('RESULT_ARTIFACT_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'artifacts', 'results')),
+                     help='Direktori artefak PDF hasil ujian (sama dengan RESULT_ARTIFACT_DIR aplikasi)')
+    args = parser.parse_args(argv)
+
+    if args.command == 'status':
+        with engine.connect() as connection:
+            changes, _ = pending_changes(connection)
+        for exam_id, (question_ids, first_version) in sorted(changes.items()):
+            print(f"Ujian {exam_id} (sejak versi {first_version}): pertanyaan {', '.join(str(question_id) for question_id in sorted(question_ids))}")
+        if not changes:
+            print('Tidak ada perubahan yang menunggu penilaian ulang.')
+        return 0
+    results = regrade(engine, args.exam, ArtifactStore(args.artifacts), args.batch_size, archive=AnswerArchive(), leaderboard_size=args.size)
+    print(f'Selesai: {len(results)} ujian, {sum(result.affected for result in results)} jawaban terdampak, '
+          f'{sum(result.changed for result in results)} skor diperbarui, {sum(result.unreadable for result in results)} tidak dapat dibaca.')
+    return 0
+
+
+if __name__ == '__main__': # Jalankan dari CLI
+    raise SystemExit(main())
@@ -0,0 +1,192 @@
+# File: result_documents.py
+# Subsistem dokumen hasil ujian: PDF dirender di process pool dan disimpan sebagai artefak berbasis konten
+# Status pekerjaan (pending/failed) disimpan sebagai file penanda di penyimpanan artefak agar sama di semua proses pekerja
+import hashlib # Untuk kunci artefak berbasis konten
+import multiprocessing # Untuk memilih cara membuat proses pekerja
+import os # Untuk operasi file
+import tempfile # Untuk menulis artefak secara atomik
+import threading # Untuk mengunci pembuatan process pool
+import time # Untuk umur penanda pekerjaan
+from concurrent.futures import ProcessPoolExecutor # Render PDF di luar thread permintaan
+
+DOCUMENT_FORMAT = 2 # Naikkan jika tata letak PDF berubah agar artefak lama tidak dipakai lagi (2: urutan varian siswa, nomor soal sesuai halaman ujian)
+PENDING_TIMEOUT = 300 # Detik; penanda pending yang lebih tua dianggap ditinggalkan (proses pekerja berhenti saat merender)
+
+_pdf_class = None # Kelas PDF dibuat saat PDF pertama dirender (fpdf tidak dimuat saat aplikasi start)
+
+
+def result_pdf_class(): # Kelas PDF hasil ujian (didefinisikan sekali per proses, bukan di setiap permintaan)
+    global _pdf_class
+    if _pdf_class is None:
+        from fpdf import FPDF # Untuk membuat PDF
+
+        class ResultPDF(FPDF):
+            def header(self): # Header PDF
+                self.set_font('Arial', 'B', 12) # Set font
+                self.cell(0, 10, 'Formulir Hasil Ujian', 0, 1, 'C') # Judul
+                self.ln(5) # Spasi
+
+            def footer(self): # Footer PDF
+                self.set_y(-15) # Posisi dari bawah
+                self.set_font('Arial', 'I', 8) # Set font
+                self.cell(0, 10, f'Halaman {self.page_no()}', 0, 0, 'C') # Nomor halaman
+
+        _pdf_class = ResultPDF
+    return _pdf_class
+
+
+def build_result_document(exam, answer_score, selections, username, grade): # Susun data PDF sebagai struktur sederhana yang bisa di-pickle; exam boleh ExamVariant
+    questions = [] # Daftar (id, teks, opsi) untuk PDF
+    for question in exam.questions: # Untuk setiap pertanyaan dalam ujian
+        user_choice_id = selections.get(question.id) # Jawaban pengguna untuk pertanyaan ini
+        questions.append((question.id, question.text,
+                          [(option.text, option.is_correct, option.id == user_choice_id) for option in question.options]))
+    return {
+        'exam_title': exam.title, # Judul ujian
+        'username': username, # Nama siswa
+        'score': answer_score, # Skor siswa
+        'total': len(exam.questions), # Total pertanyaan
+        'grade': grade, # Nilai huruf
+        'questions': questions, # Pertanyaan dan opsi
+    }
+
+
+def render_result_pdf(document): # Render PDF (dijalankan di proses pekerja)
+    pdf = result_pdf_class()() # Inisialisasi PDF
+    pdf.add_page() # Tambah halaman
+    pdf.set_font('Arial', 'B', 16) # Set font besar
+    pdf.cell(0, 10, f"Hasil Ujian: {document['exam_title']}", 0, 1) # Judul ujian
+    pdf.set_font('Arial', '', 12) # Set font normal
+    pdf.cell(0, 10, f"Nama Siswa: {document['username']}", 0, 1) # Nama siswa
+    pdf.cell(0, 10, f"Skor: {document['score']}/{document['total']}", 0, 1) # Skor
+    pdf.ln(10) # Spasi
+
+    pdf.cell(0, 10, f"Grade: {document['grade']}", 0, 1) # Tampilkan grade
+    pdf.ln(5) # Spasi
+
+    for number, (question_id, question_text, options) in enumerate(document['questions'], 1): # Untuk setiap pertanyaan dalam urutan yang dilihat siswa
+        pdf.set_font('Arial', 'B', 12) # Set font tebal
+        pdf.multi_cell(0, 10, f'Soal {number}: {question_text}') # Teks pertanyaan, bernomor sama seperti di halaman ujian
+
+        pdf.set_font('Arial', '', 10) # Set font normal
+        for option_text, is_correct, is_selected in options: # Untuk setiap opsi dalam pertanyaan
+            status = ' ' # Status default
+            if is_correct: # Jika opsi ini adalah jawaban yang benar
+                status = 'V' # Tandai dengan V
+            if is_selected: # Jika ini adalah jawaban yang dipilih pengguna
+                status = 'X' # Tandai dengan X
+            pdf.multi_cell(0, 5, f'[{status}] {option_text}') # Tampilkan opsi dengan status
+        pdf.ln(5) # Spasi antara pertanyaan
+    return pdf.output(dest='S').encode('latin1') # Kembalikan isi PDF sebagai bytes
+
+
+def artifact_key(answer_id, exam_version, score): # Kunci artefak: ID jawaban + versi ujian + skor + format dokumen
+    return hashlib.sha256(f'{answer_id}:{exam_version}:{score}:{DOCUMENT_FORMAT}'.encode('ascii')).hexdigest() # Skor hasil regrade.py -> kunci baru
+
+
+class ArtifactStore(object): # Penyimpanan artefak PDF di disk, dialamatkan dengan kunci konten
+    def __init__(self, root):
+        self.root = root # Direktori akar artefak
+
+    def path(self, key, suffix='pdf'): # Lokasi file untuk sebuah kunci (dibagi per dua karakter awal); suffix pending/failed untuk penanda
+        return os.path.join(self.root, key[:2], f'{key}.{suffix}')
+
+    def exists(self, key): # Apakah artefak sudah tersedia
+        return os.path.exists(self.path(key))
+
+    def write(self, key, data, suffix='pdf'): # Tulis artefak secara atomik agar tidak pernah terbaca setengah jadi
+        path = self.path(key, suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(data)
+        os.replace(tmp_path, path)
+
+    def delete(self, key): # Hapus artefak dan penandanya (misalnya setelah penilaian ulang)
+        for suffix in ('pdf', 'pending', 'failed'):
+            self.clear(key, suffix)
+
+    def claim(self, key, timeout=PENDING_TIMEOUT): # Tandai dokumen sedang dirender; False jika proses lain sudah mengklaimnya
+        path = self.path(key, 'pending')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)) # Atomik: hanya satu proses yang berhasil membuat penanda
+            return True
+        except FileExistsError:
+            age = self.marker_age(key, 'pending')
+            if age is None or age < timeout: # Sedang dirender (atau baru selesai) di proses lain
+                return False
+            os.utime(path) # Penanda yang ditinggalkan diambil alih
+            return True
+
+    def mark_failed(self, key, message): # Catat kegagalan render untuk endpoint status
+        self.write(key, message.encode('utf-8'), 'failed')
+
+    def marker_age(self, key, suffix): # Umur penanda dalam detik; None jika tidak ada
+        try:
+            return time.time() - os.path.getmtime(self.path(key, suffix))
+        except FileNotFoundError:
+            return None
+
+    def clear(self, key, suffix): # Hapus satu file artefak/penanda jika ada
+        try:
+            os.remove(self.path(key, suffix))
+        except FileNotFoundError:
+            pass
+
+
+class ResultDocumentService(object): # Mengatur antrean render PDF dan status pekerjaan
+    def __init__(self, store, max_workers=2, pending_timeout=PENDING_TIMEOUT):
+        self.store = store # Penyimpanan artefak (juga penanda status, dibagi oleh semua proses pekerja)
+        self.max_workers = max_workers # Jumlah proses pekerja
+        self.pending_timeout = pending_timeout # Batas umur penanda pending
+        self._executor = None # Pool proses, dibuat oleh start() sebelum thread latar belakang berjalan
+        self._executor_pid = None # Proses pemilik pool (pool tidak ikut terbawa fork)
+        self._lock = threading.Lock()
+
+    def start(self): # Buat pool dan fork semua pekerja sekarang, sebelum aplikasi menjalankan thread latar belakang
+        self._get_executor().submit(int).result() # Dengan fork, submit pertama langsung membuat semua pekerja
+        return self
+
+    def status(self, key): # Status dokumen: ready, pending, failed atau missing
+        if self.store.exists(key):
+            return 'ready'
+        age = self.store.marker_age(key, 'pending')
+        if age is not None and age < self.pending_timeout:
+            return 'pending'
+        if self.store.marker_age(key, 'failed') is not None:
+            return 'failed'
+        return 'missing'
+
+    def submit(self, key, document): # Kirim dokumen ke process pool jika belum ada dan belum berjalan di proses mana pun
+        if self.store.exists(key) or not self.store.claim(key, self.pending_timeout):
+            return
+        self.store.clear(key, 'failed') # Coba lagi setelah gagal
+        try:
+            future = self._get_executor().submit(render_result_pdf, document)
+        except Exception:
+            self.store.clear(key, 'pending')
+            raise
+        future.add_done_callback(lambda done: self._finish(key, done))
+
+    def _finish(self, key, future): # Simpan hasil render ke penyimpanan artefak
+        try:
+            self.store.write(key, future.result())
+        except Exception as e: # Catat kegagalan agar bisa dilaporkan lewat endpoint status
+            self.store.mark_failed(key, str(e))
+        finally:
+            self.store.clear(key, 'pending')
+
+    def shutdown(self): # Hentikan process pool
+        if self._executor is not None and self._executor_pid == os.getpid():
+            self._executor.shutdown(wait=True)
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor_pid != os.getpid(): # Belum dibuat, atau pool milik proses induk sebelum fork
+            with self._lock:
+                if self._executor_pid != os.getpid():
+                    context = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None # spawn/forkserver akan mengimpor ulang modul aplikasi di setiap pekerja
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+                    self._executor_pid = os.getpid()
+        return self._executor
@@ -0,0 +1,73 @@
+# File: results_export.py
+# Ekspor hasil ujian satu kelas (CSV / JSON Lines) secara streaming dengan cursor sisi server
+import csv # Untuk menulis baris CSV
+import io # Buffer teks untuk writer CSV
+import json # Untuk baris JSON Lines
+from sqlalchemy import select # Untuk query Core tanpa membuat objek ORM
+from models import Answer, User # Model yang dibutuhkan
+
+EXPORT_COLUMNS = ['answer_id', 'student_id', 'username', 'score', 'total', 'grade', 'date_taken'] # Kolom ekspor
+EXPORT_FORMATS = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'} # Format yang didukung dan tipe kontennya
+BATCH_SIZE = 1000 # Jumlah baris yang diambil per batch dari cursor
+
+
+def iter_result_rows(engine, exam_id, total_questions, get_grade, batch_size=BATCH_SIZE, archive=None): # Baca jawaban per batch tanpa memuat semuanya ke memori
+    for answer_id, student_id, username, score, date_taken in iter_answers(engine, exam_id, batch_size, archive):
+        yield {
+            'answer_id': answer_id, # ID jawaban
+            'student_id': student_id, # ID siswa
+            'username': username, # Nama siswa
+            'score': score, # Skor
+            'total': total_questions, # Total pertanyaan
+            'grade': get_grade(score or 0, total_questions), # Nilai huruf per baris
+            'date_taken': date_taken.isoformat() if date_taken else None, # Tanggal pengerjaan
+        }
+
+
+def iter_answers(engine, exam_id, batch_size, archive=None): # (id, student_id, username, skor, tanggal): arsip lebih dulu (ID lebih kecil), lalu tabel answers
+    if archive is not None:
+        for partition in archive.exam_partitions(exam_id, batch_size): # Nama siswa diambil per partisi dari database utama
+            with engine.connect() as connection:
+                names = dict(connection.execute(select(User.id, User.username)
+                                                .where(User.id.in_({row.student_id for row in partition}))).all())
+            for answer_id, student_id, score, date_taken in partition:
+                yield answer_id, student_id, names.get(student_id), score, date_taken
+    statement = (select(Answer.id, Answer.student_id, User.username, Answer.score, Answer.date_taken)
+                 .outerjoin(User, User.id == Answer.student_id)
+                 .where(Answer.exam_id == exam_id)
+                 .order_by(Answer.id))
+    with engine.connect() as connection: # Koneksi sendiri, terpisah dari sesi permintaan
+        result = connection.execution_options(stream_results=True, yield_per=batch_size).execute(statement)
+        for partition in result.partitions(): # Setiap partisi berisi paling banyak batch_size baris
+            yield from partition
+
+
+def stream_csv(rows): # Ubah baris menjadi potongan teks CSV
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= 64 * 1024: # Kirim potongan ~64 KB agar jumlah write tetap kecil
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def stream_jsonl(rows): # Ubah baris menjadi potongan teks JSON Lines
+    chunk = []
+    for row in rows:
+        chunk.append(json.dumps(row))
+        if len(chunk) >= BATCH_SIZE:
+            yield '\n'.join(chunk) + '\n'
+            chunk = []
+    if chunk:
+        yield '\n'.join(chunk) + '\n'
+
+
+def stream_results(engine, exam_id, total_questions, get_grade, export_format, archive=None): # Generator isi berkas ekspor
+    rows = iter_result_rows(engine, exam_id, total_questions, get_grade, archive=archive)
+    if export_format == 'jsonl':
+        return stream_jsonl(rows)
+    return stream_csv(rows)
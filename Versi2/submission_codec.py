@@ -0,0 +1,111 @@
+# File: submission_codec.py
+# Format biner ringkas untuk jawaban siswa: header berversi + satu sel posisi opsi per soal, dalam urutan tata letak ujian yang tersimpan.
+# Versi 3 menunjuk baris exam_layouts (urutan soal dan ID opsi saat jawaban ditulis) yang tidak pernah diubah, sehingga posisi tetap
+# bermakna setelah opsi diubah, dihapus atau dibuat ulang. Versi 1 (posisi terhadap isi ujian saat ini) dan versi 2 (pasangan ID soal, ID opsi;
+# masih dipakai draf) tetap bisa dibaca; convert_submissions.py mengubah jawaban lama ke versi 3
+import struct # Untuk header biner
+import zlib # crc32 untuk sidik isi blob
+
+FORMAT_VERSION = 3 # Naikkan jika tata letak berubah
+POSITIONS_VERSION = 1 # Versi lama: satu sel posisi opsi per soal, rusak jika opsi diubah urutannya atau dihapus
+PAIRS_VERSION = 2 # Pasangan (ID soal, ID opsi): tanpa tabel tata letak, dipakai draf autosave
+HEADER = struct.Struct('<BBHI') # versi format, lebar sel (byte), jumlah sel/pasangan, v1: crc32 urutan ID soal, v2: crc32 isi pasangan, v3: ID tata letak
+CELL_TYPES = {1: 'B', 2: 'H'} # v1/v3: lebar sel -> kode struct; sel berisi posisi opsi + 1 (0 = tidak dijawab)
+PAIR_TYPES = {4: 'I', 8: 'Q'} # v2: lebar satu ID -> kode struct
+
+
+class SubmissionFormatError(ValueError): # Blob tidak bisa dibaca dengan kunci jawaban yang diberikan
+    pass
+
+
+def layout_checksum(question_ids): # Sidik urutan soal (v1) agar blob tidak dibaca dengan tata letak yang salah
+    return zlib.crc32(struct.pack(f'<{len(question_ids)}q', *question_ids)) if question_ids else 0
+
+
+def pair_width(largest_id): # 4 byte cukup untuk ID < 2^32
+    return 4 if largest_id < 2 ** 32 else 8
+
+
+def cell_width(layout): # 1 byte cukup untuk soal dengan < 255 opsi
+    return 1 if max((len(options) for options in layout.options.values()), default=0) < 255 else 2
+
+
+def pack_cells(layout_id, payload, count, width): # Sel yang sudah dikemas -> blob lengkap (dipakai juga oleh provision.py)
+    return HEADER.pack(FORMAT_VERSION, width, count, layout_id) + payload
+
+
+def encode(layout, selections): # {question_id: option_id} -> bytes v3; layout = exam_layouts.Layout yang sudah terdaftar
+    cells = []
+    for question_id in layout.question_ids:
+        options = layout.options[question_id]
+        option_id = selections.get(question_id)
+        cells.append(options.index(option_id) + 1 if option_id in options else 0) # Opsi yang tidak ada di tata letak = tidak dijawab
+    width = cell_width(layout)
+    return pack_cells(layout.id, struct.pack(f'<{len(cells)}{CELL_TYPES[width]}', *cells), len(cells), width)
+
+
+def pack_pairs(payload, count, width): # Isi pasangan yang sudah dikemas -> blob v2 lengkap
+    return HEADER.pack(PAIRS_VERSION, width, count, zlib.crc32(payload)) + payload
+
+
+def encode_pairs(answer_key, selections): # {question_id: option_id} -> bytes v2; hanya opsi yang masih milik soalnya (draf)
+    values = []
+    for question_id in answer_key.question_ids:
+        option_id = selections.get(question_id)
+        if option_id is not None and option_id in answer_key.options[question_id]:
+            values += (question_id, option_id)
+    width = pair_width(max(values, default=0))
+    return pack_pairs(struct.pack(f'<{len(values)}{PAIR_TYPES[width]}', *values), len(values) // 2, width)
+
+
+def read_header(blob): # (versi, lebar sel, jumlah sel/pasangan, crc32) dengan validasi dasar
+    if blob is None or len(blob) < HEADER.size:
+        raise SubmissionFormatError('Blob jawaban terlalu pendek.')
+    version, width, count, checksum = HEADER.unpack_from(blob)
+    if not (((version == POSITIONS_VERSION or version == FORMAT_VERSION) and width in CELL_TYPES) or (version == PAIRS_VERSION and width in PAIR_TYPES)):
+        raise SubmissionFormatError(f'Format jawaban tidak dikenal: versi {version}, lebar {width}.')
+    cells = count * 2 if version == PAIRS_VERSION else count
+    if len(blob) != HEADER.size + width * cells:
+        raise SubmissionFormatError('Panjang blob jawaban tidak sesuai header.')
+    return version, width, count, checksum
+
+
+def check_layout(answer_key, count, checksum): # v1: soal baru hanya ditambahkan di akhir, jadi awalan urutan harus sama
+    if count > len(answer_key.question_ids) or layout_checksum(answer_key.question_ids[:count]) != checksum:
+        raise SubmissionFormatError('Urutan soal ujian sudah berubah sejak jawaban ini disimpan.')
+
+
+def decode(answer_key, blob, layouts=None, keep_missing=False): # bytes -> {question_id: option_id}; pilihan yang soal/opsinya sudah dihapus dianggap tidak dijawab
+    version, width, count, checksum = read_header(blob) # keep_missing=True: pilihan itu tetap dikembalikan (regrade.py menilainya salah)
+    options = answer_key.options
+    if version == FORMAT_VERSION:
+        layout = layouts.get(checksum) if layouts is not None else None # Header v3 menyimpan ID tata letak
+        if layout is None or len(layout.question_ids) != count:
+            raise SubmissionFormatError(f'Tata letak jawaban {checksum} tidak dikenal.')
+        cells = struct.unpack_from(f'<{count}{CELL_TYPES[width]}', blob, HEADER.size)
+        selections = {}
+        for question_id, cell in zip(layout.question_ids, cells):
+            choices = layout.options[question_id]
+            if 0 < cell <= len(choices) and (keep_missing or choices[cell - 1] in options.get(question_id, ())):
+                selections[question_id] = choices[cell - 1]
+        return selections
+    if version == POSITIONS_VERSION:
+        check_layout(answer_key, count, checksum)
+        cells = struct.unpack_from(f'<{count}{CELL_TYPES[width]}', blob, HEADER.size)
+        return {question_id: options[question_id][cell - 1]
+                for question_id, cell in zip(answer_key.question_ids, cells) if 0 < cell <= len(options[question_id])}
+    if zlib.crc32(memoryview(blob)[HEADER.size:]) != checksum:
+        raise SubmissionFormatError('Isi blob jawaban rusak.')
+    values = struct.unpack_from(f'<{count * 2}{PAIR_TYPES[width]}', blob, HEADER.size)
+    selections = {}
+    for question_id, option_id in zip(values[::2], values[1::2]):
+        if keep_missing or option_id in options.get(question_id, ()):
+            selections[question_id] = option_id
+    return selections
+
+
+def decode_lenient(answer_key, blob, layouts=None): # Untuk tampilan (PDF hasil, draf): blob yang tidak terbaca = tidak dijawab
+    try:
+        return decode(answer_key, blob, layouts)
+    except (SubmissionFormatError, IndexError, struct.error):
+        return {}
@@ -0,0 +1,75 @@
+# File: test_regrade.py
+# Uji regresi penilaian ulang: opsi soal dihapus lalu dibuat ulang (alur Versi1/ubahdata.py) dengan kunci jawaban yang berbeda.
+# Jalankan: python -m unittest test_regrade (dari folder Versi2)
+import os # Untuk database sementara
+import shutil # Untuk menghapus folder sementara
+import tempfile # Folder database sementara
+import unittest # Kerangka uji bawaan
+
+TEMP_DIR = tempfile.mkdtemp(prefix='regrade-test-') # Diisi sebelum database.py dan answer_archive.py diimpor
+os.environ['EXAM_DB_URL'] = 'sqlite:///' + os.path.join(TEMP_DIR, 'exam_management.db')
+os.environ['EXAM_ARCHIVE_URL'] = 'sqlite:///' + os.path.join(TEMP_DIR, 'exam_archive.db')
+
+from datetime import datetime # Waktu pengiriman jawaban
+from sqlalchemy import delete, insert, select # Query Core
+from sqlalchemy.orm import Session # Sesi untuk membuat data uji
+from database import engine # Engine database sementara (juga menambahkan root repo ke sys.path)
+from common.exam_content import load_exam_content # Kunci jawaban seperti di aplikasi
+from common.migrations import run_migrations # Skema lengkap beserta trigger regrade
+from migrations import MIGRATIONS # Daftar migrasi Versi2
+from models import Answer, Exam, Option, Question, User # Model Versi2
+from exam_layouts import LayoutStore # Tata letak blob jawaban v3
+from exam_stats import load_stats, record_submissions # Statistik ujian
+from regrade import regrade # Yang diuji
+
+
+def tearDownModule():
+    engine.dispose()
+    shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+
+class RecreatedOptionsTest(unittest.TestCase):
+    def setUp(self):
+        run_migrations(engine, MIGRATIONS)
+        with Session(engine) as session:
+            student = User(username='murid1', password='-', role='student')
+            exam = Exam(title='Ujian regrade', author=User(username='guru1', password='-', role='teacher'))
+            for number in range(2): # Opsi pertama setiap soal adalah jawaban benar
+                exam.questions.append(Question(text=f'Soal {number}', options=[
+                    Option(text=f'Opsi {number}{index}', is_correct=index == 0) for index in range(4)]))
+            session.add_all([student, exam])
+            session.commit()
+            self.exam_id, self.student_id = exam.id, student.id
+            self.question_ids = [question.id for question in exam.questions]
+
+        with Session(engine) as session:
+            answer_key = load_exam_content(session, Exam, Question, Option, self.exam_id).answer_key
+        layout = LayoutStore(engine).register(self.exam_id, answer_key)
+        selections = {question_id: answer_key.options[question_id][0] for question_id in answer_key.question_ids} # Semua benar: 2/2
+        row = dict(student_id=self.student_id, exam_id=self.exam_id, score=answer_key.score(selections),
+                   submission=Answer.encode_selections(layout, selections), date_taken=datetime.now())
+        with engine.begin() as connection: # Seperti take_exam: jawaban dan statistik di transaksi yang sama
+            self.answer_id = connection.execute(insert(Answer.__table__).values(row)).inserted_primary_key[0]
+            record_submissions(connection, [row], {self.exam_id: len(answer_key)})
+        self.assertEqual(row['score'], 2)
+
+    def test_recreated_options_are_rescored(self):
+        options = Option.__table__
+        with engine.begin() as connection: # Hapus semua opsi soal pertama lalu buat ulang; kunci jawaban pindah ke opsi kedua
+            connection.execute(delete(options).where(options.c.question_id == self.question_ids[0]))
+            connection.execute(insert(options), [dict(question_id=self.question_ids[0], text=f'Opsi baru {index}', is_correct=index == 1)
+                                                 for index in range(4)])
+
+        results = regrade(engine, log=None)
+
+        self.assertEqual([(result.exam_id, result.affected, result.changed) for result in results], [(self.exam_id, 1, 1)])
+        with engine.connect() as connection:
+            score = connection.execute(select(Answer.score).where(Answer.id == self.answer_id)).scalar()
+            summary = load_stats(connection, self.exam_id)
+        self.assertEqual(score, 1) # Opsi yang dipilih sudah dihapus: dinilai salah
+        self.assertEqual((summary.attempts, summary.mean), (1, 1.0)) # Statistik dibangun ulang
+        self.assertEqual([(leader.student_id, leader.score) for leader in summary.leaderboard], [(self.student_id, 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
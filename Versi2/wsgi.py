@@ -0,0 +1,13 @@
+# File: wsgi.py
+# Titik masuk server WSGI untuk startup cepat: aplikasi, model, formulir dan template dimuat sekali sebelum fork
+# Jalankan: gunicorn --preload -w 4 wsgi:app
+import os # Untuk pengaturan environment
+
+os.environ.setdefault('EXAM_DEFER_SERVICES', '1') # Thread latar belakang tidak bertahan setelah fork; dijalankan per pekerja
+
+from app import app, engine # Aplikasi Flask dan engine bersama
+from common.startup import warm_up # Pemanasan sebelum fork
+from forms import LoginForm, RegisterForm, ExamForm, QuestionForm, ImportQuestionsForm # Formulir yang dipakai aplikasi
+
+warm_up(app, (LoginForm, RegisterForm, ExamForm, QuestionForm, ImportQuestionsForm)) # Template, mapper dan formulir siap dibagi copy-on-write
+engine.dispose() # Koneksi milik proses induk tidak boleh dipakai bersama oleh pekerja
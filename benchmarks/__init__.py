@@ -0,0 +1 @@
+# Skrip benchmark untuk aplikasi ujian (jalankan dari root repo: python -m benchmarks.<nama>)
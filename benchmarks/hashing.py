@@ -0,0 +1,63 @@
+# File: benchmarks/hashing.py
+# Benchmark login per detik terhadap ukuran process pool hashing password.
+# Contoh: python -m benchmarks.hashing --pools 1 2 4 8 --logins 200
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common.password_hashing import PasswordHasher, DEFAULT_METHOD, HashingBusy
+
+
+def run(pool_size, logins, concurrency, method): # Jalankan sejumlah verifikasi password secara bersamaan
+    hasher = PasswordHasher(method=method, workers=pool_size, max_pending=max(concurrency, 1))
+    pwhash = hasher.hash('password123') # Juga memanaskan process pool
+    rejected = 0
+
+    def login(_):
+        try:
+            return hasher.verify(pwhash, 'password123')
+        except HashingBusy:
+            return None
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as threads: # Thread permintaan yang bersamaan
+        results = list(threads.map(login, range(logins)))
+    elapsed = time.perf_counter() - started
+    rejected = results.count(None)
+    metrics = hasher.metrics()
+    hasher.shutdown()
+    return {
+        'pool_size': pool_size,
+        'logins': logins,
+        'concurrency': concurrency,
+        'seconds': round(elapsed, 3),
+        'logins_per_second': round((logins - rejected) / elapsed, 2),
+        'rejected': rejected,
+        'avg_ms': round(metrics['verify']['avg_ms'], 2),
+        'max_ms': round(metrics['verify']['max_ms'], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark login per detik terhadap ukuran pool hashing.')
+    parser.add_argument('--pools', type=int, nargs='+', default=[0, 1, 2, 4], help='Ukuran pool (0 = di thread permintaan)')
+    parser.add_argument('--logins', type=int, default=100, help='Jumlah login per percobaan')
+    parser.add_argument('--concurrency', type=int, default=16, help='Jumlah thread permintaan bersamaan')
+    parser.add_argument('--method', default=DEFAULT_METHOD, help='Metode hashing, misalnya pbkdf2:sha256:600000')
+    parser.add_argument('--output', help='Simpan hasil sebagai JSON')
+    args = parser.parse_args()
+
+    results = []
+    for pool_size in args.pools:
+        result = run(pool_size, args.logins, args.concurrency, args.method)
+        results.append(result)
+        print(f"pool={result['pool_size']:>2}  {result['logins_per_second']:>8.2f} login/detik  "
+              f"rata-rata {result['avg_ms']:.1f} ms  maks {result['max_ms']:.1f} ms  ditolak {result['rejected']}")
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(results, handle, indent=2)
+
+
+if __name__ == '__main__':
+    main()
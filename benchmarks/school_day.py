@@ -0,0 +1,306 @@
+# File: benchmarks/school_day.py
+# Skenario satu hari sekolah terhadap Versi1 atau Versi2: login, dashboard, ambil ujian, kirim jawaban, unduh PDF.
+# Melaporkan latensi p50/p95/p99, throughput dan jumlah query SQL per endpoint; hasil disimpan sebagai JSON.
+# Contoh: python -m benchmarks.school_day --app Versi2 --students 200 --exams 5 --concurrency 16 --output hasil.json
+#         python -m benchmarks.school_day --app Versi2 --mode server --compare hasil.json
+import argparse
+import http.cookiejar
+import json
+import logging
+import math
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..')) # Root repo
+PASSWORD = 'password123' # Password semua akun benchmark
+QUESTION_FIELD = re.compile(r'name="question_(\d+)" value="(\d+)"') # Opsi jawaban di halaman ujian
+
+
+# --- Penyiapan aplikasi dan data ---
+
+def load_app(name, workdir): # Impor app.py milik Versi1/Versi2 dengan database dan artefak di direktori sementara
+    os.environ.setdefault('EXAM_DB_URL', 'sqlite:///' + os.path.join(workdir, 'benchmark.db'))
+    os.environ.setdefault('RESULT_ARTIFACT_DIR', os.path.join(workdir, 'artifacts'))
+    os.environ.setdefault('EXAM_SUBMISSION_JOURNAL_DIR', os.path.join(workdir, 'journal'))
+    app_dir = os.path.join(ROOT, name)
+    sys.path.insert(0, app_dir)
+    sys.path.insert(0, ROOT)
+    os.chdir(app_dir)
+    import app as module # Migrasi berjalan saat impor
+    flask_app = module.app
+    flask_app.config['WTF_CSRF_ENABLED'] = False # Benchmark mengukur aplikasi, bukan token formulir
+    if not os.path.isdir(os.path.join(flask_app.root_path, 'templates')): # Template bersama ada di root repo
+        flask_app.template_folder = os.path.join(ROOT, 'templates')
+        flask_app.static_folder = os.path.join(ROOT, 'static')
+    return module
+
+
+def seed(module, students, exams, questions, options=4): # Isi database langsung lewat model aplikasi
+    session = module.db_session
+    User, Exam, Question, Option = module.User, module.Exam, module.Question, module.Option
+    password = module.password_hasher.hash(PASSWORD) if hasattr(module, 'password_hasher') else None # Satu hash untuk semua akun
+    if password is None:
+        from werkzeug.security import generate_password_hash
+        password = generate_password_hash(PASSWORD, method='pbkdf2:sha256')
+    teacher = User(username='bench_guru', password=password, role='teacher')
+    session.add(teacher)
+    session.flush()
+    session.add_all([User(username=f'bench_siswa_{i}', password=password, role='student') for i in range(students)])
+    exam_ids = []
+    for e in range(exams):
+        exam = Exam(title=f'Ujian Benchmark {e + 1}', description='Dibuat oleh benchmarks/school_day.py')
+        if hasattr(Exam, 'author_id'): # Versi2 menyimpan pemilik ujian
+            exam.author_id = teacher.id
+        session.add(exam)
+        session.flush()
+        exam_ids.append(exam.id)
+        for q in range(questions):
+            question = Question(exam_id=exam.id, text=f'Soal {q + 1} ujian {e + 1}')
+            session.add(question)
+            session.flush()
+            session.add_all([Option(question_id=question.id, text=f'Opsi {o + 1}', is_correct=(o == q % options))
+                             for o in range(options)])
+    session.commit()
+    session.remove()
+    return [f'bench_siswa_{i}' for i in range(students)], exam_ids
+
+
+# --- Klien ---
+
+def _query_count(headers): # Jumlah query SQL yang dilaporkan aplikasi untuk permintaan ini
+    value = headers.get('X-Benchmark-Queries')
+    return int(value) if value is not None else None
+
+
+class TestClientSession(object): # Satu siswa lewat Flask test client (tanpa jaringan)
+    def __init__(self, flask_app):
+        self.client = flask_app.test_client()
+
+    def request(self, method, path, data=None):
+        response = self.client.open(path, method=method, data=data)
+        return response.status_code, response.get_data(), _query_count(response.headers)
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler): # Redirect dicatat sebagai respons, tidak diikuti
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpSession(object): # Satu siswa lewat server WSGI lokal (urllib + cookie)
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect())
+
+    def request(self, method, path, data=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        try:
+            with self.opener.open(urllib.request.Request(self.base_url + path, data=body, method=method)) as response:
+                return response.status, response.read(), _query_count(response.headers)
+        except urllib.error.HTTPError as error: # 3xx/4xx/5xx tetap dicatat
+            return error.code, error.read(), _query_count(error.headers)
+
+
+def start_server(flask_app): # Server WSGI lokal berulir di port bebas
+    from werkzeug.serving import make_server
+    logging.getLogger('werkzeug').setLevel(logging.WARNING) # Jangan cetak log akses untuk setiap permintaan
+    server = make_server('127.0.0.1', 0, flask_app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+# --- Pengukuran ---
+
+class Recorder(object): # Latensi dan jumlah query SQL per endpoint
+    def __init__(self, flask_app, engine):
+        self.samples = defaultdict(list) # endpoint -> [(ms, query, status)]
+        self._lock = threading.Lock()
+        self._local = threading.local() # Penghitung query milik thread yang melayani permintaan
+        from sqlalchemy import event
+        event.listen(engine, 'before_cursor_execute', self._count)
+        flask_app.before_request(self._start_count)
+        flask_app.after_request(self._report_count)
+
+    def _count(self, *args): # Hanya query di dalam permintaan yang dihitung (bukan thread latar belakang)
+        if getattr(self._local, 'queries', None) is not None:
+            self._local.queries += 1
+
+    def _start_count(self):
+        self._local.queries = 0
+
+    def _report_count(self, response): # Jumlah query dikirim lewat header agar terbaca juga di mode server
+        response.headers['X-Benchmark-Queries'] = str(self._local.queries)
+        self._local.queries = None
+        return response
+
+    def timed(self, session, endpoint, method, path, data=None):
+        started = time.perf_counter()
+        status, body, queries = session.request(method, path, data)
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        with self._lock:
+            self.samples[endpoint].append((elapsed_ms, queries, status))
+        return status, body
+
+
+def percentile(values, fraction): # Nearest-rank
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(recorder, elapsed):
+    report = {}
+    for endpoint, samples in sorted(recorder.samples.items()):
+        latencies = [sample[0] for sample in samples]
+        queries = [sample[1] for sample in samples if sample[1] is not None]
+        statuses = defaultdict(int)
+        for sample in samples:
+            statuses[str(sample[2])] += 1
+        report[endpoint] = {
+            'requests': len(samples),
+            'throughput_rps': round(len(samples) / elapsed, 2) if elapsed else None,
+            'p50_ms': round(percentile(latencies, 0.50), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+            'p99_ms': round(percentile(latencies, 0.99), 2),
+            'mean_ms': round(sum(latencies) / len(latencies), 2),
+            'sql_queries_mean': round(sum(queries) / len(queries), 2) if queries else None,
+            'sql_queries_max': max(queries) if queries else None,
+            'statuses': dict(statuses),
+        }
+    return report
+
+
+# --- Skenario ---
+
+def school_day(session, recorder, username, exam_ids, has_pdf, pdf_wait, rng): # Satu siswa: login sampai unduh PDF
+    timed = lambda endpoint, method, path, data=None: recorder.timed(session, endpoint, method, path, data)
+    status, _ = timed('POST /login', 'POST', '/login', {'username': username, 'password': PASSWORD, 'submit': 'Login'})
+    if status != 302:
+        return False
+    timed('GET /dashboard', 'GET', '/dashboard')
+    for exam_id in rng.sample(exam_ids, min(len(exam_ids), 2)): # Setiap siswa mengerjakan dua ujian
+        status, body = timed('GET /take_exam/<id>', 'GET', f'/take_exam/{exam_id}')
+        answers = {}
+        for question_id, option_id in QUESTION_FIELD.findall(body.decode('utf-8', 'replace')):
+            answers.setdefault(f'question_{question_id}', [])
+            answers[f'question_{question_id}'].append(option_id)
+        form = {field: rng.choice(options) for field, options in answers.items()}
+        timed('POST /take_exam/<id>', 'POST', f'/take_exam/{exam_id}', form)
+        timed('GET /dashboard', 'GET', '/dashboard')
+        if has_pdf:
+            status, _ = timed('GET /download_results/<id>', 'GET', f'/download_results/{exam_id}')
+            deadline = time.monotonic() + pdf_wait
+            while status == 202 and time.monotonic() < deadline: # PDF dibuat di latar belakang: pantau status
+                time.sleep(0.05)
+                _, body = timed('GET /download_results/<id>/status', 'GET', f'/download_results/{exam_id}/status')
+                if json.loads(body).get('status') in ('ready', 'failed'):
+                    status, _ = timed('GET /download_results/<id>', 'GET', f'/download_results/{exam_id}')
+    timed('GET /logout', 'GET', '/logout')
+    return True
+
+
+def git_commit(): # Commit yang diukur, untuk membandingkan antar commit
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline_path): # Cetak perubahan p95 dan throughput terhadap hasil sebelumnya
+    with open(baseline_path) as handle:
+        baseline = json.load(handle)
+    print(f"\nDibandingkan dengan {baseline_path} (commit {baseline.get('commit')}):")
+    for endpoint, stats in current['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(endpoint)
+        if not before:
+            print(f'  {endpoint:<36} (baru)')
+            continue
+        p95_change = (stats['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0.0
+        print(f"  {endpoint:<36} p95 {before['p95_ms']:>8.1f} -> {stats['p95_ms']:>8.1f} ms ({p95_change:+.0f}%)  "
+              f"throughput {before['throughput_rps']} -> {stats['throughput_rps']} permintaan/detik")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark skenario satu hari sekolah.')
+    parser.add_argument('--app', choices=['Versi1', 'Versi2'], default='Versi2', help='Aplikasi yang diuji')
+    parser.add_argument('--mode', choices=['client', 'server'], default='client', help='Flask test client atau server WSGI lokal')
+    parser.add_argument('--students', type=int, default=100, help='Jumlah siswa')
+    parser.add_argument('--exams', type=int, default=5, help='Jumlah ujian')
+    parser.add_argument('--questions', type=int, default=20, help='Jumlah soal per ujian')
+    parser.add_argument('--concurrency', type=int, default=8, help='Jumlah siswa yang berjalan bersamaan')
+    parser.add_argument('--pdf-wait', type=float, default=10.0, help='Batas waktu menunggu PDF siap (detik)')
+    parser.add_argument('--seed', type=int, default=1, help='Seed acak untuk pilihan jawaban')
+    parser.add_argument('--workdir', help='Direktori database dan artefak (bawaan: direktori sementara)')
+    parser.add_argument('--output', help='Simpan hasil sebagai JSON')
+    parser.add_argument('--compare', help='Bandingkan dengan berkas JSON hasil sebelumnya')
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='school_day_')
+    os.environ.setdefault('EXAM_HASH_WORKERS', '2') # Hashing password tetap di process pool, tapi kecil
+    module = load_app(args.app, workdir)
+    usernames, exam_ids = seed(module, args.students, args.exams, args.questions)
+    flask_app = module.app
+    has_pdf = 'download_results' in flask_app.view_functions
+    recorder = Recorder(flask_app, module.engine)
+
+    server = None
+    if args.mode == 'server':
+        server, base_url = start_server(flask_app)
+        make_session = lambda: HttpSession(base_url)
+    else:
+        make_session = lambda: TestClientSession(flask_app)
+
+    def run_student(index):
+        rng = random.Random(args.seed + index)
+        return school_day(make_session(), recorder, usernames[index], exam_ids, has_pdf, args.pdf_wait, rng)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        completed = sum(1 for ok in pool.map(run_student, range(len(usernames))) if ok)
+    elapsed = time.perf_counter() - started
+    if server is not None:
+        server.shutdown()
+
+    total_requests = sum(len(samples) for samples in recorder.samples.values())
+    result = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'parameters': vars(args),
+        'students_completed': completed,
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round(total_requests / elapsed, 2) if elapsed else None,
+        'endpoints': summarize(recorder, elapsed),
+    }
+
+    print(f"Database dan artefak: {workdir}")
+    print(f"{args.app} ({args.mode}): {completed}/{len(usernames)} siswa, {total_requests} permintaan "
+          f"dalam {elapsed:.2f} detik ({result['throughput_rps']} permintaan/detik)")
+    print(f"  {'endpoint':<36} {'n':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'sql':>6}")
+    for endpoint, stats in result['endpoints'].items():
+        sql = '-' if stats['sql_queries_mean'] is None else f"{stats['sql_queries_mean']:.1f}"
+        print(f"  {endpoint:<36} {stats['requests']:>6} {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} "
+              f"{stats['p99_ms']:>8.1f} {sql:>6}")
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(result, handle, indent=2)
+    if args.compare:
+        compare(result, args.compare)
+
+
+if __name__ == '__main__':
+    main()
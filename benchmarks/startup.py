@@ -0,0 +1,117 @@
+# File: benchmarks/startup.py
+# Benchmark cold start pekerja: waktu impor aplikasi, permintaan pertama dan modul berat yang ikut dimuat.
+# Setiap percobaan adalah proses Python baru; cache bytecode Jinja dikosongkan sebelum putaran "dingin".
+# Contoh: python -m benchmarks.startup --app Versi2 --runs 5 --output startup.json
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+from benchmarks.school_day import ROOT, git_commit
+
+HEAVY_MODULES = ('fpdf', 'numpy', 'sqlalchemy', 'flask_wtf', 'jinja2') # Modul yang dilaporkan sudah dimuat atau belum
+
+CHILD = r'''
+import json, os, sys, time
+started = time.perf_counter()
+sys.path.insert(0, os.getcwd())
+sys.path.insert(0, os.environ['BENCH_ROOT'])
+module = __import__(os.environ['BENCH_MODULE'])
+imported = time.perf_counter()
+client = module.app.test_client()
+first_started = time.perf_counter()
+status = client.get('/login').status_code
+first = time.perf_counter() - first_started
+second_started = time.perf_counter()
+client.get('/login')
+second = time.perf_counter() - second_started
+print(json.dumps({'import_s': imported - started, 'first_request_s': first, 'second_request_s': second, 'status': status,
+                  'loaded': {name: name in sys.modules for name in json.loads(os.environ['BENCH_HEAVY'])}}))
+os._exit(0) # Jangan menunggu thread latar belakang
+'''
+
+
+def run_once(app, module, workdir, template_cache, importtime=False): # Satu proses baru; kembalikan hasil pengukuran
+    env = dict(os.environ,
+               BENCH_ROOT=ROOT, BENCH_MODULE=module, BENCH_HEAVY=json.dumps(HEAVY_MODULES),
+               EXAM_DB_URL='sqlite:///' + os.path.join(workdir, 'startup.db'),
+               RESULT_ARTIFACT_DIR=os.path.join(workdir, 'artifacts'),
+               EXAM_SUBMISSION_JOURNAL_DIR=os.path.join(workdir, 'journal'),
+               EXAM_TEMPLATE_CACHE_DIR=template_cache)
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', CHILD]
+    completed = subprocess.run(command, cwd=os.path.join(ROOT, app), env=env, capture_output=True, text=True, check=True)
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    if importtime:
+        result['slowest_imports'] = slowest_imports(completed.stderr)
+    return result
+
+
+def slowest_imports(report, limit=10): # Modul tingkat atas dengan waktu impor kumulatif terbesar dari -X importtime
+    rows = []
+    for line in report.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        if name.startswith('  '): # Modul yang diimpor oleh modul lain (berindentasi)
+            continue
+        rows.append((int(cumulative_us), name.strip()))
+    return [{'module': name, 'cumulative_ms': round(us / 1000.0, 1)} for us, name in sorted(rows, reverse=True)[:limit]]
+
+
+def summarize(results):
+    return {key: round(statistics.median(result[key] for result in results) * 1000.0, 1)
+            for key in ('import_s', 'first_request_s', 'second_request_s')}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark cold start aplikasi (impor + permintaan pertama).')
+    parser.add_argument('--app', choices=['Versi1', 'Versi2'], default='Versi2', help='Aplikasi yang diuji')
+    parser.add_argument('--module', default='app', help='Modul yang diimpor, misalnya app atau wsgi')
+    parser.add_argument('--runs', type=int, default=5, help='Jumlah proses per putaran')
+    parser.add_argument('--workdir', help='Direktori database dan cache (bawaan: direktori sementara)')
+    parser.add_argument('--output', help='Simpan hasil sebagai JSON')
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='startup_')
+    template_cache = os.path.join(workdir, 'template_cache')
+    run_once(args.app, args.module, workdir, '') # Buat database dan jalankan migrasi agar tidak ikut diukur
+
+    rounds = {}
+    shutil.rmtree(template_cache, ignore_errors=True)
+    rounds['tanpa_cache_template'] = [run_once(args.app, args.module, workdir, '') for _ in range(args.runs)]
+    rounds['cache_template_dingin'] = []
+    for _ in range(args.runs): # Cache dikosongkan setiap kali: biaya kompilasi + menulis cache
+        shutil.rmtree(template_cache, ignore_errors=True)
+        rounds['cache_template_dingin'].append(run_once(args.app, args.module, workdir, template_cache))
+    rounds['cache_template_hangat'] = [run_once(args.app, args.module, workdir, template_cache) for _ in range(args.runs)]
+    profile = run_once(args.app, args.module, workdir, template_cache, importtime=True)
+
+    result = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'parameters': vars(args),
+        'rounds': {name: summarize(results) for name, results in rounds.items()},
+        'loaded_after_first_request': profile['loaded'],
+        'slowest_imports': profile['slowest_imports'],
+    }
+
+    print(f"{args.app} ({args.module}), median dari {args.runs} proses:")
+    print(f"  {'putaran':<24} {'impor':>9} {'permintaan 1':>13} {'permintaan 2':>13}")
+    for name, stats in result['rounds'].items():
+        print(f"  {name:<24} {stats['import_s']:>7.1f}ms {stats['first_request_s']:>11.1f}ms {stats['second_request_s']:>11.1f}ms")
+    print('  Modul berat yang sudah dimuat: ' + ', '.join(name for name, loaded in profile['loaded'].items() if loaded))
+    print('  Impor terlama: ' + ', '.join(f"{row['module']} {row['cumulative_ms']}ms" for row in profile['slowest_imports'][:5]))
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(result, handle, indent=2)
+
+
+if __name__ == '__main__':
+    main()
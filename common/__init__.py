@@ -0,0 +1 @@
+# Paket bersama untuk Versi1 dan Versi2 (mesin penilaian, cache, dan utilitas database)
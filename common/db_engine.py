@@ -0,0 +1,145 @@
+# File: common/db_engine.py
+# Pabrik engine database bersama: WAL, busy timeout, pragma dan ukuran pool diatur dari environment
+import os # Untuk membaca pengaturan dari environment
+from collections import namedtuple # Untuk objek pengaturan yang tidak bisa diubah
+from sqlalchemy import create_engine, event # Untuk membuat engine dan memasang pragma saat koneksi dibuka
+from sqlalchemy.engine import make_url # Untuk mengganti driver pada URL engine async
+from sqlalchemy.pool import QueuePool, StaticPool # Jenis pool koneksi
+
+ENV_PREFIX = 'EXAM_DB_' # Awalan variabel environment, misalnya EXAM_DB_BUSY_TIMEOUT_MS=10000
+
+EngineSettings = namedtuple('EngineSettings', [
+    'url', # URL database
+    'journal_mode', # Mode jurnal SQLite (WAL agar pembaca tidak memblokir penulis)
+    'synchronous', # Tingkat sinkronisasi: OFF, NORMAL, FULL, EXTRA
+    'busy_timeout_ms', # Lama menunggu kunci tulis sebelum gagal "database is locked"
+    'mmap_size', # Ukuran memory-mapped I/O dalam byte (0 = nonaktif)
+    'cache_size', # Ukuran cache halaman (negatif = dalam KiB)
+    'pool_size', # Jumlah koneksi tetap dalam pool
+    'max_overflow', # Koneksi tambahan saat pool penuh
+    'pool_timeout', # Detik menunggu koneksi bebas dari pool
+])
+
+DEFAULTS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout_ms': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64000,
+    'pool_size': 5,
+    'max_overflow': 10,
+    'pool_timeout': 30,
+}
+
+JOURNAL_MODES = ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF') # Nilai journal_mode yang valid
+SYNCHRONOUS_LEVELS = ('OFF', 'NORMAL', 'FULL', 'EXTRA') # Nilai synchronous yang valid
+
+
+def load_settings(default_url, environ=None, **overrides): # Baca pengaturan dari environment (EXAM_DB_*) dengan nilai bawaan
+    environ = os.environ if environ is None else environ
+    values = {'url': environ.get(ENV_PREFIX + 'URL', default_url)}
+    for name, default in DEFAULTS.items():
+        raw = environ.get(ENV_PREFIX + name.upper())
+        if raw is None:
+            values[name] = default
+        elif isinstance(default, int):
+            values[name] = int(raw)
+        else:
+            values[name] = raw.upper()
+    values.update(overrides)
+    if values['journal_mode'] not in JOURNAL_MODES:
+        raise ValueError(f"journal_mode tidak valid: {values['journal_mode']}")
+    if values['synchronous'] not in SYNCHRONOUS_LEVELS:
+        raise ValueError(f"synchronous tidak valid: {values['synchronous']}")
+    return EngineSettings(**values)
+
+
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+asyncpg'} # Driver async per dialek
+
+
+def _is_in_memory(settings): # Database SQLite di memori
+    return settings.url in ('sqlite://', 'sqlite:///:memory:') or 'mode=memory' in settings.url
+
+
+def _pragma_listener(settings, in_memory): # Listener 'connect' yang memasang pragma SQLite
+    def apply_pragmas(dbapi_connection, connection_record): # Pasang pragma pada setiap koneksi baru
+        cursor = dbapi_connection.cursor()
+        if not in_memory:
+            cursor.execute(f'PRAGMA journal_mode={settings.journal_mode}') # Mode jurnal tersimpan di file database
+        cursor.execute(f'PRAGMA synchronous={settings.synchronous}')
+        cursor.execute(f'PRAGMA busy_timeout={int(settings.busy_timeout_ms)}')
+        cursor.execute(f'PRAGMA mmap_size={int(settings.mmap_size)}')
+        cursor.execute(f'PRAGMA cache_size={int(settings.cache_size)}')
+        cursor.close()
+    return apply_pragmas
+
+
+def create_db_engine(settings): # Buat engine sesuai pengaturan
+    is_sqlite = settings.url.startswith('sqlite')
+    in_memory = is_sqlite and _is_in_memory(settings)
+    kwargs = {}
+    if is_sqlite:
+        kwargs['connect_args'] = {
+            'timeout': settings.busy_timeout_ms / 1000.0, # Timeout kunci di tingkat driver
+            'check_same_thread': False, # Koneksi dipakai bergantian oleh thread lewat pool
+        }
+    if in_memory:
+        kwargs['poolclass'] = StaticPool # Database memori hanya hidup dalam satu koneksi
+    else:
+        kwargs.update(poolclass=QueuePool, pool_size=settings.pool_size,
+                      max_overflow=settings.max_overflow, pool_timeout=settings.pool_timeout,
+                      pool_pre_ping=not is_sqlite)
+    engine = create_engine(settings.url, **kwargs)
+    engine.exam_settings = settings # Disimpan untuk halaman health
+    if is_sqlite:
+        event.listen(engine, 'connect', _pragma_listener(settings, in_memory))
+    return engine
+
+
+def create_async_db_engine(settings): # Engine async (aiosqlite/asyncpg) dengan pengaturan dan pragma yang sama
+    from sqlalchemy.ext.asyncio import create_async_engine # Hanya dibutuhkan di mode ASGI
+    url = make_url(settings.url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'Tidak ada driver async untuk {backend}.')
+    url = url.set(drivername=ASYNC_DRIVERS[backend])
+    is_sqlite = backend == 'sqlite'
+    in_memory = is_sqlite and _is_in_memory(settings)
+    if in_memory:
+        raise ValueError('Mode async membutuhkan database berbasis file.')
+    kwargs = {'pool_size': settings.pool_size, 'max_overflow': settings.max_overflow,
+              'pool_timeout': settings.pool_timeout, 'pool_pre_ping': not is_sqlite}
+    if is_sqlite:
+        kwargs['connect_args'] = {'timeout': settings.busy_timeout_ms / 1000.0} # Timeout kunci di tingkat driver
+    engine = create_async_engine(url, **kwargs)
+    engine.sync_engine.exam_settings = settings # Disimpan untuk halaman health
+    if is_sqlite:
+        event.listen(engine.sync_engine, 'connect', _pragma_listener(settings, in_memory))
+    return engine
+
+
+def effective_settings(engine): # Baca pengaturan yang benar-benar berlaku dari database dan pool
+    settings = getattr(engine, 'exam_settings', None)
+    report = {
+        'url': engine.url.render_as_string(hide_password=True),
+        'configured': settings._asdict() if settings else None,
+        'pool': {
+            'class': type(engine.pool).__name__,
+            'status': engine.pool.status(),
+        },
+    }
+    if engine.dialect.name == 'sqlite':
+        with engine.connect() as connection:
+            cursor = connection.connection.cursor()
+            pragmas = {}
+            for name in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size', 'cache_size'):
+                cursor.execute(f'PRAGMA {name}')
+                pragmas[name] = cursor.fetchone()[0]
+            cursor.close()
+        level = pragmas['synchronous'] # SQLite mengembalikan angka 0..3
+        if isinstance(level, int) and 0 <= level < len(SYNCHRONOUS_LEVELS):
+            pragmas['synchronous'] = SYNCHRONOUS_LEVELS[level]
+        report['pragmas'] = pragmas
+    if settings:
+        report['configured']['url'] = report['url']
+    return report
@@ -0,0 +1,130 @@
+# File: common/exam_content.py
+# Pemuatan isi ujian secara eager (jumlah query tetap) dan cache isi + potongan HTML per versi ujian
+import hashlib # Sidik konten dokumen API
+import json # Dokumen API isi ujian
+import threading # Untuk mengunci cache saat diakses banyak thread
+from collections import OrderedDict, namedtuple # Struktur data untuk cache LRU dan snapshot isi ujian
+
+from common.scoring import AnswerKey # Kunci jawaban diturunkan dari isi ujian yang sama
+
+OptionItem = namedtuple('OptionItem', 'id text is_correct') # Snapshot opsi jawaban
+QuestionItem = namedtuple('QuestionItem', 'id text options') # Snapshot pertanyaan beserta opsinya
+
+
+class ExamContent(object): # Snapshot isi ujian yang tidak terikat ke sesi database
+    __slots__ = ('id', 'title', 'description', 'version', 'questions', '_answer_key')
+
+    def __init__(self, id, title, description, version, questions):
+        self.id = id # ID ujian
+        self.title = title # Judul ujian
+        self.description = description # Deskripsi ujian
+        self.version = version # Versi isi ujian (naik setiap kali ujian diedit)
+        self.questions = tuple(questions) # Pertanyaan dalam urutan tampil
+        self._answer_key = None # Kunci jawaban dibuat saat pertama dibutuhkan
+
+    @property
+    def answer_key(self): # Kunci jawaban untuk penilaian tanpa query tambahan
+        if self._answer_key is None:
+            self._answer_key = AnswerKey.from_questions(self.id, self.questions)
+        return self._answer_key
+
+
+def load_exam_content(session, Exam, Question, Option, exam_id): # Muat ujian, pertanyaan dan opsi dengan dua query
+    exam = (session.query(Exam.id, Exam.title, Exam.description, Exam.version)
+            .filter(Exam.id == exam_id).first())
+    if exam is None:
+        return None
+    rows = (session.query(Question.id, Question.text, Option.id, Option.text, Option.is_correct)
+            .outerjoin(Option, Option.question_id == Question.id)
+            .filter(Question.exam_id == exam_id)
+            .order_by(Question.id, Option.id)
+            .all())
+    questions = OrderedDict() # question_id -> (teks, daftar opsi)
+    for question_id, question_text, option_id, option_text, is_correct in rows:
+        entry = questions.setdefault(question_id, (question_text, []))
+        if option_id is not None: # Pertanyaan bisa belum memiliki opsi
+            entry[1].append(OptionItem(option_id, option_text, bool(is_correct)))
+    return ExamContent(exam.id, exam.title, exam.description, exam.version,
+                       [QuestionItem(question_id, question_text, tuple(options))
+                        for question_id, (question_text, options) in questions.items()])
+
+
+def exam_document(content): # Dokumen API isi ujian: pertanyaan dan opsi tanpa penanda jawaban benar
+    return {'id': content.id, 'version': content.version, 'title': content.title, 'description': content.description,
+            'questions': [{'id': question.id, 'text': question.text,
+                           'options': [{'id': option.id, 'text': option.text} for option in question.options]}
+                          for question in content.questions]}
+
+
+def encode_exam_document(content): # (body JSON, ETag kuat) untuk satu versi ujian; ETag diawali versi agar mudah diperiksa
+    body = json.dumps(exam_document(content), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return body, f'{content.version}.{hashlib.sha256(body).hexdigest()[:32]}'
+
+
+def bump_exam_version(session, Exam, exam_id): # Naikkan versi ujian agar semua cache di semua proses kedaluwarsa
+    session.query(Exam).filter(Exam.id == exam_id).update(
+        {Exam.version: Exam.version + 1}, synchronize_session=False)
+
+
+class ExamContentCache(object): # Cache LRU isi ujian dan potongan HTML, dengan kunci (exam_id, versi)
+    def __init__(self, Exam, Question, Option, max_entries=256):
+        self.Exam = Exam # Model Exam milik aplikasi
+        self.Question = Question # Model Question milik aplikasi
+        self.Option = Option # Model Option milik aplikasi
+        self.max_entries = max_entries # Batas jumlah ujian yang disimpan
+        self._contents = OrderedDict() # (exam_id, versi) -> ExamContent
+        self._fragments = {} # (exam_id, versi) -> {bagian: HTML pertanyaan yang sudah dirender}
+        self._lock = threading.Lock()
+
+    def current_version(self, session, exam_id): # Query murah: hanya membaca versi ujian
+        return session.query(self.Exam.version).filter(self.Exam.id == exam_id).scalar()
+
+    def get(self, session, exam_id): # Ambil isi ujian versi terbaru (dari cache jika ada)
+        version = self.current_version(session, exam_id)
+        if version is None:
+            return None
+        key = (exam_id, version)
+        with self._lock:
+            content = self._contents.get(key)
+            if content is not None:
+                self._contents.move_to_end(key)
+                return content
+        content = load_exam_content(session, self.Exam, self.Question, self.Option, exam_id)
+        if content is None:
+            return None
+        self._store(content)
+        return content
+
+    def fragment(self, content, render, part=None): # Ambil HTML pertanyaan (atau satu bagian, misalnya satu halaman); render sekali per versi ujian
+        key = (content.id, content.version)
+        html = self._fragments.get(key, {}).get(part)
+        if html is None:
+            html = render(content)
+            with self._lock:
+                if key in self._contents: # Simpan hanya untuk versi yang masih ada di cache
+                    self._fragments.setdefault(key, {})[part] = html
+        return html
+
+    def invalidate(self, exam_id): # Buang semua versi ujian dari cache proses ini
+        with self._lock:
+            for key in [key for key in self._contents if key[0] == exam_id]:
+                self._drop(key)
+
+    def clear(self): # Kosongkan seluruh cache
+        with self._lock:
+            self._contents.clear()
+            self._fragments.clear()
+
+    def _store(self, content): # Simpan isi ujian dan buang versi lama serta entri tertua
+        key = (content.id, content.version)
+        with self._lock:
+            for old_key in [old for old in self._contents if old[0] == content.id and old != key]:
+                self._drop(old_key)
+            self._contents[key] = content
+            self._contents.move_to_end(key)
+            while len(self._contents) > self.max_entries:
+                self._drop(next(iter(self._contents)))
+
+    def _drop(self, key): # Hapus satu entri (dipanggil saat lock dipegang)
+        self._contents.pop(key, None)
+        self._fragments.pop(key, None)
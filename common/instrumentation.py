@@ -0,0 +1,295 @@
+# File: common/instrumentation.py
+# Instrumentasi per permintaan: waktu route, jumlah/waktu query SQL, statement terlambat, endpoint /metrics (format Prometheus)
+# dan profiler sampling opsional yang menulis stack terlipat (siap flame graph) untuk permintaan lambat
+import contextvars # RequestStats per permintaan, juga untuk task async
+import functools # Untuk dekorator akses endpoint operasional
+import hmac # Perbandingan token waktu-konstan
+import os # Untuk pengaturan dari environment dan direktori profil
+import re # Untuk merapikan teks SQL
+import sys # Untuk membaca frame semua thread (profiler)
+import threading # Untuk kunci metrik dan thread sampler
+import time # Untuk mengukur waktu
+from collections import defaultdict # Untuk menghitung stack
+from datetime import datetime # Untuk nama berkas profil
+from flask import Response, abort, request # Hook permintaan Flask
+from flask_login import current_user # Guru yang login boleh membaca metrik
+from sqlalchemy import event # Hook cursor SQLAlchemy
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0) # Detik
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250) # Jumlah query per permintaan
+STATEMENT_LIMIT = 300 # Panjang maksimum teks statement di label
+
+
+def _escape(value): # Escape nilai label sesuai format teks Prometheus
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()): # {a="1",b="2"}
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value): # Angka dalam format Prometheus
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram(object): # Histogram Prometheus dengan label
+    def __init__(self, name, help, labelnames, buckets):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {} # nilai label -> [hitungan per bucket..., jumlah, hitungan]
+        self._lock = threading.Lock()
+
+    def observe(self, labelvalues, value):
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * len(self.buckets) + [0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = sorted((labelvalues, list(series)) for labelvalues, series in self._series.items())
+        for labelvalues, series in items:
+            for index, bound in enumerate(self.buckets): # Bucket sudah kumulatif karena setiap bucket >= nilai ikut dihitung
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, labelvalues, [("le", _number(bound))])} {series[index]}')
+            lines.append(f'{self.name}_bucket{_labels(self.labelnames, labelvalues, [("le", "+Inf")])} {series[-1]}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labelvalues)} {_number(series[-2])}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labelvalues)} {series[-1]}')
+        return lines
+
+
+class Counter(object): # Counter Prometheus dengan label
+    def __init__(self, name, help, labelnames):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def inc(self, labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] += amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            items = sorted(self._values.items())
+        lines.extend(f'{self.name}{_labels(self.labelnames, labelvalues)} {value}' for labelvalues, value in items)
+        return lines
+
+
+class RequestStats(object): # Data satu permintaan yang sedang berjalan
+    __slots__ = ('started', 'queries', 'sql_seconds', 'slowest_seconds', 'slowest_statement', 'status', 'samples')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement = None
+        self.status = None
+        self.samples = None # Stack terlipat -> jumlah sampel (hanya jika profiler aktif)
+
+
+class StackSampler(object): # Profiler sampling: membaca stack thread permintaan secara berkala
+    def __init__(self, interval):
+        self.interval = interval # Jeda antar sampel (detik)
+        self._targets = {} # ID thread -> RequestStats
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def track(self, stats):
+        stats.samples = defaultdict(int)
+        with self._lock:
+            self._targets[threading.get_ident()] = stats
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='request-sampler', daemon=True)
+                self._thread.start()
+
+    def untrack(self):
+        with self._lock:
+            self._targets.pop(threading.get_ident(), None)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                targets = dict(self._targets)
+            if not targets:
+                continue
+            frames = sys._current_frames()
+            for ident, stats in targets.items():
+                frame = frames.get(ident)
+                if frame is not None:
+                    stats.samples[fold_stack(frame)] += 1
+
+
+def fold_stack(frame): # Stack dalam format terlipat: akar;...;daun (untuk flamegraph.pl / speedscope)
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class Instrumentation(object): # Pasang hook Flask + SQLAlchemy dan endpoint /metrics
+    def __init__(self, prefix='exam', profile_slow_ms=None, profile_dir=None, profile_interval=0.005, access_token=None):
+        self.prefix = prefix # Awalan nama metrik
+        self.access_token = access_token # Token Bearer untuk scraper tanpa sesi login (None = hanya guru)
+        self.profile_slow_ms = profile_slow_ms # Aktifkan profiler: simpan stack untuk permintaan >= batas ini
+        self.profile_dir = profile_dir # Direktori berkas .folded
+        self.sampler = StackSampler(profile_interval) if profile_slow_ms is not None else None
+        self._stats = contextvars.ContextVar('request_stats', default=None) # RequestStats milik permintaan (thread atau task async)
+        self._collectors = [] # (awalan, fungsi) untuk metrik tambahan berbentuk dict
+        self._slowest = {} # route -> (detik, statement) terlambat yang pernah terlihat
+        self._lock = threading.Lock()
+        labels = ('route', 'method')
+        self.requests = Counter(f'{prefix}_http_requests_total', 'Jumlah permintaan per route dan status.', ('route', 'method', 'status'))
+        self.duration = Histogram(f'{prefix}_http_request_duration_seconds', 'Waktu permintaan per route.', labels, DURATION_BUCKETS)
+        self.query_count = Histogram(f'{prefix}_sql_queries_per_request', 'Jumlah query SQL per permintaan.', labels, QUERY_BUCKETS)
+        self.sql_time = Histogram(f'{prefix}_sql_duration_seconds_per_request', 'Total waktu SQL per permintaan.', labels, DURATION_BUCKETS)
+        self.slowest_time = Histogram(f'{prefix}_sql_slowest_statement_seconds', 'Statement SQL terlambat per permintaan.', labels, DURATION_BUCKETS)
+
+    @classmethod
+    def from_env(cls, environ=None): # EXAM_PROFILE_SLOW_MS, EXAM_PROFILE_DIR, EXAM_PROFILE_INTERVAL_MS, EXAM_METRICS_TOKEN
+        environ = os.environ if environ is None else environ
+        slow_ms = environ.get('EXAM_PROFILE_SLOW_MS')
+        return cls(profile_slow_ms=float(slow_ms) if slow_ms else None,
+                   profile_dir=environ.get('EXAM_PROFILE_DIR'),
+                   profile_interval=float(environ.get('EXAM_PROFILE_INTERVAL_MS', 5)) / 1000.0,
+                   access_token=environ.get('EXAM_METRICS_TOKEN') or None)
+
+    def init_app(self, app, engine, endpoint='/metrics'): # Pasang hook dan route /metrics
+        if self.profile_slow_ms is not None and not self.profile_dir:
+            self.profile_dir = os.path.join(app.root_path, 'profiles')
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        self.watch_engine(engine)
+        app.add_url_rule(endpoint, 'metrics', self.protected(self.metrics_view))
+        return self
+
+    def protected(self, view): # Dekorator endpoint operasional (/metrics, /metrics/*, /health/*): guru atau token, selain itu 403
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not self._allowed():
+                abort(403)
+            return view(*args, **kwargs)
+        return wrapper
+
+    def _allowed(self):
+        if self.access_token:
+            supplied = request.headers.get('Authorization', '').encode()
+            if hmac.compare_digest(supplied, f'Bearer {self.access_token}'.encode()):
+                return True
+        return current_user.is_authenticated and getattr(current_user, 'role', None) == 'teacher'
+
+    def watch_engine(self, engine): # Hitung query dari engine lain (misalnya engine.sync_engine milik engine async)
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def register_collector(self, name, collect): # Metrik dict tambahan (misalnya cache pengguna) sebagai gauge
+        self._collectors.append((name, collect))
+
+    # --- Hook Flask ---
+
+    def _before_request(self):
+        stats = RequestStats()
+        self._stats.set(stats)
+        if self.sampler is not None:
+            self.sampler.track(stats)
+
+    def _after_request(self, response):
+        stats = self._stats.get()
+        if stats is not None:
+            stats.status = response.status_code
+        return response
+
+    def _teardown_request(self, exception=None):
+        stats = self._stats.get()
+        if stats is None:
+            return
+        self._stats.set(None)
+        if self.sampler is not None:
+            self.sampler.untrack()
+        elapsed = time.perf_counter() - stats.started
+        route = request.url_rule.rule if request.url_rule is not None else '<unmatched>' # Pola route, bukan URL mentah
+        labels = (route, request.method)
+        status = stats.status if stats.status is not None else 500 # Tidak ada respons: pengecualian tak tertangani
+        self.requests.inc((route, request.method, str(status)))
+        self.duration.observe(labels, elapsed)
+        self.query_count.observe(labels, stats.queries)
+        self.sql_time.observe(labels, stats.sql_seconds)
+        if stats.queries:
+            self.slowest_time.observe(labels, stats.slowest_seconds)
+            with self._lock:
+                if stats.slowest_seconds > self._slowest.get(route, (0.0, None))[0]:
+                    self._slowest[route] = (stats.slowest_seconds, stats.slowest_statement)
+        if stats.samples and elapsed * 1000.0 >= self.profile_slow_ms:
+            self._write_profile(route, request.method, elapsed, stats.samples)
+
+    # --- Hook SQLAlchemy ---
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._instrumentation_started = time.perf_counter() # Disimpan per eksekusi: statement yang gagal tidak meninggalkan sisa
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_instrumentation_started', None)
+        stats = self._stats.get()
+        if stats is None or started is None: # Query di luar permintaan (migrasi, thread latar belakang)
+            return
+        elapsed = time.perf_counter() - started
+        stats.queries += 1
+        stats.sql_seconds += elapsed
+        if elapsed > stats.slowest_seconds:
+            stats.slowest_seconds = elapsed
+            stats.slowest_statement = statement
+
+    # --- Keluaran ---
+
+    def _write_profile(self, route, method, elapsed, samples): # Satu berkas .folded per permintaan lambat
+        os.makedirs(self.profile_dir, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', route).strip('_') or 'root'
+        name = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{method}-{slug}-{int(elapsed * 1000)}ms.folded"
+        with open(os.path.join(self.profile_dir, name), 'w') as handle:
+            for stack, count in sorted(samples.items()):
+                handle.write(f'{stack} {count}\n')
+
+    def render(self): # Semua metrik dalam format teks Prometheus
+        lines = []
+        for metric in (self.requests, self.duration, self.query_count, self.sql_time, self.slowest_time):
+            lines.extend(metric.render())
+        name = f'{self.prefix}_sql_slowest_statement_info'
+        lines += [f'# HELP {name} Statement SQL terlambat yang pernah terlihat per route (nilai = detik).', f'# TYPE {name} gauge']
+        with self._lock:
+            slowest = sorted(self._slowest.items())
+        for route, (seconds, statement) in slowest:
+            text = re.sub(r'\s+', ' ', statement or '').strip()[:STATEMENT_LIMIT]
+            lines.append(f'{name}{_labels(("route", "statement"), (route, text))} {_number(seconds)}')
+        for collector, collect in self._collectors:
+            lines.extend(self._render_collector(collector, collect()))
+        return '\n'.join(lines) + '\n'
+
+    def _render_collector(self, collector, values, path=()): # Nilai numerik dict (bersarang) sebagai gauge
+        lines = []
+        for key, value in sorted(values.items()):
+            if isinstance(value, dict):
+                lines.extend(self._render_collector(collector, value, path + (key,)))
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                name = re.sub(r'[^a-zA-Z0-9_]', '_', '_'.join((self.prefix, collector) + path + (key,)))
+                lines += [f'# TYPE {name} gauge', f'{name} {_number(value)}']
+        return lines
+
+    def metrics_view(self): # Endpoint /metrics
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,83 @@
+# File: common/migrations.py
+# Runner migrasi skema berversi: dijalankan sekali saat startup atau lewat CLI, bukan di setiap permintaan
+import sys # Untuk argumen CLI
+from collections import namedtuple # Untuk definisi migrasi
+from datetime import datetime # Untuk mencatat waktu migrasi
+from sqlalchemy import inspect, text # Untuk memeriksa skema dan menjalankan SQL
+from sqlalchemy.exc import IntegrityError # Bisa berarti migrasi sudah dijalankan proses lain
+
+Migration = namedtuple('Migration', 'version name upgrade') # upgrade(connection) menjalankan perubahan skema
+
+VERSION_TABLE = 'schema_migrations' # Tabel pencatat migrasi yang sudah diterapkan
+
+
+def ensure_version_table(engine): # Buat tabel pencatat migrasi jika belum ada
+    with engine.begin() as connection:
+        connection.execute(text(f'CREATE TABLE IF NOT EXISTS {VERSION_TABLE} ('
+                                'version INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL, applied_at VARCHAR(32) NOT NULL)'))
+
+
+def applied_versions(engine): # Versi migrasi yang sudah diterapkan
+    with engine.connect() as connection:
+        return {row[0] for row in connection.execute(text(f'SELECT version FROM {VERSION_TABLE}'))}
+
+
+def run_migrations(engine, migrations, log=None): # Terapkan migrasi yang belum dijalankan, berurutan; log(pesan) per migrasi yang diterapkan
+    ensure_version_table(engine)
+    done = applied_versions(engine)
+    applied = []
+    for migration in sorted(migrations, key=lambda m: m.version):
+        if migration.version in done:
+            continue
+        try:
+            with engine.begin() as connection: # Satu transaksi per migrasi
+                # Catat versi lebih dulu: pernyataan DML membuka transaksi di pysqlite sehingga DDL setelahnya ikut di-rollback jika gagal,
+                # dan proses lain yang menjalankan migrasi yang sama akan gagal di primary key
+                connection.execute(text(f'INSERT INTO {VERSION_TABLE} (version, name, applied_at) VALUES (:version, :name, :applied_at)'),
+                                   {'version': migration.version, 'name': migration.name,
+                                    'applied_at': datetime.now().isoformat(timespec='seconds')})
+                migration.upgrade(connection)
+        except IntegrityError: # Sudah diterapkan oleh proses lain, atau pelanggaran constraint di dalam migrasi itu sendiri
+            if migration.version in applied_versions(engine): # Proses lain menang di primary key tabel versi
+                continue
+            raise
+        applied.append(migration)
+        if log:
+            log(f'Migrasi {migration.version:03d} {migration.name} diterapkan.')
+    return applied
+
+
+def pending_migrations(engine, migrations): # Migrasi yang belum diterapkan
+    ensure_version_table(engine)
+    done = applied_versions(engine)
+    return [migration for migration in sorted(migrations, key=lambda m: m.version) if migration.version not in done]
+
+
+def add_column_if_missing(connection, table, column, ddl): # ALTER TABLE ADD COLUMN yang aman dijalankan ulang
+    columns = [info['name'] for info in inspect(connection).get_columns(table)]
+    if column not in columns:
+        connection.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {ddl}'))
+
+
+def create_indexes(connection, metadata): # Buat semua indeks yang didefinisikan di model (jika belum ada)
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+def main(engine, migrations, argv=None): # CLI: python migrations.py [status|upgrade]
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else 'upgrade'
+    if command == 'status':
+        pending = pending_migrations(engine, migrations)
+        for migration in sorted(migrations, key=lambda m: m.version):
+            state = 'tertunda' if migration in pending else 'diterapkan'
+            print(f'{migration.version:03d} {migration.name}: {state}')
+        return 0
+    if command == 'upgrade':
+        applied = run_migrations(engine, migrations, log=print)
+        if not applied:
+            print('Skema sudah versi terbaru.')
+        return 0
+    print(f'Perintah tidak dikenal: {command} (gunakan status atau upgrade)')
+    return 2
@@ -0,0 +1,128 @@
+# File: common/password_hashing.py
+# Layanan hashing password: process pool terbatas, antrean dengan back-pressure (503 + Retry-After) dan rehash otomatis
+import multiprocessing # Untuk memilih cara membuat proses pekerja
+import os # Untuk membaca pengaturan dari environment
+import threading # Untuk semaphore antrean dan kunci metrik
+import time # Untuk mengukur waktu per permintaan
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout # Pool proses untuk hashing CPU-bound
+from werkzeug.security import generate_password_hash, check_password_hash # Implementasi hashing Werkzeug
+
+DEFAULT_METHOD = 'pbkdf2:sha256' # Metode baseline Versi1 (app.py lama dan daftar.py)
+SCRYPT_METHOD = 'scrypt' # Metode baseline Versi2 (generate_password_hash tanpa method = scrypt pada Werkzeug 3)
+ALGORITHM_RANK = {'pbkdf2': 1, 'scrypt': 2} # Urutan kekuatan algoritma; rehash tidak pernah turun peringkat
+
+
+def hash_password(password, method): # Dijalankan di proses pekerja
+    return generate_password_hash(password, method=method)
+
+
+def verify_password(pwhash, password): # Dijalankan di proses pekerja
+    return check_password_hash(pwhash, password)
+
+
+class HashingBusy(Exception): # Antrean hashing penuh; klien diminta mencoba lagi
+    def __init__(self, retry_after):
+        super().__init__('Layanan hashing sedang penuh.')
+        self.retry_after = retry_after # Detik sebelum klien sebaiknya mencoba lagi
+
+
+class PasswordHasher(object): # Hashing password di luar thread permintaan
+    def __init__(self, method=DEFAULT_METHOD, workers=None, max_pending=None, timeout=10.0, retry_after=2):
+        self.method = method # Metode dan parameter kerja, misalnya pbkdf2:sha256:600000
+        self.workers = (os.cpu_count() or 1) if workers is None else workers # 0 = hashing langsung di thread permintaan
+        self.max_pending = max_pending if max_pending is not None else max(self.workers, 1) * 4 # Batas antrean
+        self.timeout = timeout # Batas waktu menunggu hasil hashing
+        self.retry_after = retry_after # Nilai header Retry-After saat penuh
+        self._slots = threading.BoundedSemaphore(self.max_pending) # Slot antrean (back-pressure)
+        self._executor = None # Pool proses, dibuat oleh start() sebelum thread latar belakang berjalan
+        self._executor_pid = None # Proses pemilik pool (pool tidak ikut terbawa fork)
+        self._lock = threading.Lock()
+        self._stats = {} # operasi -> {count, total_ms, max_ms}
+        self._rejected = 0 # Permintaan yang ditolak karena antrean penuh
+
+    @classmethod
+    def from_env(cls, environ=None, default_method=DEFAULT_METHOD): # Pengaturan dari EXAM_PASSWORD_METHOD, EXAM_HASH_WORKERS, EXAM_HASH_QUEUE, EXAM_HASH_TIMEOUT
+        environ = os.environ if environ is None else environ
+        workers = environ.get('EXAM_HASH_WORKERS')
+        max_pending = environ.get('EXAM_HASH_QUEUE')
+        return cls(method=environ.get('EXAM_PASSWORD_METHOD', default_method),
+                   workers=int(workers) if workers is not None else None,
+                   max_pending=int(max_pending) if max_pending is not None else None,
+                   timeout=float(environ.get('EXAM_HASH_TIMEOUT', 10)))
+
+    def hash(self, password): # Buat hash baru dengan metode yang dikonfigurasi
+        return self._run('hash', hash_password, password, self.method)
+
+    def verify(self, pwhash, password): # Periksa password terhadap hash tersimpan
+        return self._run('verify', verify_password, pwhash, password)
+
+    def needs_rehash(self, pwhash): # Hash tersimpan lebih lemah dari konfigurasi; hash yang lebih kuat tidak pernah diturunkan
+        stored = pwhash.split('$', 1)[0].split(':')
+        wanted = self.method.split(':')
+        if stored[:len(wanted)] == wanted: # Sudah sesuai konfigurasi
+            return False
+        if stored[0] != wanted[0]: # Algoritma berbeda: hanya naik ke algoritma yang lebih kuat
+            return ALGORITHM_RANK.get(wanted[0], 0) > ALGORITHM_RANK.get(stored[0], 0)
+        return all(int(new) >= int(old) for old, new in zip(stored[1:], wanted[1:]) # Parameter kerja (iterasi, N/r/p) tidak boleh turun
+                   if old.isdigit() and new.isdigit())
+
+    def metrics(self): # Jumlah, rata-rata dan maksimum waktu per operasi
+        with self._lock:
+            report = {name: dict(stats, avg_ms=stats['total_ms'] / stats['count'] if stats['count'] else 0.0)
+                      for name, stats in self._stats.items()}
+            report['rejected'] = self._rejected
+        report['workers'] = self.workers
+        report['max_pending'] = self.max_pending
+        report['method'] = self.method
+        return report
+
+    def start(self): # Buat pool dan fork semua pekerja sekarang, sebelum aplikasi menjalankan thread latar belakang
+        if self.workers:
+            self._get_executor().submit(int).result() # Dengan fork, submit pertama langsung membuat semua pekerja
+        return self
+
+    def shutdown(self): # Hentikan pool proses
+        if self._executor is not None and self._executor_pid == os.getpid():
+            self._executor.shutdown(wait=True)
+        self._executor = None
+
+    def _run(self, name, func, *args):
+        if not self._slots.acquire(blocking=False): # Antrean penuh: tolak segera daripada menahan thread permintaan
+            with self._lock:
+                self._rejected += 1
+            raise HashingBusy(self.retry_after)
+        started = time.perf_counter()
+        future = None
+        try:
+            if self.workers == 0:
+                return func(*args)
+            future = self._get_executor().submit(func, *args)
+            future.add_done_callback(lambda done: self._slots.release()) # Slot dilepas saat pekerjaan benar-benar selesai, juga setelah timeout
+            try:
+                return future.result(timeout=self.timeout)
+            except FutureTimeout: # Pekerjaan tetap berjalan dan memegang slotnya
+                raise HashingBusy(self.retry_after)
+        finally:
+            if future is None: # Hashing langsung, atau submit gagal
+                self._slots.release()
+            self._record(name, (time.perf_counter() - started) * 1000.0)
+
+    def _get_executor(self):
+        if self._executor_pid != os.getpid(): # Belum dibuat, atau pool milik proses induk sebelum fork
+            with self._lock:
+                if self._executor_pid != os.getpid():
+                    context = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None # spawn/forkserver akan mengimpor ulang modul aplikasi di setiap pekerja
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+                    self._executor_pid = os.getpid()
+        return self._executor
+
+    def _record(self, name, elapsed_ms):
+        with self._lock:
+            stats = self._stats.setdefault(name, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            stats['count'] += 1
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+
+
+def busy_response(error): # Respons 503 + Retry-After untuk errorhandler Flask
+    return 'Server sedang sibuk, silakan coba lagi sebentar lagi.', 503, {'Retry-After': str(error.retry_after)}
@@ -0,0 +1,59 @@
+# File: common/scoring.py
+# Mesin penilaian: kunci jawaban ringkas per ujian, dinilai dalam satu putaran
+
+GRADES = ('A', 'B', 'C', 'D', 'E', 'N/A') # Semua nilai huruf yang bisa dihasilkan get_grade
+
+
+def get_grade(score, total_questions): # Nilai huruf berdasarkan persentase skor
+    if total_questions == 0: # Jika tidak ada pertanyaan
+        return 'N/A'
+    percentage = (score / total_questions) * 100
+    if percentage >= 90:
+        return 'A'
+    elif percentage >= 80:
+        return 'B'
+    elif percentage >= 70:
+        return 'C'
+    elif percentage >= 60:
+        return 'D'
+    else:
+        return 'E'
+
+
+class AnswerKey(object): # Kunci jawaban ringkas untuk satu ujian
+    __slots__ = ('exam_id', 'question_ids', 'options', 'correct')
+
+    def __init__(self, exam_id, question_ids, options, correct):
+        self.exam_id = exam_id # ID ujian
+        self.question_ids = tuple(question_ids) # Urutan pertanyaan dalam ujian
+        self.options = options # question_id -> tuple ID opsi (urutan tampil)
+        self.correct = correct # question_id -> frozenset ID opsi yang benar
+
+    def __len__(self): # Jumlah pertanyaan dalam ujian
+        return len(self.question_ids)
+
+    @classmethod
+    def from_questions(cls, exam_id, questions): # Bangun kunci dari snapshot pertanyaan (lihat common.exam_content)
+        return cls(exam_id, [question.id for question in questions],
+                   {question.id: tuple(option.id for option in question.options) for question in questions},
+                   {question.id: frozenset(option.id for option in question.options if option.is_correct)
+                    for question in questions})
+
+    def selections_from_form(self, form): # Ambil pilihan siswa dari formulir (question_<id> -> option id)
+        selections = {} # question_id -> option_id yang valid
+        for question_id in self.question_ids:
+            raw = form.get(f'question_{question_id}')
+            if not raw:
+                continue
+            try:
+                option_id = int(raw)
+            except (TypeError, ValueError): # Nilai yang tidak valid diabaikan
+                continue
+            if option_id in self.options[question_id]: # Hanya opsi milik pertanyaan ini yang diterima
+                selections[question_id] = option_id
+        return selections
+
+    def score(self, selections): # Hitung skor dalam satu putaran tanpa query per pertanyaan
+        correct = self.correct
+        return sum(1 for question_id, option_id in selections.items()
+                   if option_id in correct.get(question_id, ()))
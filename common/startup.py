@@ -0,0 +1,25 @@
+# File: common/startup.py
+# Startup cepat untuk pekerja: cache bytecode Jinja di disk dan pemanasan sebelum fork (gunicorn --preload)
+import gc # Untuk membekukan objek yang dibuat sebelum fork
+import os # Untuk membuat direktori cache
+from jinja2 import FileSystemBytecodeCache # Template terkompilasi yang dipakai bersama semua proses
+from sqlalchemy.orm import configure_mappers # Konfigurasi relasi model dilakukan sekali
+
+
+def configure_template_cache(app, directory): # Template dikompilasi sekali lalu dibaca dari disk oleh pekerja lain dan setelah restart
+    if not directory: # '' = nonaktif
+        return None
+    os.makedirs(directory, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+    return directory
+
+
+def warm_up(app, forms=()): # Muat semua yang bisa dibagi copy-on-write sebelum pekerja di-fork
+    for name in app.jinja_env.list_templates(): # Kompilasi semua template (dan isi cache bytecode)
+        app.jinja_env.get_template(name)
+    configure_mappers() # Relasi model dikonfigurasi di proses induk, bukan di permintaan pertama setiap pekerja
+    with app.test_request_context(): # Daftar field WTForms dibuat saat formulir pertama kali diinstansiasi
+        for form in forms:
+            form(meta={'csrf': False})
+    gc.collect()
+    gc.freeze() # Objek yang sudah ada tidak disentuh GC sehingga halaman memori tetap dibagi setelah fork
@@ -0,0 +1,58 @@
+# File: common/static_assets.py
+# URL berisi sidik konten untuk file statis: url_for('static', ...) menambahkan ?v=<hash>, URL tersebut di-cache selamanya
+import hashlib # Sidik konten file
+import os # Untuk memeriksa waktu ubah file
+import threading # Cache sidik dipakai banyak thread
+from flask import request # Untuk mengenali permintaan file statis
+from werkzeug.security import safe_join # Jalur file statis yang aman
+
+ONE_YEAR = 365 * 24 * 3600 # max-age untuk URL bersidik
+
+
+class StaticFingerprints(object): # Sidik dihitung sekali per versi file (berdasarkan waktu ubah dan ukuran)
+    def __init__(self, max_age=ONE_YEAR, length=12):
+        self.max_age = max_age # Lama cache di browser untuk URL bersidik
+        self.length = length # Panjang sidik di URL
+        self.static_folder = None # Diisi oleh init_app
+        self._fingerprints = {} # nama file -> (mtime, ukuran, sidik)
+        self._lock = threading.Lock()
+
+    def init_app(self, app): # Pasang url_defaults dan header cache
+        self.static_folder = app.static_folder
+        app.url_defaults(self._add_fingerprint)
+        app.after_request(self._cache_headers)
+        return self
+
+    def fingerprint(self, filename): # Sidik konten file; None jika file tidak ada
+        path = safe_join(self.static_folder, filename) if self.static_folder else None
+        try:
+            stat = os.stat(path) if path else None
+        except OSError:
+            return None
+        if stat is None:
+            return None
+        cached = self._fingerprints.get(filename)
+        if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+        with open(path, 'rb') as handle:
+            digest = hashlib.sha256(handle.read()).hexdigest()[:self.length]
+        with self._lock:
+            self._fingerprints[filename] = (stat.st_mtime_ns, stat.st_size, digest)
+        return digest
+
+    def _add_fingerprint(self, endpoint, values): # url_for('static', filename=...) -> ...?v=<sidik>
+        if endpoint == 'static' and 'filename' in values and 'v' not in values:
+            digest = self.fingerprint(values['filename'])
+            if digest:
+                values['v'] = digest
+
+    def _cache_headers(self, response): # Hanya URL dengan sidik yang masih cocok yang boleh di-cache selamanya
+        if request.endpoint != 'static' or response.status_code not in (200, 304):
+            return response
+        version = request.args.get('v')
+        if version and version == self.fingerprint(request.view_args.get('filename', '')):
+            response.cache_control.public = True
+            response.cache_control.max_age = self.max_age
+            response.cache_control.immutable = True
+            response.cache_control.no_cache = None
+        return response
@@ -0,0 +1,281 @@
+# File: common/submission_queue.py
+# Antrean pengiriman jawaban write-behind: jurnal append-only di disk + penulis latar belakang yang menulis per batch
+# Pengiriman yang selalu ditolak database (misalnya IntegrityError) dipindahkan ke jurnal dead-letter <slot>.dead.jsonl
+import base64 # Kolom biner disimpan sebagai teks base64 di jurnal
+import json # Format baris jurnal (JSON Lines)
+import os # Untuk operasi file
+import threading # Thread penulis latar belakang
+import time # Untuk mengukur latensi
+from collections import deque # Antrean dalam memori
+from datetime import datetime # Untuk kolom bertipe tanggal
+from sqlalchemy import insert, text # Untuk bulk insert dan checkpoint
+from sqlalchemy.exc import OperationalError # Database terkunci/tidak tersedia: dicoba lagi, bukan dead-letter
+
+try:
+    import fcntl # Kunci file agar setiap proses memiliki slot jurnal sendiri (hanya POSIX)
+except ImportError: # Windows: satu slot tanpa kunci
+    fcntl = None
+
+CHECKPOINT_TABLE = 'submission_queue_checkpoints' # Posisi jurnal yang sudah tersimpan di database
+MAX_SLOTS = 64 # Batas jumlah proses yang bisa memiliki jurnal sendiri
+
+
+def create_checkpoint_table(connection): # Dipanggil dari migrasi aplikasi
+    connection.execute(text(f'CREATE TABLE IF NOT EXISTS {CHECKPOINT_TABLE} ('
+                            'journal VARCHAR(100) PRIMARY KEY, segment INTEGER NOT NULL, position INTEGER NOT NULL)'))
+
+
+def _encode(value): # Nilai yang tidak didukung JSON: tanggal sebagai teks ISO, bytes sebagai base64
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(value).decode('ascii')
+    raise TypeError(f'Tipe tidak didukung di jurnal: {type(value).__name__}')
+
+
+class SubmissionQueue(object): # Antrean tahan crash: terima -> tulis jurnal -> balas; penulis menguras ke database per batch
+    def __init__(self, engine, table, journal_dir, batch_size=500, flush_interval=0.2,
+                 datetime_columns=(), binary_columns=(), max_segment_bytes=16 * 1024 * 1024, fsync=True, on_flush=None):
+        self.engine = engine # Engine database tujuan
+        self.table = table # Tabel tujuan (misalnya Answer.__table__)
+        self.journal_dir = journal_dir # Direktori jurnal
+        self.batch_size = batch_size # Jumlah pengiriman maksimum per transaksi
+        self.flush_interval = flush_interval # Jeda maksimum sebelum batch ditulis
+        self.datetime_columns = tuple(datetime_columns) # Kolom yang dikembalikan ke datetime saat ditulis
+        self.binary_columns = tuple(binary_columns) # Kolom yang dikembalikan ke bytes saat ditulis
+        self.max_segment_bytes = max_segment_bytes # Ukuran segmen jurnal sebelum dirotasi
+        self.fsync = fsync # Pastikan jurnal benar-benar tersimpan sebelum membalas
+        self.on_flush = on_flush # Dipanggil dengan (connection, rows) di transaksi batch yang sama, misalnya statistik ujian
+        self.journal = None # Nama slot jurnal milik proses ini
+        self._segment = 0 # Nomor segmen jurnal aktif
+        self._file = None # File segmen aktif
+        self._lock_file = None # File kunci slot
+        self._pending = deque() # (segmen, offset akhir, baris, waktu masuk)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self._metrics = {'enqueued': 0, 'flushed': 0, 'batches': 0, 'replayed': 0, 'errors': 0, 'dead_lettered': 0,
+                         'last_batch_size': 0, 'last_flush_ms': 0.0, 'max_flush_ms': 0.0,
+                         'last_latency_ms': 0.0, 'max_latency_ms': 0.0}
+
+    # --- Siklus hidup ---
+
+    def start(self): # Klaim slot jurnal, putar ulang sisa jurnal dan jalankan penulis
+        os.makedirs(self.journal_dir, exist_ok=True)
+        self.journal = self._claim_slot()
+        checkpoint_segment, offset = self._read_checkpoint()
+        self._remove_segments(lambda segment: segment < checkpoint_segment) # Segmen lama sudah tersimpan seluruhnya
+        self._segment = checkpoint_segment
+        for segment in self._segments(): # Segmen checkpoint dan segmen sesudahnya (rotasi yang checkpoint-nya gagal ditulis)
+            if segment >= checkpoint_segment:
+                self._segment = segment
+                self._replay(segment, offset if segment == checkpoint_segment else 0)
+        self._file = open(self._segment_path(self._segment), 'ab')
+        self._thread = threading.Thread(target=self._run, name=f'submission-writer-{self.journal}', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=10): # Tulis semua sisa antrean lalu hentikan penulis
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # --- Jalur permintaan ---
+
+    def enqueue(self, rows): # Simpan pengiriman ke jurnal dan kembali segera; ditulis ke database oleh thread penulis
+        line = json.dumps(rows, default=_encode, separators=(',', ':')).encode('utf-8') + b'\n'
+        with self._cond: # Urutan baris jurnal = urutan antrean; kunci hanya dipegang selama write()
+            self._file.write(line)
+            self._file.flush()
+            self._pending.append((self._segment, self._file.tell(), rows, time.monotonic()))
+            self._metrics['enqueued'] += 1
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+            handle = os.dup(self._file.fileno()) if self.fsync else None # Salinan fd: segmen boleh dirotasi selama fsync
+        if handle is not None: # fsync di luar kunci: permintaan lain tetap bisa menulis ke jurnal
+            try:
+                os.fsync(handle)
+            finally:
+                os.close(handle)
+
+    def metrics(self): # Kedalaman antrean, ukuran batch dan latensi penulisan
+        with self._cond:
+            report = dict(self._metrics)
+            report['depth'] = len(self._pending)
+            report['journal'] = self.journal
+            report['segment'] = self._segment
+        return report
+
+    # --- Penulis latar belakang ---
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if len(self._pending) < self.batch_size and not self._stopping:
+                    self._cond.wait(self.flush_interval) # Kumpulkan pengiriman lain sebelum menulis
+                batch = [self._pending[i] for i in range(min(len(self._pending), self.batch_size))]
+                stopping = self._stopping
+            if batch:
+                try:
+                    self._flush(batch)
+                except OperationalError: # Database sibuk atau tidak tersedia: coba lagi pada putaran berikutnya
+                    self._failed()
+                    continue
+                except Exception: # Ada pengiriman yang ditolak: tulis satu per satu agar hanya pengiriman itu yang dipisahkan
+                    with self._cond:
+                        self._metrics['errors'] += 1
+                    try:
+                        for entry in batch:
+                            self._flush_or_dead_letter(entry)
+                    except Exception: # Database tidak tersedia di tengah jalan: sisa batch dicoba lagi
+                        self._failed()
+                        continue
+            elif stopping:
+                return
+            self._maybe_rotate()
+
+    def _flush(self, batch): # Satu transaksi untuk seluruh batch, termasuk checkpoint jurnal
+        started = time.monotonic()
+        rows = [self._decode(row) for _, _, record_rows, _ in batch for row in record_rows]
+        segment, offset = batch[-1][0], batch[-1][1]
+        with self.engine.begin() as connection:
+            if rows:
+                connection.execute(insert(self.table), rows)
+                if self.on_flush is not None:
+                    self.on_flush(connection, rows)
+            self._write_checkpoint(connection, segment, offset)
+        finished = time.monotonic()
+        with self._cond:
+            for _ in batch:
+                self._pending.popleft()
+            latency_ms = (finished - batch[0][3]) * 1000.0 # Waktu tunggu pengiriman tertua di batch
+            flush_ms = (finished - started) * 1000.0
+            metrics = self._metrics
+            metrics['flushed'] += len(batch)
+            metrics['batches'] += 1
+            metrics['last_batch_size'] = len(batch)
+            metrics['last_flush_ms'] = flush_ms
+            metrics['max_flush_ms'] = max(metrics['max_flush_ms'], flush_ms)
+            metrics['last_latency_ms'] = latency_ms
+            metrics['max_latency_ms'] = max(metrics['max_latency_ms'], latency_ms)
+
+    def _failed(self): # Catat error lalu beri jeda sebelum mencoba lagi
+        with self._cond:
+            self._metrics['errors'] += 1
+        time.sleep(self.flush_interval)
+
+    def _flush_or_dead_letter(self, entry): # Tulis satu pengiriman; jika ditolak, pindahkan ke jurnal dead-letter dan lanjutkan
+        try:
+            self._flush([entry])
+            return
+        except OperationalError:
+            raise
+        except Exception as error: # Ditolak permanen (constraint, data rusak, on_flush): jangan menahan antrean selamanya
+            record = json.dumps({'journal': self.journal, 'segment': entry[0], 'position': entry[1], 'error': repr(error),
+                                 'rows': entry[2]}, default=_encode, separators=(',', ':')).encode('utf-8') + b'\n'
+        with open(self._dead_letter_path(), 'ab') as handle: # Disimpan sebelum checkpoint melewatinya; bisa tercatat dua kali, tidak pernah hilang
+            handle.write(record)
+            handle.flush()
+            if self.fsync:
+                os.fsync(handle.fileno())
+        with self.engine.begin() as connection:
+            self._write_checkpoint(connection, entry[0], entry[1])
+        with self._cond:
+            self._pending.popleft()
+            self._metrics['dead_lettered'] += 1
+
+    def _decode(self, row): # Kembalikan kolom tanggal dari teks ISO dan kolom biner dari base64
+        if not self.datetime_columns and not self.binary_columns:
+            return row
+        row = dict(row)
+        for column in self.datetime_columns:
+            if isinstance(row.get(column), str):
+                row[column] = datetime.fromisoformat(row[column])
+        for column in self.binary_columns:
+            if isinstance(row.get(column), str):
+                row[column] = base64.b64decode(row[column])
+        return row
+
+    def _maybe_rotate(self): # Ganti segmen jurnal jika sudah besar dan seluruh isinya tersimpan
+        with self._cond:
+            if self._pending or self._file is None or self._file.tell() < self.max_segment_bytes:
+                return
+            old_file, old_segment = self._file, self._segment
+            self._segment = old_segment + 1
+            self._file = open(self._segment_path(self._segment), 'ab') # Pengiriman berikutnya langsung masuk segmen baru
+        old_file.close()
+        try:
+            with self.engine.begin() as connection: # Di luar kunci: enqueue tidak menunggu transaksi ini
+                self._write_checkpoint(connection, old_segment + 1, 0)
+        except Exception: # Segmen baru tetap diputar ulang saat start; segmen lama dihapus pada rotasi berikutnya
+            with self._cond:
+                self._metrics['errors'] += 1
+            return
+        self._remove_segments(lambda segment: segment <= old_segment)
+
+    # --- Jurnal dan checkpoint ---
+
+    def _claim_slot(self): # Setiap proses mengunci satu slot; slot proses yang mati diambil alih dan diputar ulang
+        if fcntl is None:
+            return 'slot-0'
+        for slot in range(MAX_SLOTS):
+            handle = open(os.path.join(self.journal_dir, f'slot-{slot}.lock'), 'a')
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                handle.close()
+                continue
+            self._lock_file = handle
+            return f'slot-{slot}'
+        raise RuntimeError('Semua slot jurnal sedang dipakai.')
+
+    def _segment_path(self, segment):
+        return os.path.join(self.journal_dir, f'{self.journal}.{segment:06d}.log')
+
+    def _dead_letter_path(self): # Tidak pernah dihapus otomatis; isinya diperiksa lalu dikirim ulang oleh operator
+        return os.path.join(self.journal_dir, f'{self.journal}.dead.jsonl')
+
+    def _segments(self): # Nomor segmen jurnal slot ini yang ada di disk, urut naik
+        prefix = f'{self.journal}.'
+        return sorted(int(name[len(prefix):-len('.log')]) for name in os.listdir(self.journal_dir)
+                      if name.startswith(prefix) and name.endswith('.log'))
+
+    def _remove_segments(self, predicate):
+        for segment in self._segments():
+            if predicate(segment):
+                os.remove(self._segment_path(segment))
+
+    def _read_checkpoint(self):
+        with self.engine.connect() as connection:
+            row = connection.execute(text(f'SELECT segment, position FROM {CHECKPOINT_TABLE} WHERE journal = :journal'),
+                                     {'journal': self.journal}).first()
+        return (row[0], row[1]) if row else (0, 0)
+
+    def _write_checkpoint(self, connection, segment, offset):
+        updated = connection.execute(text(f'UPDATE {CHECKPOINT_TABLE} SET segment = :segment, position = :position WHERE journal = :journal'),
+                                     {'journal': self.journal, 'segment': segment, 'position': offset}).rowcount
+        if not updated:
+            connection.execute(text(f'INSERT INTO {CHECKPOINT_TABLE} (journal, segment, position) VALUES (:journal, :segment, :position)'),
+                               {'journal': self.journal, 'segment': segment, 'position': offset})
+
+    def _replay(self, segment, offset): # Masukkan kembali pengiriman yang belum tersimpan sebelum crash
+        path = self._segment_path(segment)
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb') as handle:
+            handle.seek(offset)
+            while True:
+                line = handle.readline()
+                if not line.endswith(b'\n'): # Baris terakhir yang terpotong saat crash tidak pernah dibalas ke siswa
+                    break
+                self._pending.append((segment, handle.tell(), json.loads(line), time.monotonic()))
+                self._metrics['replayed'] += 1
+            valid_end = handle.tell() - len(line)
+        with open(path, 'r+b') as handle: # Buang sisa baris terpotong agar penulisan berikutnya tetap rapi
+            handle.truncate(valid_end)
@@ -0,0 +1,102 @@
+# File: common/user_cache.py
+# Cache identitas pengguna untuk user_loader Flask-Login: LRU + TTL berisi snapshot yang tidak terikat ke sesi database
+import threading # Untuk mengunci cache saat diakses banyak thread
+import time # Untuk menghitung umur entri
+from collections import OrderedDict, namedtuple # Struktur data untuk cache LRU dan snapshot pengguna
+from flask_login import UserMixin # Agar snapshot bisa langsung dipakai sebagai current_user
+from sqlalchemy import event, inspect # Untuk mendeteksi perubahan role/password lewat ORM
+from sqlalchemy.orm import Session, object_session # Untuk invalidasi setelah commit
+
+PENDING_KEY = 'user_cache_pending' # Kunci di session.info untuk ID pengguna yang menunggu commit
+
+
+class UserSnapshot(UserMixin, namedtuple('UserSnapshotBase', 'id username role')): # Identitas pengguna yang tidak bisa diubah (tanpa hash password)
+    __slots__ = ()
+
+    @classmethod
+    def from_user(cls, user): # Buat snapshot dari instance ORM
+        return cls(user.id, user.username, user.role)
+
+    def get_id(self): # ID untuk sesi Flask-Login
+        return str(self.id)
+
+
+class UserCache(object): # Cache LRU dengan TTL; entri dibuang saat role/password berubah
+    def __init__(self, User, max_entries=1024, ttl=300.0):
+        self.User = User # Model User milik aplikasi
+        self.max_entries = max_entries # Batas jumlah pengguna yang disimpan
+        self.ttl = ttl # Umur maksimum entri dalam detik (batas basi untuk perubahan dari proses lain)
+        self._entries = OrderedDict() # user_id -> (snapshot, waktu kedaluwarsa)
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'expired': 0, 'invalidations': 0, 'evictions': 0}
+
+    def load(self, session, user_id): # Pengganti query per permintaan di user_loader
+        user_id = int(user_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(user_id)
+                    self._stats['hits'] += 1
+                    return entry[0]
+                del self._entries[user_id] # Sudah kedaluwarsa
+                self._stats['expired'] += 1
+            self._stats['misses'] += 1
+        row = (session.query(self.User.id, self.User.username, self.User.role)
+               .filter(self.User.id == user_id).first())
+        if row is None:
+            return None
+        return self.put(UserSnapshot(row.id, row.username, row.role))
+
+    def put(self, snapshot): # Simpan snapshot (juga dipakai saat login agar permintaan berikutnya langsung kena cache)
+        if not isinstance(snapshot, UserSnapshot):
+            snapshot = UserSnapshot.from_user(snapshot)
+        with self._lock:
+            self._entries[snapshot.id] = (snapshot, time.monotonic() + self.ttl)
+            self._entries.move_to_end(snapshot.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+        return snapshot
+
+    def invalidate(self, user_id): # Buang satu pengguna dari cache proses ini
+        with self._lock:
+            if self._entries.pop(int(user_id), None) is not None:
+                self._stats['invalidations'] += 1
+
+    def clear(self): # Kosongkan seluruh cache
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self): # Hit/miss dan ukuran cache
+        with self._lock:
+            report = dict(self._stats)
+            report['size'] = len(self._entries)
+        lookups = report['hits'] + report['misses']
+        report['hit_ratio'] = report['hits'] / lookups if lookups else 0.0
+        report['max_entries'] = self.max_entries
+        report['ttl'] = self.ttl
+        return report
+
+    def watch(self, fields=('role', 'password')): # Invalidasi otomatis setelah commit yang mengubah field tersebut lewat ORM
+        def collect(mapper, connection, target):
+            state = inspect(target)
+            if any(state.attrs[field].history.has_changes() for field in fields):
+                object_session(target).info.setdefault(PENDING_KEY, set()).add(target.id)
+
+        def collect_deleted(mapper, connection, target):
+            object_session(target).info.setdefault(PENDING_KEY, set()).add(target.id)
+
+        def flush_pending(session): # Baru dibuang setelah commit agar tidak ada pembaca yang menyimpan nilai lama lagi
+            for user_id in session.info.pop(PENDING_KEY, ()):
+                self.invalidate(user_id)
+
+        def drop_pending(session, previous_transaction):
+            session.info.pop(PENDING_KEY, None)
+
+        event.listen(self.User, 'after_update', collect)
+        event.listen(self.User, 'after_delete', collect_deleted)
+        event.listen(Session, 'after_commit', flush_pending)
+        event.listen(Session, 'after_soft_rollback', drop_pending)
+        return self
@@ -0,0 +1,50 @@
+# File: common/variants.py
+# Varian ujian per siswa: urutan soal dan opsi diturunkan dari seed saat dirender, tidak ada salinan ujian per siswa
+# Urutan = urutan hash berkunci dari ID soal/opsi, sehingga sama di semua proses, sama untuk halaman ujian dan PDF hasil,
+# dan soal yang ditambahkan guru hanya menyisip tanpa mengacak ulang soal lain
+import hashlib # blake2b berkunci sebagai fungsi acak yang stabil
+import struct # ID soal/opsi sebagai bytes
+
+from common.exam_content import QuestionItem # Soal dengan opsi yang sudah diacak
+
+
+def variant_seed(exam_id, student_id): # Kunci 16 byte per (ujian, siswa)
+    return hashlib.blake2b(f'{exam_id}:{student_id}'.encode('ascii'), digest_size=16).digest()
+
+
+def shuffled(items, seed, salt=b''): # Urutkan item menurut hash berkunci dari ID-nya; salt membedakan urutan opsi per soal
+    def rank(item):
+        return hashlib.blake2b(struct.pack('<q', item.id), digest_size=8, key=seed, salt=salt).digest()
+    return sorted(items, key=rank)
+
+
+class ExamVariant(object): # Tampilan isi ujian (ExamContent dari cache) untuk satu siswa; dibuat per permintaan
+    __slots__ = ('content', 'student_id', 'seed', '_questions')
+
+    def __init__(self, content, student_id):
+        self.content = content # Isi ujian bersama dari ExamContentCache
+        self.student_id = student_id # ID siswa
+        self.seed = variant_seed(content.id, student_id) # Kunci urutan siswa ini
+        self._questions = None # Urutan soal (opsi belum diacak)
+
+    id = property(lambda self: self.content.id) # Atribut yang dipakai template dan PDF sama seperti ExamContent
+    title = property(lambda self: self.content.title)
+    description = property(lambda self: self.content.description)
+    version = property(lambda self: self.content.version)
+    answer_key = property(lambda self: self.content.answer_key) # Penilaian memakai ID soal/opsi, jadi tidak bergantung pada urutan
+
+    def question_order(self): # Soal dalam urutan siswa ini (opsi masih urutan asli)
+        if self._questions is None:
+            self._questions = tuple(shuffled(self.content.questions, self.seed))
+        return self._questions
+
+    def shuffle_options(self, question): # Soal dengan opsi dalam urutan siswa ini
+        return QuestionItem(question.id, question.text,
+                            tuple(shuffled(question.options, self.seed, struct.pack('<q', question.id))))
+
+    def page(self, first=0, last=None): # Satu halaman soal; hanya opsi di halaman ini yang diacak
+        return [self.shuffle_options(question) for question in self.question_order()[first:last]]
+
+    @property
+    def questions(self): # Semua soal (untuk PDF hasil)
+        return tuple(self.page())
@@ -1,2 +1,98 @@
 // Tambahkan JavaScript Anda di sini jika diperlukan
-console.log("Website manajemen ujian siap!");
\ No newline at end of file
+console.log("Website manajemen ujian siap!");
+
+// Autosave jawaban ujian: perubahan dikumpulkan lalu dikirim sekali setelah siswa berhenti mengklik
+(function () {
+    var form = document.getElementById('exam-form');
+    if (!form || !form.dataset.autosaveUrl) {
+        return;
+    }
+    var storageKey = 'exam-draft-' + form.dataset.examId; // Salinan lokal semua jawaban (untuk halaman lain)
+    var saved = {};
+    try {
+        saved = JSON.parse(sessionStorage.getItem(storageKey) || '{}');
+    } catch (e) {
+        saved = {};
+    }
+    var draft = JSON.parse(form.dataset.draft || '{}');
+    Object.keys(draft).forEach(function (questionId) {
+        saved[questionId] = draft[questionId];
+    });
+    Object.keys(saved).forEach(function (questionId) { // Centang ulang jawaban yang sudah tersimpan
+        var input = document.getElementById('option_' + saved[questionId]);
+        if (input && input.name === 'question_' + questionId) {
+            input.checked = true;
+        }
+    });
+
+    var pending = {}; // Perubahan yang belum dikonfirmasi server
+    var timer = null;
+    var DELAY_MS = 1500;
+
+    function send(useBeacon) {
+        timer = null;
+        var batch = pending;
+        if (!Object.keys(batch).length) {
+            return;
+        }
+        pending = {};
+        var body = JSON.stringify({answers: batch});
+        if (useBeacon && navigator.sendBeacon) {
+            navigator.sendBeacon(form.dataset.autosaveUrl, body); // String = text/plain; Chrome menolak beacon application/json
+            return;
+        }
+        fetch(form.dataset.autosaveUrl, {method: 'POST', headers: {'Content-Type': 'application/json'}, body: body,
+                                         credentials: 'same-origin', keepalive: true})
+            .then(function (response) {
+                if (!response.ok) {
+                    throw new Error(response.status);
+                }
+            })
+            .catch(function () { // Gagal: gabungkan lagi dan coba pada perubahan berikutnya
+                Object.keys(batch).forEach(function (questionId) {
+                    if (!(questionId in pending)) {
+                        pending[questionId] = batch[questionId];
+                    }
+                });
+            });
+    }
+
+    form.addEventListener('change', function (event) {
+        var match = /^question_(\d+)$/.exec(event.target.name || '');
+        if (!match) {
+            return;
+        }
+        pending[match[1]] = parseInt(event.target.value, 10);
+        saved[match[1]] = pending[match[1]];
+        sessionStorage.setItem(storageKey, JSON.stringify(saved));
+        if (timer) {
+            clearTimeout(timer);
+        }
+        timer = setTimeout(send, DELAY_MS);
+    });
+
+    form.addEventListener('submit', function (event) {
+        if (timer) {
+            clearTimeout(timer);
+            timer = null;
+        }
+        pending = {}; // Jawaban halaman ini ikut terkirim bersama formulir
+        if (event.submitter && event.submitter.name === 'nav') {
+            return;
+        }
+        Object.keys(saved).forEach(function (questionId) { // Selesai: sertakan jawaban dari halaman lain
+            if (!form.querySelector('[name="question_' + questionId + '"]')) {
+                var hidden = document.createElement('input');
+                hidden.type = 'hidden';
+                hidden.name = 'question_' + questionId;
+                hidden.value = saved[questionId];
+                form.appendChild(hidden);
+            }
+        });
+        sessionStorage.removeItem(storageKey);
+    });
+
+    window.addEventListener('pagehide', function () {
+        send(true);
+    });
+})();